@@ -0,0 +1,190 @@
+import dataclasses
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import typing
+
+import pydantic
+
+# The benchmarks are run from a checkout, where pysyphon may not be installed
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPOSITORY_ROOT not in sys.path:
+    sys.path.insert(0, REPOSITORY_ROOT)
+
+from pysyphon.mongodb import AbstractCollection, PysyphonSubDocument
+from pysyphon.postgresql import AbstractTable
+
+# Column types of the synthetic schemas, cycled through to reach a width
+COLUMN_TYPES = [int, float, str, datetime.datetime, bool, list[int]]
+
+
+def get_git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(
+        function: typing.Callable[[], typing.Any],
+        items: int = 1,
+        repeat: int = 5,
+        min_seconds: float = 0.2,
+) -> dict:
+    # function is called in a loop for at least min_seconds, repeat times.
+    #  items is the number of items (values, rows, documents) handled by one
+    #  call, to report a throughput
+    function()
+    number = 1
+    while True:
+        start_time = time.perf_counter()
+        for _ in range(number):
+            function()
+        if time.perf_counter() - start_time >= min_seconds / repeat:
+            break
+        number *= 2
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        for _ in range(number):
+            function()
+        timings.append((time.perf_counter() - start_time) / number)
+    median_seconds = statistics.median(timings)
+    return {
+        "median_seconds": median_seconds,
+        "min_seconds": min(timings),
+        "items": items,
+        "items_per_second": items / median_seconds,
+    }
+
+
+def save_results(results: dict[str, dict], output_path: str | None) -> None:
+    report = {
+        "commit": get_git_commit(),
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": sys.version,
+        "platform": platform.platform(),
+        "results": results,
+    }
+    for name, result in results.items():
+        print(
+            f"{name}: {result['median_seconds'] * 1000:.3f} ms, "
+            f"{result['items_per_second']:.0f} items/s"
+        )
+    if output_path is not None:
+        with open(output_path, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+
+
+def get_value(column_type: typing.Any, index: int) -> typing.Any:
+    if column_type is int:
+        return index
+    elif column_type is float:
+        return index / 7
+    elif column_type is str:
+        return f"value 'number' {index}"
+    elif column_type is datetime.datetime:
+        return datetime.datetime(2024, 1, 1) + datetime.timedelta(
+            seconds=index
+        )
+    elif column_type is bool:
+        return index % 2 == 0
+    else:
+        return list(range(index % 5))
+
+
+def make_table_class(width: int, table_name: str = "bench_table") -> type:
+    # The first column is the primary key
+    columns = [("id", int)] + [
+        (f"column_{index}", COLUMN_TYPES[index % len(COLUMN_TYPES)])
+        for index in range(1, width)
+    ]
+    row_class = dataclasses.make_dataclass(
+        "Row", columns, bases=(AbstractTable.Row,)
+    )
+    return type(f"BenchTable{width}", (AbstractTable,), {
+        "table_name": table_name,
+        "host": "localhost",
+        "user": "postgres",
+        "password": "postgres",
+        "database_name": "postgres",
+        "primary_key_column": "id",
+        "Row": row_class,
+    })
+
+
+def make_rows(table_class: type, count: int) -> list:
+    fields = dataclasses.fields(table_class.Row)
+    return [
+        table_class.Row(*[
+            get_value(field.type, index) for field in fields
+        ])
+        for index in range(count)
+    ]
+
+
+def make_collection_class(
+        width: int,
+        collection_name: str = "bench_collection",
+        port: int = 27017,
+) -> type:
+    # One field out of four is a sub-document of four fields
+    sub_document_class = pydantic.create_model(
+        "BenchSubDocument",
+        __base__=PysyphonSubDocument,
+        **{
+            f"field_{index}": (COLUMN_TYPES[index], None)
+            for index in range(4)
+        },
+    )
+    fields = [
+        (
+            f"field_{index}",
+            sub_document_class | None if index % 4 == 3
+            else COLUMN_TYPES[index % len(COLUMN_TYPES)] | None,
+        )
+        for index in range(width)
+    ]
+    document_class = dataclasses.make_dataclass(
+        "Document", fields, bases=(AbstractCollection.Document,)
+    )
+    return type(f"BenchCollection{width}", (AbstractCollection,), {
+        "collection_name": collection_name,
+        "host": "localhost",
+        "user": "",
+        "password": "",
+        "database_name": "pysyphon_bench",
+        "port": port,
+        "Document": document_class,
+    })
+
+
+def make_document_dicts(collection_class: type, count: int) -> list[dict]:
+    fields = dataclasses.fields(collection_class.Document)
+    document_dicts = []
+    for index in range(count):
+        document_dict = {}
+        for field_index, field in enumerate(fields):
+            if field_index % 4 == 3:
+                document_dict[field.name] = {
+                    f"field_{sub_index}": get_value(
+                        COLUMN_TYPES[sub_index], index
+                    )
+                    for sub_index in range(4)
+                }
+            else:
+                document_dict[field.name] = get_value(
+                    COLUMN_TYPES[field_index % len(COLUMN_TYPES)], index
+                )
+        document_dicts.append(document_dict)
+    return document_dicts
@@ -0,0 +1,51 @@
+import argparse
+import json
+import sys
+
+
+def load_report(path: str) -> dict:
+    with open(path) as report_file:
+        return json.load(report_file)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compares two benchmark results files. Exits with 1 if a "
+                    "benchmark is slower than the threshold"
+    )
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Relative slowdown considered as a regression",
+    )
+    arguments = parser.parse_args()
+    baseline = load_report(arguments.baseline)
+    candidate = load_report(arguments.candidate)
+    print(f"Baseline: {baseline['commit']}, candidate: {candidate['commit']}")
+
+    regressions = []
+    for name, candidate_result in candidate["results"].items():
+        baseline_result = baseline["results"].get(name)
+        if baseline_result is None:
+            print(f"{name}: new")
+            continue
+        ratio = candidate_result["median_seconds"] \
+            / baseline_result["median_seconds"]
+        print(
+            f"{name}: {baseline_result['median_seconds'] * 1000:.3f} ms -> "
+            f"{candidate_result['median_seconds'] * 1000:.3f} ms "
+            f"({(ratio - 1) * 100:+.1f}%)"
+        )
+        if ratio > 1 + arguments.threshold:
+            regressions.append(name)
+
+    if len(regressions) > 0:
+        print(f"Regressions: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+import argparse
+import contextlib
+import dataclasses
+import glob
+import os
+import shutil
+import subprocess
+import tempfile
+import typing
+
+import pymongo
+
+import bench_utils
+from pysyphon.postgresql.dynamic_table import DynamicTable
+
+WIDTH = 20
+BATCH_SIZE = 1000
+MONGODB_USER = "bench"
+MONGODB_PASSWORD = "bench"
+
+
+def find_binary(name: str) -> str | None:
+    # PostgreSQL binaries are usually not in the PATH on Debian based systems
+    path = shutil.which(name)
+    if path is not None:
+        return path
+    paths = sorted(glob.glob(f"/usr/lib/postgresql/*/bin/{name}"))
+    return paths[-1] if len(paths) > 0 else None
+
+
+@contextlib.contextmanager
+def start_postgresql(port: int) -> typing.Iterator[bool]:
+    # Yields whether the server could be started
+    initdb = find_binary("initdb")
+    pg_ctl = find_binary("pg_ctl")
+    if initdb is None or pg_ctl is None:
+        print("PostgreSQL binaries not found, skipping its benchmarks")
+        yield False
+        return
+    with tempfile.TemporaryDirectory() as data_directory:
+        try:
+            subprocess.run(
+                [initdb, "-D", data_directory, "-U", "postgres",
+                 "--auth=trust"],
+                check=True,
+                capture_output=True,
+            )
+            subprocess.run(
+                [pg_ctl, "-D", data_directory, "-w", "-l",
+                 os.path.join(data_directory, "server.log"),
+                 "-o", f"-p {port} -k {data_directory}", "start"],
+                check=True,
+                capture_output=True,
+            )
+        except subprocess.CalledProcessError as exception:
+            print(
+                f"PostgreSQL could not be started, skipping its benchmarks: "
+                f"{exception.stderr.decode(errors='replace')}"
+            )
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            subprocess.run(
+                [pg_ctl, "-D", data_directory, "-m", "fast", "stop"],
+                capture_output=True,
+            )
+
+
+@contextlib.contextmanager
+def start_mongodb(port: int) -> typing.Iterator[bool]:
+    # Yields whether the server could be started
+    mongod = shutil.which("mongod")
+    if mongod is None:
+        print("mongod not found, skipping the MongoDB benchmarks")
+        yield False
+        return
+    with tempfile.TemporaryDirectory() as data_directory:
+        process = subprocess.Popen(
+            [mongod, "--dbpath", data_directory, "--port", str(port),
+             "--bind_ip", "127.0.0.1"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            client = pymongo.MongoClient(
+                host="127.0.0.1",
+                port=port,
+                serverSelectionTimeoutMS=30000,
+            )
+            # The collections connect with credentials
+            client.admin.command(
+                "createUser",
+                MONGODB_USER,
+                pwd=MONGODB_PASSWORD,
+                roles=["root"],
+            )
+            client.close()
+            yield True
+        finally:
+            process.terminate()
+            process.wait()
+
+
+def run_postgresql_benchmarks(
+        results: dict,
+        port: int,
+        row_count: int,
+) -> None:
+    table_class = bench_utils.make_table_class(WIDTH)
+    table_class.host = "127.0.0.1"
+    table_class.port = port
+    row_dicts = [
+        dataclasses.asdict(row)
+        for row in bench_utils.make_rows(table_class, row_count)
+    ]
+    dynamic_table = DynamicTable(
+        table_name=table_class.table_name,
+        host=table_class.host,
+        user=table_class.user,
+        password=table_class.password,
+        database_name=table_class.database_name,
+        port=port,
+        primary_key_columns="id",
+    )
+
+    def load() -> None:
+        dynamic_table.drop_table()
+        dynamic_table.create_and_load(row_dicts)
+
+    results["postgresql_copy_load"] = bench_utils.run_benchmark(
+        load, items=row_count, repeat=3, min_seconds=0,
+    )
+    rows = bench_utils.make_rows(table_class, row_count)
+    results["postgresql_upsert"] = bench_utils.run_benchmark(
+        lambda: [
+            table_class.append_or_update_list_of_rows(
+                rows[index:index + BATCH_SIZE]
+            )
+            for index in range(0, row_count, BATCH_SIZE)
+        ],
+        items=row_count,
+        repeat=3,
+        min_seconds=0,
+    )
+    results["postgresql_scan"] = bench_utils.run_benchmark(
+        table_class.load_whole_table, items=row_count, repeat=3, min_seconds=0,
+    )
+    results["postgresql_get_many"] = bench_utils.run_benchmark(
+        lambda: table_class.get_many(list(range(row_count))),
+        items=row_count,
+        repeat=3,
+        min_seconds=0,
+    )
+    dynamic_table.drop_table()
+
+
+def run_mongodb_benchmarks(
+        results: dict,
+        port: int,
+        document_count: int,
+) -> None:
+    collection_class = bench_utils.make_collection_class(WIDTH, port=port)
+    collection_class.host = "127.0.0.1"
+    collection_class.user = MONGODB_USER
+    collection_class.password = MONGODB_PASSWORD
+    documents = [
+        collection_class.load_document_from_dict(document_dict)
+        for document_dict in bench_utils.make_document_dicts(
+            collection_class, document_count
+        )
+    ]
+
+    def load() -> None:
+        collection_class.get_collection().drop()
+        for index in range(0, document_count, BATCH_SIZE):
+            collection_class.insert_many(documents[index:index + BATCH_SIZE])
+
+    results["mongodb_insert"] = bench_utils.run_benchmark(
+        load, items=document_count, repeat=3, min_seconds=0,
+    )
+    collection_class.get_collection().create_index("field_0")
+
+    def upsert() -> None:
+        with collection_class.get_bulk_writer(
+            max_operations=BATCH_SIZE,
+            max_delay_seconds=None,
+        ) as bulk_writer:
+            for document in documents:
+                document_dict = collection_class.cast_document_to_dict(
+                    document
+                )
+                bulk_writer.set_attribute(
+                    filter_dict={"field_0": document_dict["field_0"]},
+                    set_dict=document_dict,
+                    upsert=True,
+                )
+
+    results["mongodb_upsert"] = bench_utils.run_benchmark(
+        upsert, items=document_count, repeat=3, min_seconds=0,
+    )
+    results["mongodb_scan"] = bench_utils.run_benchmark(
+        collection_class.find_many,
+        items=document_count,
+        repeat=3,
+        min_seconds=0,
+    )
+    results["mongodb_scan_raw"] = bench_utils.run_benchmark(
+        lambda: list(collection_class.iterate_raw()),
+        items=document_count,
+        repeat=3,
+        min_seconds=0,
+    )
+    collection_class.get_collection().drop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Load, upsert and scan throughput against local "
+                    "PostgreSQL and MongoDB servers started for the run"
+    )
+    parser.add_argument("--output", help="Path of the JSON results")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--postgresql-port", type=int, default=55432)
+    parser.add_argument("--mongodb-port", type=int, default=57017)
+    arguments = parser.parse_args()
+    results = {}
+    with start_postgresql(arguments.postgresql_port) as started:
+        if started:
+            run_postgresql_benchmarks(
+                results, arguments.postgresql_port, arguments.rows
+            )
+    with start_mongodb(arguments.mongodb_port) as started:
+        if started:
+            run_mongodb_benchmarks(
+                results, arguments.mongodb_port, arguments.rows
+            )
+    bench_utils.save_results(results, arguments.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import argparse
+import subprocess
+import sys
+
+import bench_utils
+
+# Modules which must not be imported by a statement, as they are only needed
+#  by some features
+HEAVY_MODULES = ("pandas", "numpy", "pymongo", "pydantic")
+IMPORT_STATEMENTS = {
+    "pysyphon": "import pysyphon",
+    "pysyphon.postgresql": "from pysyphon.postgresql import AbstractTable",
+    "pysyphon.mongodb": "from pysyphon.mongodb import AbstractCollection",
+}
+ALLOWED_MODULES = {
+    "pysyphon.mongodb": {"pymongo"},
+}
+
+
+def measure_import(statement: str) -> tuple[float, list[str]]:
+    # Each import runs in a new interpreter, so that nothing is cached.
+    #  Returns the cumulated import time in seconds and the heavy modules
+    #  imported by the statement
+    process = subprocess.run(
+        [
+            sys.executable, "-X", "importtime", "-c",
+            f"{statement}\nimport sys\n"
+            f"print(','.join(module for module in {HEAVY_MODULES!r} "
+            f"if module in sys.modules))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+        # -c imports from the working directory
+        cwd=bench_utils.REPOSITORY_ROOT,
+    )
+    # Lines are "import time: self | cumulative | name", top level imports
+    #  are not indented
+    cumulative_microseconds = 0
+    for line in process.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and not parts[2].startswith("  ") \
+                and parts[1].strip().isdigit():
+            cumulative_microseconds += int(parts[1])
+    imported_modules = [
+        module for module in process.stdout.strip().split(",") if module
+    ]
+    return cumulative_microseconds / 1e6, imported_modules
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Measures the import time of pysyphon and checks that "
+                    "optional dependencies are imported lazily"
+    )
+    parser.add_argument("--output", help="Path of the JSON results")
+    parser.add_argument("--repeat", type=int, default=5)
+    arguments = parser.parse_args()
+    results = {}
+    errors = []
+    for name, statement in IMPORT_STATEMENTS.items():
+        timings = []
+        for _ in range(arguments.repeat):
+            import_seconds, imported_modules = measure_import(statement)
+            timings.append(import_seconds)
+        timings.sort()
+        results[f"import[{name}]"] = {
+            "median_seconds": timings[len(timings) // 2],
+            "min_seconds": timings[0],
+            "items": 1,
+            "items_per_second": 1 / timings[len(timings) // 2],
+        }
+        unexpected_modules = set(imported_modules) \
+            - ALLOWED_MODULES.get(name, set())
+        if len(unexpected_modules) > 0:
+            errors.append(
+                f"'{statement}' imports "
+                f"{', '.join(sorted(unexpected_modules))}"
+            )
+    bench_utils.save_results(results, arguments.output)
+    if len(errors) > 0:
+        print("\n".join(errors))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import argparse
+import dataclasses
+import inspect
+
+import bench_utils
+from pysyphon.postgresql import postgresql_functions
+
+WIDTHS = (5, 20, 100)
+ROW_COUNT = 1000
+
+
+def run_sql_rendering_benchmarks(results: dict) -> None:
+    for column_type in bench_utils.COLUMN_TYPES:
+        values = [
+            bench_utils.get_value(column_type, index) for index in range(1000)
+        ]
+        type_name = getattr(column_type, "__name__", str(column_type))
+        results[f"past_value_to_sql[{type_name}]"] = bench_utils.run_benchmark(
+            lambda: [
+                postgresql_functions.past_value_to_sql(value)
+                for value in values
+            ],
+            items=len(values),
+        )
+    for width in WIDTHS:
+        table_class = bench_utils.make_table_class(width)
+        row_dicts = [
+            dataclasses.asdict(row)
+            for row in bench_utils.make_rows(table_class, ROW_COUNT)
+        ]
+        results[f"append_or_update[width={width}]"] = (
+            bench_utils.run_benchmark(
+                lambda: postgresql_functions.append_or_update(
+                    table_name=table_class.table_name,
+                    row_dicts=row_dicts,
+                    primary_key_column=table_class.primary_key_column,
+                ),
+                items=len(row_dicts),
+            )
+        )
+        result = [
+            tuple(row_dict.values()) for row_dict in row_dicts
+        ]
+        results[f"build_rows_from_result[width={width}]"] = (
+            bench_utils.run_benchmark(
+                lambda: table_class.build_rows_from_result(result),
+                items=len(result),
+            )
+        )
+
+
+def run_document_benchmarks(results: dict) -> None:
+    for width in WIDTHS:
+        collection_class = bench_utils.make_collection_class(width)
+        document_dicts = bench_utils.make_document_dicts(
+            collection_class, ROW_COUNT
+        )
+        documents = [
+            collection_class.load_document_from_dict(document_dict)
+            for document_dict in document_dicts
+        ]
+        results[f"document_to_dict[width={width}]"] = (
+            bench_utils.run_benchmark(
+                lambda: [document.to_dict() for document in documents],
+                items=len(documents),
+            )
+        )
+        # Older commits, compared against, have no trusted loading
+        load_document = collection_class.Document \
+            .load_document_with_sub_documents
+        if "trusted" in inspect.signature(load_document).parameters:
+            trusted_options = (False, True)
+        else:
+            trusted_options = (False,)
+        for trusted in trusted_options:
+            kwargs = {"trusted": True} if trusted else {}
+            results[
+                f"load_document_with_sub_documents[width={width},"
+                f"trusted={trusted}]"
+            ] = bench_utils.run_benchmark(
+                lambda: [
+                    load_document(input_dict=document_dict, **kwargs)
+                    for document_dict in document_dicts
+                ],
+                items=len(document_dicts),
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Microbenchmarks of SQL rendering and document encoding"
+    )
+    parser.add_argument("--output", help="Path of the JSON results")
+    arguments = parser.parse_args()
+    results = {}
+    run_sql_rendering_benchmarks(results)
+    run_document_benchmarks(results)
+    bench_utils.save_results(results, arguments.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,23 @@
-import pysyphon.postgresql
-import pysyphon.mongodb
+import importlib
+
+# Sub-packages are imported when first accessed, so that importing one of
+#  them does not import the dependencies of the others
+_SUBMODULES = (
+    "postgresql",
+    "mongodb",
+    "replication",
+    "sources",
+    "etl_pipeline",
+    "instrumentation",
+    "writers",
+)
+
+
+def __getattr__(name: str):
+    if name in _SUBMODULES:
+        return importlib.import_module(f"pysyphon.{name}")
+    raise AttributeError(f"module 'pysyphon' has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + list(_SUBMODULES))
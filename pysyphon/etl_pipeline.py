@@ -0,0 +1,347 @@
+from __future__ import annotations
+
+import concurrent.futures
+import dataclasses
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+import typing
+
+from pysyphon import writers
+
+LOG = logging.getLogger(__name__)
+
+# Put in a queue after the last batch
+_END = object()
+# Seconds between checks of the stop event while blocked on a queue
+_QUEUE_TIMEOUT_SECONDS = 0.1
+
+
+class PipelineStopped(Exception):
+    pass
+
+
+@dataclasses.dataclass
+class StageStats:
+    name: str
+    items_in: int = 0
+    items_out: int = 0
+    batches: int = 0
+    # Time spent processing, waiting for input and blocked on a full output
+    #  queue
+    busy_seconds: float = 0.0
+    input_wait_seconds: float = 0.0
+    output_wait_seconds: float = 0.0
+    queue_depth_sum: int = 0
+    max_queue_depth: int = 0
+
+    def get_throughput(self) -> float:
+        # Items produced per second of processing
+        if self.busy_seconds == 0:
+            return 0.0
+        return self.items_out / self.busy_seconds
+
+    def get_average_queue_depth(self) -> float:
+        # Depth of the output queue, in batches, when a batch is added
+        if self.batches == 0:
+            return 0.0
+        return self.queue_depth_sum / self.batches
+
+    def __str__(self):
+        return (
+            f"{self.name}: {self.items_in} in, {self.items_out} out, "
+            f"{self.get_throughput():.1f} items/s, "
+            f"busy {self.busy_seconds:.2f} s, "
+            f"waiting for input {self.input_wait_seconds:.2f} s, "
+            f"blocked on output {self.output_wait_seconds:.2f} s, "
+            f"output queue depth {self.get_average_queue_depth():.1f} "
+            f"(max {self.max_queue_depth})"
+        )
+
+
+def apply_transform(
+        function: typing.Callable[[typing.Any], typing.Any],
+        batch: list,
+) -> list:
+    # Module level so that it can be sent to a process pool. function returns
+    #  an item, a list of items, or None to drop the item
+    transformed_batch = []
+    for item in batch:
+        result = function(item)
+        if result is None:
+            continue
+        elif isinstance(result, list):
+            transformed_batch.extend(result)
+        else:
+            transformed_batch.append(result)
+    return transformed_batch
+
+
+@dataclasses.dataclass
+class Stage:
+    name: str
+    function: typing.Callable
+    use_processes: bool = False
+    max_workers: int | None = None
+
+
+class Pipeline:
+    # Runs a source, transforms and a sink in their own threads, joined by
+    #  queues of at most queue_size batches of batch_size items. A stage
+    #  faster than the next one blocks on the full queue instead of filling
+    #  the memory. Transforms with use_processes run their batches in a
+    #  process pool (the function must be picklable, so defined at module
+    #  level). The first error stops all the stages and is raised by run
+    def __init__(
+            self,
+            source: typing.Iterable,
+            batch_size: int = 1000,
+            queue_size: int = 4,
+    ):
+        self.source = source
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.transforms: list[Stage] = []
+        self.sink: Stage | None = None
+        self.stats: dict[str, StageStats] = {}
+        self.stop_event = threading.Event()
+        self.exception: BaseException | None = None
+
+    def transform(
+            self,
+            function: typing.Callable[[typing.Any], typing.Any],
+            name: str | None = None,
+            use_processes: bool = False,
+            max_workers: int | None = None,
+    ) -> Pipeline:
+        self.transforms.append(Stage(
+            name=function.__name__ if name is None else name,
+            function=function,
+            use_processes=use_processes,
+            max_workers=max_workers,
+        ))
+        return self
+
+    def to_sink(
+            self,
+            function: typing.Callable[[list], typing.Any],
+            name: str = "sink",
+    ) -> Pipeline:
+        # function receives each batch
+        self.sink = Stage(name=name, function=function)
+        return self
+
+    def to_table(self, table_class: typing.Any) -> Pipeline:
+        # Items must be table_class.Row, upserted batch by batch
+        return self.to_sink(
+            function=lambda rows: writers.write_rows(table_class, rows),
+            name=table_class.table_name,
+        )
+
+    def to_collection(
+            self,
+            collection_class: typing.Any,
+            key_field: str | None = None,
+    ) -> Pipeline:
+        # Items must be collection_class.Document, inserted, or upserted on
+        #  key_field if given, through a BulkWriter flushed after each batch
+        bulk_writer = collection_class.get_bulk_writer(max_delay_seconds=None)
+        return self.to_sink(
+            function=lambda documents: writers.write_documents(
+                collection_class=collection_class,
+                bulk_writer=bulk_writer,
+                documents=documents,
+                key_field=key_field,
+            ),
+            name=collection_class.collection_name,
+        )
+
+    def put(
+            self,
+            output_queue: queue.Queue,
+            batch: typing.Any,
+            stats: StageStats,
+    ) -> None:
+        start_time = time.monotonic()
+        while True:
+            if self.stop_event.is_set():
+                raise PipelineStopped
+            try:
+                output_queue.put(batch, timeout=_QUEUE_TIMEOUT_SECONDS)
+                break
+            except queue.Full:
+                pass
+        stats.output_wait_seconds += time.monotonic() - start_time
+        if batch is not _END:
+            depth = output_queue.qsize()
+            stats.queue_depth_sum += depth
+            stats.max_queue_depth = max(stats.max_queue_depth, depth)
+
+    def get(
+            self,
+            input_queue: queue.Queue,
+            stats: StageStats,
+    ) -> typing.Any:
+        start_time = time.monotonic()
+        while True:
+            if self.stop_event.is_set():
+                raise PipelineStopped
+            try:
+                batch = input_queue.get(timeout=_QUEUE_TIMEOUT_SECONDS)
+                break
+            except queue.Empty:
+                pass
+        stats.input_wait_seconds += time.monotonic() - start_time
+        return batch
+
+    def iterate_batches(
+            self,
+            input_queue: queue.Queue,
+            stats: StageStats,
+    ) -> typing.Iterator[list]:
+        while (batch := self.get(input_queue, stats)) is not _END:
+            stats.items_in += len(batch)
+            yield batch
+
+    def run_source(self, output_queue: queue.Queue, stats: StageStats) -> None:
+        iterator = iter(self.source)
+        while True:
+            start_time = time.monotonic()
+            batch = list(itertools.islice(iterator, self.batch_size))
+            stats.busy_seconds += time.monotonic() - start_time
+            if len(batch) == 0:
+                break
+            stats.items_out += len(batch)
+            stats.batches += 1
+            self.put(output_queue, batch, stats)
+        self.put(output_queue, _END, stats)
+
+    def run_transform(
+            self,
+            stage: Stage,
+            input_queue: queue.Queue,
+            output_queue: queue.Queue,
+            stats: StageStats,
+    ) -> None:
+        if not stage.use_processes:
+            for batch in self.iterate_batches(input_queue, stats):
+                start_time = time.monotonic()
+                transformed_batch = apply_transform(stage.function, batch)
+                stats.busy_seconds += time.monotonic() - start_time
+                self.put_transformed_batch(
+                    output_queue, transformed_batch, stats
+                )
+        else:
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=stage.max_workers
+            ) as executor:
+                # Enough batches in flight to keep the workers busy, results
+                #  are sent in order
+                max_pending = 2 * (stage.max_workers or os.cpu_count() or 1)
+                pending = []
+                start_time = time.monotonic()
+                for batch in self.iterate_batches(input_queue, stats):
+                    pending.append(
+                        executor.submit(apply_transform, stage.function, batch)
+                    )
+                    if len(pending) >= max_pending:
+                        self.put_transformed_batch(
+                            output_queue, pending.pop(0).result(), stats
+                        )
+                for future in pending:
+                    self.put_transformed_batch(
+                        output_queue, future.result(), stats
+                    )
+                # Workers run in parallel, so the wall time is used
+                stats.busy_seconds = time.monotonic() - start_time \
+                    - stats.input_wait_seconds - stats.output_wait_seconds
+        self.put(output_queue, _END, stats)
+
+    def put_transformed_batch(
+            self,
+            output_queue: queue.Queue,
+            batch: list,
+            stats: StageStats,
+    ) -> None:
+        if len(batch) == 0:
+            return
+        stats.items_out += len(batch)
+        stats.batches += 1
+        self.put(output_queue, batch, stats)
+
+    def run_sink(self, input_queue: queue.Queue, stats: StageStats) -> None:
+        for batch in self.iterate_batches(input_queue, stats):
+            start_time = time.monotonic()
+            self.sink.function(batch)
+            stats.busy_seconds += time.monotonic() - start_time
+            stats.items_out += len(batch)
+            stats.batches += 1
+
+    def run_stage(self, target: typing.Callable, *args) -> None:
+        try:
+            target(*args)
+        except PipelineStopped:
+            pass
+        except BaseException as exception:
+            if self.exception is None:
+                self.exception = exception
+            self.stop_event.set()
+
+    def run(self) -> dict[str, StageStats]:
+        if self.sink is None:
+            raise ValueError("A sink must be set before running the pipeline.")
+        # Stats are kept by stage name
+        names = ["source"] + [stage.name for stage in self.transforms] \
+            + [self.sink.name]
+        duplicated_names = {name for name in names if names.count(name) > 1}
+        if len(duplicated_names) > 0:
+            raise ValueError(
+                f"Stage names must be unique, {sorted(duplicated_names)} are "
+                f"used several times. Give the stages a name."
+            )
+        self.stop_event.clear()
+        self.exception = None
+        queues = [
+            queue.Queue(maxsize=self.queue_size)
+            for _ in range(len(self.transforms) + 1)
+        ]
+        self.stats = {"source": StageStats(name="source")}
+        threads = [threading.Thread(
+            target=self.run_stage,
+            args=(self.run_source, queues[0], self.stats["source"]),
+        )]
+        for index, stage in enumerate(self.transforms):
+            self.stats[stage.name] = StageStats(name=stage.name)
+            threads.append(threading.Thread(
+                target=self.run_stage,
+                args=(
+                    self.run_transform,
+                    stage,
+                    queues[index],
+                    queues[index + 1],
+                    self.stats[stage.name],
+                ),
+            ))
+        self.stats[self.sink.name] = StageStats(name=self.sink.name)
+        threads.append(threading.Thread(
+            target=self.run_stage,
+            args=(self.run_sink, queues[-1], self.stats[self.sink.name]),
+        ))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if self.exception is not None:
+            raise self.exception
+        for stats in self.stats.values():
+            LOG.info(str(stats))
+        return self.stats
+
+    def get_bottleneck(self) -> StageStats | None:
+        # Stage which spent the most time processing in the last run
+        if len(self.stats) == 0:
+            return None
+        return max(self.stats.values(), key=lambda stats: stats.busy_seconds)
@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import bisect
+import dataclasses
+import logging
+import threading
+import time
+import typing
+
+LOG = logging.getLogger(__name__)
+
+# Functions called with each OperationEvent. Operations are only timed when
+#  there is at least one listener
+_LISTENERS: list[typing.Callable[[OperationEvent], typing.Any]] = []
+
+
+@dataclasses.dataclass
+class OperationEvent:
+    # backend is "postgresql" or "mongodb", target the table or collection
+    backend: str
+    operation: str
+    target: str
+    rows: int = 0
+    # Encoded size of the sent query or documents when known
+    bytes: int | None = None
+    # Exception class name when the operation failed
+    error: str | None = None
+    connection_wait_ms: float = 0.0
+    server_ms: float = 0.0
+    encode_ms: float = 0.0
+    decode_ms: float = 0.0
+    total_ms: float = 0.0
+
+    def __str__(self):
+        return (
+            f"{self.backend} {self.operation} on {self.target}: "
+            f"{self.total_ms:.1f} ms (connection {self.connection_wait_ms:.1f}"
+            f" ms, server {self.server_ms:.1f} ms, encode "
+            f"{self.encode_ms:.1f} ms, decode {self.decode_ms:.1f} ms), "
+            f"{self.rows} rows"
+            + ("" if self.bytes is None else f", {self.bytes} bytes")
+            + ("" if self.error is None else f", failed with {self.error}")
+        )
+
+
+class OperationTimer:
+    # Splits the time of an operation between the phases of its event: each
+    #  lap adds the time since the previous lap to a field of the event
+    def __init__(self, backend: str, operation: str, target: str):
+        self.event = OperationEvent(
+            backend=backend,
+            operation=operation,
+            target=target,
+        )
+        self.start_time = time.perf_counter()
+        self.last_time = self.start_time
+        self.excluded_ms = 0.0
+
+    def lap(self, field: str) -> None:
+        now = time.perf_counter()
+        setattr(
+            self.event,
+            field,
+            getattr(self.event, field) + (now - self.last_time) * 1000,
+        )
+        self.last_time = now
+
+    def skip(self) -> None:
+        # The time since the last lap is not part of the operation, like the
+        #  time spent by the caller of a generator
+        now = time.perf_counter()
+        self.excluded_ms += (now - self.last_time) * 1000
+        self.last_time = now
+
+    def add_rows(self, rows: int, bytes_: int | None = None) -> None:
+        self.event.rows += rows
+        if bytes_ is not None:
+            self.event.bytes = (self.event.bytes or 0) + bytes_
+
+    def add_query(self, query: str) -> None:
+        # Queries are only encoded when the operation is timed
+        self.add_rows(0, len(query.encode()))
+
+    def finish(self, error: BaseException | None = None) -> None:
+        if error is not None:
+            self.event.error = type(error).__name__
+        self.event.total_ms = (
+            (time.perf_counter() - self.start_time) * 1000 - self.excluded_ms
+        )
+        emit(self.event)
+
+    def __enter__(self) -> OperationTimer:
+        return self
+
+    def __exit__(self, exception_type, exception, traceback) -> None:
+        # Successful operations call finish themselves, failed ones are
+        #  emitted when leaving the block
+        if isinstance(exception, Exception):
+            self.finish(error=exception)
+
+
+class DisabledTimer(OperationTimer):
+    # Returned when there is no listener, so that the instrumented code does
+    #  not need to check it
+    def __init__(self):
+        pass
+
+    def lap(self, field: str) -> None:
+        pass
+
+    def skip(self) -> None:
+        pass
+
+    def add_rows(self, rows: int, bytes_: int | None = None) -> None:
+        pass
+
+    def add_query(self, query: str) -> None:
+        pass
+
+    def finish(self, error: BaseException | None = None) -> None:
+        pass
+
+
+_DISABLED_TIMER = DisabledTimer()
+
+
+def add_listener(
+        listener: typing.Callable[[OperationEvent], typing.Any],
+) -> None:
+    _LISTENERS.append(listener)
+
+
+def remove_listener(
+        listener: typing.Callable[[OperationEvent], typing.Any],
+) -> None:
+    _LISTENERS.remove(listener)
+
+
+def is_enabled() -> bool:
+    return len(_LISTENERS) > 0
+
+
+def start_operation(
+        backend: str,
+        operation: str,
+        target: str,
+) -> OperationTimer:
+    if len(_LISTENERS) == 0:
+        return _DISABLED_TIMER
+    return OperationTimer(backend=backend, operation=operation, target=target)
+
+
+def emit(event: OperationEvent) -> None:
+    # A failing listener must not fail the operation
+    for listener in list(_LISTENERS):
+        try:
+            listener(event)
+        except Exception as exception:
+            LOG.warning(f"Instrumentation listener {listener} failed: "
+                        f"{exception}")
+
+
+class SlowOperationLogger:
+    # Logs the operations which took at least threshold_ms
+    def __init__(
+            self,
+            threshold_ms: float = 1000.0,
+            logger: logging.Logger = LOG,
+    ):
+        self.threshold_ms = threshold_ms
+        self.logger = logger
+
+    def __call__(self, event: OperationEvent) -> None:
+        if event.total_ms >= self.threshold_ms:
+            self.logger.warning(f"Slow operation: {event}")
+
+
+@dataclasses.dataclass
+class OperationHistogram:
+    # counts[i] is the number of operations of at most bucket_bounds_ms[i],
+    #  the last count is for the slower ones
+    bucket_bounds_ms: tuple[float, ...]
+    counts: list[int]
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    rows: int = 0
+    server_ms: float = 0.0
+    decode_ms: float = 0.0
+    encode_ms: float = 0.0
+    connection_wait_ms: float = 0.0
+    errors: int = 0
+
+    def add_event(self, event: OperationEvent) -> None:
+        self.counts[bisect.bisect_left(
+            self.bucket_bounds_ms, event.total_ms
+        )] += 1
+        self.count += 1
+        self.total_ms += event.total_ms
+        self.max_ms = max(self.max_ms, event.total_ms)
+        self.rows += event.rows
+        self.server_ms += event.server_ms
+        self.decode_ms += event.decode_ms
+        self.encode_ms += event.encode_ms
+        self.connection_wait_ms += event.connection_wait_ms
+        if event.error is not None:
+            self.errors += 1
+
+    def get_percentile(self, percentile: float) -> float:
+        # Upper bound of the bucket of the percentile, max_ms for the last
+        #  bucket
+        rank = percentile / 100 * self.count
+        cumulated_count = 0
+        for bound, count in zip(self.bucket_bounds_ms, self.counts):
+            cumulated_count += count
+            if cumulated_count >= rank:
+                return bound
+        return self.max_ms
+
+
+class HistogramExporter:
+    # Keeps a latency histogram per (backend, operation, target) in memory
+    def __init__(
+            self,
+            bucket_bounds_ms: tuple[float, ...] = (
+                1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000,
+            ),
+    ):
+        self.bucket_bounds_ms = tuple(bucket_bounds_ms)
+        self.histograms: dict[tuple[str, str, str], OperationHistogram] = {}
+        self.lock = threading.Lock()
+
+    def __call__(self, event: OperationEvent) -> None:
+        key = (event.backend, event.operation, event.target)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = OperationHistogram(
+                    bucket_bounds_ms=self.bucket_bounds_ms,
+                    counts=[0] * (len(self.bucket_bounds_ms) + 1),
+                )
+                self.histograms[key] = histogram
+            histogram.add_event(event)
+
+    def get_histograms(self) -> dict[tuple[str, str, str], OperationHistogram]:
+        # Slowest operations first
+        with self.lock:
+            return dict(sorted(
+                self.histograms.items(),
+                key=lambda item: item[1].total_ms,
+                reverse=True,
+            ))
+
+    def reset(self) -> None:
+        with self.lock:
+            self.histograms = {}
+
+    def __str__(self):
+        return "\n".join([
+            f"{backend} {operation} on {target}: {histogram.count} "
+            f"operations, {histogram.total_ms:.1f} ms, p50 <= "
+            f"{histogram.get_percentile(50)} ms, p99 <= "
+            f"{histogram.get_percentile(99)} ms, max "
+            f"{histogram.max_ms:.1f} ms"
+            for (backend, operation, target), histogram
+            in self.get_histograms().items()
+        ])
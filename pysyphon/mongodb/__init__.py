@@ -1,2 +1,37 @@
-from pysyphon.mongodb.abstract_collection import AbstractCollection
-from pysyphon.mongodb.pysyphon_sub_document import PysyphonSubDocument
+import importlib
+
+# Exported names by module, imported when first accessed so that pymongo and
+#  pydantic are only imported by the features using them
+_EXPORTS = {
+    "AbstractCollection": "pysyphon.mongodb.abstract_collection",
+    "PysyphonSubDocument": "pysyphon.mongodb.pysyphon_sub_document",
+    "BulkWriter": "pysyphon.mongodb.bulk_writer",
+    "BulkWriteSummary": "pysyphon.mongodb.bulk_writer",
+    "LazyDocument": "pysyphon.mongodb.lazy_document",
+    "AggregationPipeline": "pysyphon.mongodb.aggregation_pipeline",
+    "CollectionIndex": "pysyphon.mongodb.collection_index",
+    "QueryProfiler": "pysyphon.mongodb.query_profiler",
+    "CollectionCache": "pysyphon.mongodb.collection_cache",
+}
+
+
+def __getattr__(name: str):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        # Sub-modules, like document_codec, are also imported on
+        #  first access
+        try:
+            return importlib.import_module(f"{__name__}.{name}")
+        except ModuleNotFoundError as exception:
+            if exception.name != f"{__name__}.{name}":
+                raise
+        raise AttributeError(
+            f"module 'pysyphon.mongodb' has no attribute {name!r}"
+        )
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + list(_EXPORTS))
@@ -1,13 +1,30 @@
 from __future__ import annotations
 
-import copy
+import contextlib
 import dataclasses
-import inspect
+import re
+import time
 import typing
-import sys
 
+import bson.codec_options
+import bson.raw_bson
+import bson.regex
 import pymongo
+import pymongo.asynchronous.collection
 import pymongo.collection
+import pymongo.cursor
+import pymongo.results
+
+from pysyphon import instrumentation
+from pysyphon.mongodb import document_codec
+from pysyphon.mongodb import mongo_clients
+from pysyphon.mongodb import range_scan
+from pysyphon.mongodb.aggregation_pipeline import AggregationPipeline
+from pysyphon.mongodb.bulk_writer import BulkWriter
+from pysyphon.mongodb.collection_cache import CollectionCache
+from pysyphon.mongodb.collection_index import CollectionIndex
+from pysyphon.mongodb.lazy_document import LazyDocument
+from pysyphon.mongodb.query_profiler import QueryProfiler
 
 
 class AbstractCollection:
@@ -19,6 +36,20 @@ class AbstractCollection:
     port: int = 27017
     overwrite_dict_casting: typing.Callable | None = None
     overwrite_dict_loading: typing.Callable | None = None
+    # Build sub-documents without pydantic validation when loading documents.
+    #  Only for collections written through pysyphon
+    trusted_reads: bool = False
+    # Options of the MongoClient shared by the collections with the same URI
+    max_pool_size: int = 100
+    min_pool_size: int = 0
+    server_selection_timeout_ms: int = 30000
+    connect_timeout_ms: int = 20000
+    socket_timeout_ms: int | None = None
+    # Indexes created by ensure_indexes
+    indexes: list[CollectionIndex] = []
+    # Set to record the latency and plans of the filters used by the class
+    #  methods. Can be shared between collections
+    query_profiler: QueryProfiler | None = None
 
     def __init_subclass__(cls):
         # This is needed to enforce the children behaviours
@@ -51,20 +82,13 @@ class AbstractCollection:
                 keep_nones: bool = False,
                 cast_sub_documents: bool = True,
         ) -> dict:
-            if keep_nones:
-                dict_ = dataclasses.asdict(self)
-            else:
-                dict_ = {
-                    key: value for key, value
-                    in dataclasses.asdict(self).items() if value is not None
-                }
-
-            if cast_sub_documents:
-                for key, value in dict_.items():
-                    if "psd_to_dict" in dir(value):
-                        dict_[key] = value.psd_to_dict()
-
-            return dict_
+            # Sub-documents fields are found once per class from the
+            #  annotations. Values are not copied
+            return document_codec.get_encoder(type(self))(
+                self,
+                keep_nones=keep_nones,
+                cast_sub_documents=cast_sub_documents,
+            )
 
         @classmethod
         def load_from_dict(cls, input_dict: dict) -> Document:
@@ -84,43 +108,171 @@ class AbstractCollection:
                 cls,
                 input_dict: dict,
                 collection_classes: dict | None = None,
+                trusted: bool = False,
         ) -> Document:
-            # Tries to get the calling script classes. If this does not work,
-            #  the classes can be sent directly from the calling function with:
-            # dict(inspect.getmembers(
-            #     sys.modules[calling_frame.__module__], inspect.isclass
-            # ))
-            # Might be better to pass in the classes directly
-            if collection_classes is None:
-                frame = inspect.currentframe()
-                calling_frame = frame.f_back
-                collection_classes = {
-                    key: value for key, value in calling_frame.f_globals.items()
-                    if inspect.isclass(value)
-                }
+            # Sub-documents classes are resolved from the annotations once per
+            #  Document class and collection_classes, which can be given for
+            #  classes which can't be found from the module of the Document.
+            #  Trusted sub-documents are built without validation
+            return document_codec.get_decoder(
+                document_class=cls,
+                localns=collection_classes,
+                trusted=trusted,
+            )(input_dict)
+
+    @classmethod
+    def get_uri(cls) -> str:
+        return f"mongodb://{cls.user}:{cls.password}@{cls.host}:{cls.port}"
+
+    @classmethod
+    def get_client_options(cls) -> dict:
+        return {
+            "maxPoolSize": cls.max_pool_size,
+            "minPoolSize": cls.min_pool_size,
+            "serverSelectionTimeoutMS": cls.server_selection_timeout_ms,
+            "connectTimeoutMS": cls.connect_timeout_ms,
+            "socketTimeoutMS": cls.socket_timeout_ms,
+        }
 
-            dict_ = copy.deepcopy(input_dict)
-            dataclass_annotations = cls.__annotations__
-            dataclass_annotations = {
-                key: value.replace(" | None", "").strip()
-                for key, value in dataclass_annotations.items()
-            }
-            for variable_name, variable_type in dataclass_annotations.items():
-                if variable_type in collection_classes:
-                    variable_class = collection_classes[variable_type]
-                    if "psd_from_dict" in dir(variable_class):
-                        dict_[variable_name] = variable_class.parse_obj(
-                            input_dict[variable_name]
-                        )
+    @classmethod
+    def get_client(cls) -> pymongo.MongoClient:
+        # The client is shared and must not be closed by callers
+        return mongo_clients.get_client(
+            cls.get_uri(),
+            **cls.get_client_options(),
+        )
+
+    @classmethod
+    def get_collection(cls) -> pymongo.collection.Collection:
+        return cls.get_client().get_database(
+            cls.database_name
+        ).get_collection(cls.collection_name)
+
+    @classmethod
+    def get_async_client(cls) -> pymongo.AsyncMongoClient:
+        # Shared by the collections used in the running event loop
+        return mongo_clients.get_async_client(
+            cls.get_uri(),
+            **cls.get_client_options(),
+        )
+
+    @classmethod
+    def get_async_collection(
+            cls,
+    ) -> pymongo.asynchronous.collection.AsyncCollection:
+        return cls.get_async_client().get_database(
+            cls.database_name
+        ).get_collection(cls.collection_name)
+
+    @classmethod
+    def get_raw_collection(cls) -> pymongo.collection.Collection:
+        # Returns documents as RawBSONDocument, decoded only when accessed
+        collection = cls.get_collection()
+        return collection.with_options(
+            codec_options=collection.codec_options.with_options(
+                document_class=bson.raw_bson.RawBSONDocument,
+            ),
+        )
+
+    @classmethod
+    def ensure_indexes(cls) -> list[str]:
+        # Creates the indexes of cls.indexes that don't exist yet and returns
+        #  their names. Indexes are matched on their name, or on their keys
+        #  for indexes created under another name (e.g. "_id_"). An existing
+        #  index whose keys or options differ must be dropped to be recreated
+        collection = cls.get_collection()
+        existing_indexes = collection.index_information()
+        names_by_keys = {
+            tuple(tuple(key) for key in index_information["key"]): name
+            for name, index_information in existing_indexes.items()
+        }
+        missing_indexes = []
+        for index in cls.indexes:
+            index_name = index.get_name()
+            if index_name not in existing_indexes:
+                index_name = names_by_keys.get(tuple(index.get_keys()))
+            if index_name is None:
+                missing_indexes.append(index)
+                continue
+            differences = index.get_differences(existing_indexes[index_name])
+            if len(differences) > 0:
+                raise ValueError(
+                    f"Index {index_name} of {cls.collection_name} exists with "
+                    f"a different {', '.join(differences)}. Drop it to "
+                    f"create it with the new definition."
+                )
+        if len(missing_indexes) == 0:
+            return []
+        return collection.create_indexes(
+            [index.to_index_model() for index in missing_indexes]
+        )
+
+    @classmethod
+    @contextlib.contextmanager
+    def instrument_operation(
+            cls,
+            operation: str,
+    ) -> typing.Iterator[instrumentation.OperationTimer]:
+        # The time not attributed to another phase by the operation is spent
+        #  waiting for the server
+        timer = instrumentation.start_operation(
+            "mongodb", operation, cls.collection_name
+        )
+        error = None
+        try:
+            yield timer
+        except Exception as exception:
+            error = exception
+            raise
+        finally:
+            timer.lap("server_ms")
+            timer.finish(error=error)
+
+    @classmethod
+    @contextlib.contextmanager
+    def profile_query(
+            cls,
+            operation: str,
+            filter_dict: dict | None,
+    ) -> typing.Iterator[instrumentation.OperationTimer]:
+        with cls.instrument_operation(operation) as timer:
+            if cls.query_profiler is None:
+                yield timer
+                return
+            start = time.perf_counter()
+            yield timer
+            cls.query_profiler.record(
+                collection_class=cls,
+                operation=operation,
+                filter_dict=filter_dict,
+                time_ms=(time.perf_counter() - start) * 1000,
+            )
 
-            return cls.load_from_dict(dict_)
+    @staticmethod
+    def add_sent_bytes(
+            timer: instrumentation.OperationTimer,
+            collection: typing.Any,
+            *dicts: dict | None,
+    ) -> None:
+        # Encoded size of the sent filter and update, only computed when the
+        #  operation is timed
+        if instrumentation.is_enabled():
+            timer.add_rows(0, sum(
+                len(bson.encode(
+                    dict_, codec_options=collection.codec_options
+                ))
+                for dict_ in dicts if dict_ is not None
+            ))
 
     @classmethod
     def get_client_and_collection(cls) -> tuple[
         pymongo.MongoClient, pymongo.collection.Collection
     ]:
+        # Legacy API: the client is dedicated to the caller, who closes it.
+        #  Use get_collection to share the client of the class
         client = pymongo.MongoClient(
-            f"mongodb://{cls.user}:{cls.password}@{cls.host}:{cls.port}"
+            cls.get_uri(),
+            **cls.get_client_options(),
         )
         database = client.get_database(cls.database_name)
         return client, database.get_collection(cls.collection_name)
@@ -131,24 +283,11 @@ class AbstractCollection:
             input_dict: dict,
             collection_classes: dict | None = None,
     ) -> Document:
-        # Tries to get the calling script classes. If this does not work,
-        #  the classes can be sent directly from the calling function with:
-        # dict(inspect.getmembers(
-        #     sys.modules[calling_frame.__module__], inspect.isclass
-        # ))
-        # Might be better to pass in the classes directly
-        if collection_classes is None:
-            frame = inspect.currentframe()
-            calling_frame = frame.f_back
-            collection_classes = {
-                key: value for key, value in calling_frame.f_globals.items()
-                if inspect.isclass(value)
-            }
-
         if cls.overwrite_dict_loading is None:
             return cls.Document.load_document_with_sub_documents(
                 input_dict=input_dict,
                 collection_classes=collection_classes,
+                trusted=cls.trusted_reads,
             )
         else:
             return cls.overwrite_dict_loading(input_dict)
@@ -169,16 +308,300 @@ class AbstractCollection:
     @classmethod
     def find_many(
             cls,
-            filter_dict: dict | None = None
+            filter_dict: dict | None = None,
+            projection: list[str] | dict | None = None,
+            sort: list[tuple[str, int]] | None = None,
+            limit: int = 0,
+            hint: str | list[tuple[str, int]] | None = None,
+            batch_size: int = 0,
+            max_time_ms: int | None = None,
     ) -> list[Document]:
-        client, collection = cls.get_client_and_collection()
-        documents = collection.find(filter=filter_dict)
+        return list(cls.iterate_many(
+            filter_dict=filter_dict,
+            projection=projection,
+            sort=sort,
+            limit=limit,
+            hint=hint,
+            batch_size=batch_size,
+            max_time_ms=max_time_ms,
+        ))
 
-        python_objects = [
-            cls.load_document_from_dict(document) for document in documents
-        ]
-        client.close()
-        return python_objects
+    @classmethod
+    def iterate_many(
+            cls,
+            filter_dict: dict | None = None,
+            projection: list[str] | dict | None = None,
+            sort: list[tuple[str, int]] | None = None,
+            limit: int = 0,
+            hint: str | list[tuple[str, int]] | None = None,
+            batch_size: int = 1000,
+            max_time_ms: int | None = None,
+    ) -> typing.Iterator[Document]:
+        # Documents are fetched batch_size at a time and loaded lazily, so
+        #  scans use constant memory. Fields excluded by the projection are
+        #  None in the loaded documents. A batch_size of 0 lets the server
+        #  choose it
+        cursor = cls.get_cursor(
+            collection=cls.get_collection(),
+            filter_dict=filter_dict,
+            projection=projection,
+            sort=sort,
+            limit=limit,
+            hint=hint,
+            batch_size=batch_size,
+            max_time_ms=max_time_ms,
+        )
+        # Profiled time includes the time spent by the caller between
+        #  documents, the instrumentation time does not
+        with cls.profile_query("iterate_many", filter_dict) as timer, cursor:
+            for input_dict in cursor:
+                timer.lap("server_ms")
+                document = cls.load_document_from_dict(input_dict)
+                timer.lap("decode_ms")
+                timer.add_rows(1)
+                yield document
+                timer.skip()
+
+    @classmethod
+    def aggregate(
+            cls,
+            pipeline: list[dict] | AggregationPipeline,
+            batch_size: int = 1000,
+            allow_disk_use: bool = False,
+            max_time_ms: int | None = None,
+            result_document_class: type | None = None,
+    ) -> typing.Iterator[dict | typing.Any]:
+        # Runs the pipeline in the database and streams its results, as dicts
+        #  or, if given, loaded in the result_document_class dataclass
+        if isinstance(pipeline, AggregationPipeline):
+            pipeline = pipeline.to_list()
+        aggregate_options = {
+            "batchSize": batch_size,
+            "allowDiskUse": allow_disk_use,
+        }
+        if max_time_ms is not None:
+            aggregate_options["maxTimeMS"] = max_time_ms
+        if result_document_class is None:
+            decode = None
+        else:
+            decode = document_codec.get_decoder(
+                document_class=result_document_class,
+                trusted=cls.trusted_reads,
+            )
+
+        collection = cls.get_collection()
+        with cls.instrument_operation("aggregate") as timer, \
+                collection.aggregate(pipeline, **aggregate_options) as cursor:
+            for result in cursor:
+                timer.lap("server_ms")
+                if decode is not None:
+                    result = decode(result)
+                    timer.lap("decode_ms")
+                timer.add_rows(1)
+                yield result
+                timer.skip()
+
+    @classmethod
+    def load_columnar(
+            cls,
+            filter_dict: dict | None = None,
+            fields: list[str] | None = None,
+            batch_size: int = 10000,
+            as_dataframe: bool = True,
+    ) -> typing.Any:
+        # Returns a DataFrame, or a dict of numpy arrays, with one column per
+        #  flattened field (nested fields are dotted) typed from the Document
+        #  annotations. pandas is only imported when this is used
+        from pysyphon.mongodb import columnar_loader
+
+        return columnar_loader.load_columnar(
+            collection_class=cls,
+            filter_dict=filter_dict,
+            fields=fields,
+            batch_size=batch_size,
+            as_dataframe=as_dataframe,
+        )
+
+    @classmethod
+    def get_cache(
+            cls,
+            state_path: str | None = None,
+            max_await_time_ms: int = 1000,
+            save_interval_seconds: float | None = 60.0,
+    ) -> CollectionCache:
+        # Call load, or start to follow the collection in the background
+        return CollectionCache(
+            collection_class=cls,
+            state_path=state_path,
+            max_await_time_ms=max_await_time_ms,
+            save_interval_seconds=save_interval_seconds,
+        )
+
+    @classmethod
+    def parallel_scan(
+            cls,
+            filter_dict: dict | None = None,
+            projection: list[str] | dict | None = None,
+            max_workers: int = 4,
+            number_of_ranges: int | None = None,
+            batch_size: int = 1000,
+            use_processes: bool = False,
+    ) -> typing.Iterator[Document]:
+        # Reads _id ranges of the collection at the same time. Documents are
+        #  yielded in no particular order. With use_processes, the collection
+        #  class must be importable by the worker processes
+        return range_scan.parallel_scan(
+            collection_class=cls,
+            filter_dict=filter_dict,
+            projection=projection,
+            max_workers=max_workers,
+            number_of_ranges=number_of_ranges,
+            batch_size=batch_size,
+            use_processes=use_processes,
+        )
+
+    @classmethod
+    def get_cursor(
+            cls,
+            collection: pymongo.collection.Collection,
+            filter_dict: dict | None = None,
+            projection: list[str] | dict | None = None,
+            sort: list[tuple[str, int]] | None = None,
+            limit: int = 0,
+            hint: str | list[tuple[str, int]] | None = None,
+            batch_size: int = 1000,
+            max_time_ms: int | None = None,
+    ) -> pymongo.cursor.Cursor:
+        return collection.find(
+            filter=filter_dict,
+            projection=projection,
+            sort=sort,
+            limit=limit,
+            hint=hint,
+            batch_size=batch_size,
+            max_time_ms=max_time_ms,
+        )
+
+    @classmethod
+    def iterate_raw(
+            cls,
+            filter_dict: dict | None = None,
+            projection: list[str] | dict | None = None,
+            sort: list[tuple[str, int]] | None = None,
+            limit: int = 0,
+            hint: str | list[tuple[str, int]] | None = None,
+            batch_size: int = 1000,
+            max_time_ms: int | None = None,
+    ) -> typing.Iterator[bson.raw_bson.RawBSONDocument]:
+        cursor = cls.get_cursor(
+            collection=cls.get_raw_collection(),
+            filter_dict=filter_dict,
+            projection=projection,
+            sort=sort,
+            limit=limit,
+            hint=hint,
+            batch_size=batch_size,
+            max_time_ms=max_time_ms,
+        )
+        # Raw documents are not decoded, their size is recorded as bytes
+        with cls.profile_query("iterate_raw", filter_dict) as timer, cursor:
+            for raw_document in cursor:
+                timer.lap("server_ms")
+                timer.add_rows(1, len(raw_document.raw))
+                yield raw_document
+                timer.skip()
+
+    @classmethod
+    def iterate_lazy(
+            cls,
+            filter_dict: dict | None = None,
+            projection: list[str] | dict | None = None,
+            sort: list[tuple[str, int]] | None = None,
+            limit: int = 0,
+            hint: str | list[tuple[str, int]] | None = None,
+            batch_size: int = 1000,
+            max_time_ms: int | None = None,
+    ) -> typing.Iterator[LazyDocument]:
+        # Like iterate_many, but fields are only decoded when accessed
+        for raw_document in cls.iterate_raw(
+            filter_dict=filter_dict,
+            projection=projection,
+            sort=sort,
+            limit=limit,
+            hint=hint,
+            batch_size=batch_size,
+            max_time_ms=max_time_ms,
+        ):
+            yield LazyDocument(
+                raw_document=raw_document,
+                collection_class=cls,
+            )
+
+    @classmethod
+    def find_one_lazy(
+            cls,
+            filter_dict: dict,
+    ) -> LazyDocument | None:
+        collection = cls.get_raw_collection()
+        with cls.profile_query("find_one_lazy", filter_dict) as timer:
+            raw_document = collection.find_one(filter=filter_dict)
+            if raw_document is None:
+                return None
+            timer.add_rows(1, len(raw_document.raw))
+        return LazyDocument(raw_document=raw_document, collection_class=cls)
+
+    @classmethod
+    def insert_raw_many(
+            cls,
+            raw_documents: typing.Iterable[bson.raw_bson.RawBSONDocument],
+            batch_size: int = 1000,
+    ) -> int:
+        # Raw documents are sent without being decoded and encoded again.
+        #  They must have an _id. Returns the number of inserted documents
+        collection = cls.get_collection()
+        inserted_count = 0
+        batch = []
+        for raw_document in raw_documents:
+            batch.append(raw_document)
+            if len(batch) >= batch_size:
+                cls.insert_raw_batch(collection, batch)
+                inserted_count += len(batch)
+                batch = []
+        if len(batch) > 0:
+            cls.insert_raw_batch(collection, batch)
+            inserted_count += len(batch)
+        return inserted_count
+
+    @classmethod
+    def insert_raw_batch(
+            cls,
+            collection: pymongo.collection.Collection,
+            raw_documents: list[bson.raw_bson.RawBSONDocument],
+    ) -> None:
+        with cls.instrument_operation("insert_raw_many") as timer:
+            timer.add_rows(
+                len(raw_documents),
+                sum(len(raw_document.raw) for raw_document in raw_documents)
+                if instrumentation.is_enabled() else None,
+            )
+            collection.insert_many(raw_documents, ordered=False)
+
+    @classmethod
+    def copy_documents_to(
+            cls,
+            target_collection_class: type[AbstractCollection],
+            filter_dict: dict | None = None,
+            batch_size: int = 1000,
+    ) -> int:
+        # Copies the matching documents as raw BSON into the collection of
+        #  target_collection_class
+        return target_collection_class.insert_raw_many(
+            raw_documents=cls.iterate_raw(
+                filter_dict=filter_dict,
+                batch_size=batch_size,
+            ),
+            batch_size=batch_size,
+        )
 
     @classmethod
     def find_one(
@@ -186,31 +609,20 @@ class AbstractCollection:
             filter_dict: dict,
             collection_classes: dict | None = None,
     ) -> Document | None:
-        # Tries to get the calling script classes. If this does not work,
-        #  the classes can be sent directly from the calling function with:
-        # dict(inspect.getmembers(
-        #     sys.modules[calling_frame.__module__], inspect.isclass
-        # ))
-        # Might be better to pass in the classes directly
-        if collection_classes is None:
-            frame = inspect.currentframe()
-            calling_frame = frame.f_back
-            collection_classes = {
-                key: value for key, value in calling_frame.f_globals.items()
-                if inspect.isclass(value)
-            }
-
-        client, collection = cls.get_client_and_collection()
-        document = collection.find_one(filter=filter_dict)
-
-        if document is None:
-            return None
+        collection = cls.get_collection()
+        with cls.profile_query("find_one", filter_dict) as timer:
+            document = collection.find_one(filter=filter_dict)
+            timer.lap("server_ms")
 
-        python_object = cls.load_document_from_dict(
-            input_dict=document,
-            collection_classes=collection_classes,
-        )
-        client.close()
+            if document is None:
+                return None
+
+            python_object = cls.load_document_from_dict(
+                input_dict=document,
+                collection_classes=collection_classes,
+            )
+            timer.lap("decode_ms")
+            timer.add_rows(1)
         return python_object
 
     @classmethod
@@ -218,9 +630,9 @@ class AbstractCollection:
             cls,
             filter_dict: dict,
     ) -> dict | None:
-        client, collection = cls.get_client_and_collection()
-        dict_ = collection.find_one(filter=filter_dict)
-        client.close()
+        collection = cls.get_collection()
+        with cls.profile_query("find_one_as_dict", filter_dict):
+            dict_ = collection.find_one(filter=filter_dict)
         return dict_
 
     @classmethod
@@ -230,13 +642,16 @@ class AbstractCollection:
             set_dict: dict,
             upsert: bool = False,
     ) -> None:
-        client, collection = cls.get_client_and_collection()
-        collection.update_one(
-            filter=filter_dict,
-            update={"$set": set_dict},
-            upsert=upsert,
-        )
-        client.close()
+        collection = cls.get_collection()
+        with cls.profile_query("set_attribute", filter_dict) as timer:
+            cls.add_sent_bytes(
+                timer, collection, filter_dict, {"$set": set_dict}
+            )
+            collection.update_one(
+                filter=filter_dict,
+                update={"$set": set_dict},
+                upsert=upsert,
+            )
 
     @classmethod
     def increase_attribute(
@@ -244,12 +659,15 @@ class AbstractCollection:
             filter_dict: dict,
             inc_dict: dict,
     ) -> None:
-        client, collection = cls.get_client_and_collection()
-        collection.update_one(
-            filter=filter_dict,
-            update={"$inc": inc_dict}
-        )
-        client.close()
+        collection = cls.get_collection()
+        with cls.profile_query("increase_attribute", filter_dict) as timer:
+            cls.add_sent_bytes(
+                timer, collection, filter_dict, {"$inc": inc_dict}
+            )
+            collection.update_one(
+                filter=filter_dict,
+                update={"$inc": inc_dict}
+            )
 
     @classmethod
     def push_element(
@@ -258,13 +676,16 @@ class AbstractCollection:
             push_dict: dict,
             upsert: bool = False,
     ) -> None:
-        client, collection = cls.get_client_and_collection()
-        collection.update_one(
-            filter=filter_dict,
-            update={"$push": push_dict},
-            upsert=upsert,
-        )
-        client.close()
+        collection = cls.get_collection()
+        with cls.profile_query("push_element", filter_dict) as timer:
+            cls.add_sent_bytes(
+                timer, collection, filter_dict, {"$push": push_dict}
+            )
+            collection.update_one(
+                filter=filter_dict,
+                update={"$push": push_dict},
+                upsert=upsert,
+            )
 
     @classmethod
     def pull_element(
@@ -272,12 +693,15 @@ class AbstractCollection:
             filter_dict: dict,
             pull_dict: dict,
     ) -> None:
-        client, collection = cls.get_client_and_collection()
-        collection.update_one(
-            filter=filter_dict,
-            update={"$pull": pull_dict}
-        )
-        client.close()
+        collection = cls.get_collection()
+        with cls.profile_query("pull_element", filter_dict) as timer:
+            cls.add_sent_bytes(
+                timer, collection, filter_dict, {"$pull": pull_dict}
+            )
+            collection.update_one(
+                filter=filter_dict,
+                update={"$pull": pull_dict}
+            )
 
     @classmethod
     def add_element_to_set(
@@ -285,12 +709,15 @@ class AbstractCollection:
             filter_dict: dict,
             add_to_set_dict: dict,
     ) -> None:
-        client, collection = cls.get_client_and_collection()
-        collection.update_one(
-            filter=filter_dict,
-            update={"$addToSet": add_to_set_dict}
-        )
-        client.close()
+        collection = cls.get_collection()
+        with cls.profile_query("add_element_to_set", filter_dict) as timer:
+            cls.add_sent_bytes(
+                timer, collection, filter_dict, {"$addToSet": add_to_set_dict}
+            )
+            collection.update_one(
+                filter=filter_dict,
+                update={"$addToSet": add_to_set_dict}
+            )
 
     @classmethod
     def insert_one(
@@ -298,14 +725,16 @@ class AbstractCollection:
             document: Document,
             save_nones: bool = False,
     ) -> None:
-        client, collection = cls.get_client_and_collection()
-        collection.insert_one(
-            document=cls.cast_document_to_dict(
+        collection = cls.get_collection()
+        with cls.instrument_operation("insert_one") as timer:
+            document_dict = cls.cast_document_to_dict(
                 document=document,
                 save_nones=save_nones,
-            ),
-        )
-        client.close()
+            )
+            timer.lap("encode_ms")
+            timer.add_rows(1)
+            cls.add_sent_bytes(timer, collection, document_dict)
+            collection.insert_one(document=document_dict)
 
     @classmethod
     def insert_one_if_does_not_exist(
@@ -313,37 +742,484 @@ class AbstractCollection:
             document: Document,
             filter_dict: dict,
             save_nones: bool = False,
+    ) -> bool:
+        # Single upsert which only sets the document if no document matches
+        #  filter_dict. Returns whether the document was inserted. Use a
+        #  unique index on the filtered fields to prevent concurrent writers
+        #  from inserting the same document twice
+        collection = cls.get_collection()
+        with cls.profile_query(
+            "insert_one_if_does_not_exist", filter_dict
+        ) as timer:
+            arguments = cls.get_insert_if_does_not_exist_arguments(
+                document=document,
+                filter_dict=filter_dict,
+                save_nones=save_nones,
+            )
+            timer.lap("encode_ms")
+            cls.add_sent_bytes(
+                timer, collection, arguments["filter"], arguments["update"]
+            )
+            result = collection.update_one(**arguments)
+        return result.upserted_id is not None
+
+    @classmethod
+    def get_insert_if_does_not_exist_arguments(
+            cls,
+            document: Document,
+            filter_dict: dict,
+            save_nones: bool = False,
+    ) -> dict:
+        # MongoDB adds the equality fields of the filter to the inserted
+        #  document, so plain equalities must be on fields of the Document
+        #  and match its values. Operators, logical filters and null
+        #  equalities are not checked
+        document_dict = cls.cast_document_to_dict(
+            document=document,
+            save_nones=save_nones,
+        )
+        field_names = set(cls.Document.keys()) | {"_id"}
+        for field, value in filter_dict.items():
+            if field.startswith("$") or value is None \
+                    or isinstance(value, (re.Pattern, bson.regex.Regex)) \
+                    or (isinstance(value, dict) and any(
+                        key.startswith("$") for key in value
+                    )):
+                continue
+            if field.split(".")[0] not in field_names:
+                raise ValueError(
+                    f"Filter field {field} of an insert if it does not "
+                    f"exist on {cls.collection_name} is not a field of the "
+                    f"document"
+                )
+            document_value = document_dict
+            for key in field.split("."):
+                if not isinstance(document_value, dict) \
+                        or key not in document_value:
+                    # Unset in the document, the filter value is inserted
+                    break
+                document_value = document_value[key]
+            else:
+                if document_value != value:
+                    raise ValueError(
+                        f"Filter value {value!r} of {field} of an insert if "
+                        f"it does not exist on {cls.collection_name} differs "
+                        f"from the document value {document_value!r}"
+                    )
+        return {
+            "filter": filter_dict,
+            "update": {"$setOnInsert": document_dict},
+            "upsert": True,
+        }
+
+    @classmethod
+    def insert_many_if_do_not_exist(
+            cls,
+            filters_and_documents: list[tuple[dict, Document]],
+            save_nones: bool = False,
+    ) -> list[bool]:
+        # Sends one upsert per (filter, document) in a single unordered
+        #  bulk_write. Returns, for each pair, whether its document was
+        #  inserted. Use a unique index on the filtered fields to prevent
+        #  concurrent writers from inserting the same document twice
+        result = cls.bulk_write([
+            pymongo.UpdateOne(**cls.get_insert_if_does_not_exist_arguments(
+                document=document,
+                filter_dict=filter_dict,
+                save_nones=save_nones,
+            ))
+            for filter_dict, document in filters_and_documents
+        ])
+        if result is None:
+            return []
+        upserted_ids = result.upserted_ids
+        return [
+            index in upserted_ids
+            for index in range(len(filters_and_documents))
+        ]
+
+    @classmethod
+    def delete_one(
+            cls,
+            filter_dict: dict,
+    ) -> None:
+        collection = cls.get_collection()
+        with cls.profile_query("delete_one", filter_dict) as timer:
+            cls.add_sent_bytes(timer, collection, filter_dict)
+            collection.delete_one(
+                filter=filter_dict
+            )
+
+    @classmethod
+    def delete_many(
+            cls,
+            filter_dict: dict,
     ) -> None:
-        client, collection = cls.get_client_and_collection()
-        existing_document = collection.find_one(filter=filter_dict)
-        if existing_document is None:
-            collection.insert_one(
+        collection = cls.get_collection()
+        with cls.profile_query("delete_many", filter_dict) as timer:
+            cls.add_sent_bytes(timer, collection, filter_dict)
+            collection.delete_many(
+                filter=filter_dict
+            )
+
+    @classmethod
+    def bulk_write(
+            cls,
+            operations: list,
+            ordered: bool = False,
+    ) -> pymongo.results.BulkWriteResult | None:
+        if len(operations) == 0:
+            return None
+        collection = cls.get_collection()
+        with cls.instrument_operation("bulk_write") as timer:
+            timer.add_rows(len(operations))
+            return collection.bulk_write(operations, ordered=ordered)
+
+    @classmethod
+    def get_bulk_writer(
+            cls,
+            max_operations: int = 1000,
+            max_delay_seconds: float | None = 1.0,
+            save_nones: bool = False,
+    ) -> BulkWriter:
+        return BulkWriter(
+            collection_class=cls,
+            max_operations=max_operations,
+            max_delay_seconds=max_delay_seconds,
+            save_nones=save_nones,
+        )
+
+    @classmethod
+    def set_attribute_many(
+            cls,
+            filter_and_set_dicts: list[tuple[dict, dict]],
+            upsert: bool = False,
+    ) -> pymongo.results.BulkWriteResult | None:
+        return cls.bulk_write([
+            pymongo.UpdateOne(
+                filter=filter_dict,
+                update={"$set": set_dict},
+                upsert=upsert,
+            )
+            for filter_dict, set_dict in filter_and_set_dicts
+        ])
+
+    @classmethod
+    def increase_attribute_many(
+            cls,
+            filter_and_inc_dicts: list[tuple[dict, dict]],
+    ) -> pymongo.results.BulkWriteResult | None:
+        return cls.bulk_write([
+            pymongo.UpdateOne(
+                filter=filter_dict,
+                update={"$inc": inc_dict},
+            )
+            for filter_dict, inc_dict in filter_and_inc_dicts
+        ])
+
+    @classmethod
+    def push_element_many(
+            cls,
+            filter_and_push_dicts: list[tuple[dict, dict]],
+            upsert: bool = False,
+    ) -> pymongo.results.BulkWriteResult | None:
+        return cls.bulk_write([
+            pymongo.UpdateOne(
+                filter=filter_dict,
+                update={"$push": push_dict},
+                upsert=upsert,
+            )
+            for filter_dict, push_dict in filter_and_push_dicts
+        ])
+
+    @classmethod
+    def pull_element_many(
+            cls,
+            filter_and_pull_dicts: list[tuple[dict, dict]],
+    ) -> pymongo.results.BulkWriteResult | None:
+        return cls.bulk_write([
+            pymongo.UpdateOne(
+                filter=filter_dict,
+                update={"$pull": pull_dict},
+            )
+            for filter_dict, pull_dict in filter_and_pull_dicts
+        ])
+
+    @classmethod
+    def add_element_to_set_many(
+            cls,
+            filter_and_add_to_set_dicts: list[tuple[dict, dict]],
+    ) -> pymongo.results.BulkWriteResult | None:
+        return cls.bulk_write([
+            pymongo.UpdateOne(
+                filter=filter_dict,
+                update={"$addToSet": add_to_set_dict},
+            )
+            for filter_dict, add_to_set_dict in filter_and_add_to_set_dicts
+        ])
+
+    @classmethod
+    def insert_many(
+            cls,
+            documents: list[Document],
+            save_nones: bool = False,
+    ) -> pymongo.results.BulkWriteResult | None:
+        return cls.bulk_write([
+            pymongo.InsertOne(
                 document=cls.cast_document_to_dict(
                     document=document,
                     save_nones=save_nones,
                 ),
             )
+            for document in documents
+        ])
 
-        client.close()
+    @classmethod
+    def delete_one_many(
+            cls,
+            filter_dicts: list[dict],
+    ) -> pymongo.results.BulkWriteResult | None:
+        # Deletes one document per filter, unlike delete_many which deletes
+        #  all the documents matching a single filter
+        return cls.bulk_write([
+            pymongo.DeleteOne(filter=filter_dict)
+            for filter_dict in filter_dicts
+        ])
 
     @classmethod
-    def delete_one(
+    async def async_find_many(
+            cls,
+            filter_dict: dict | None = None,
+            projection: list[str] | dict | None = None,
+            sort: list[tuple[str, int]] | None = None,
+            limit: int = 0,
+            hint: str | list[tuple[str, int]] | None = None,
+            batch_size: int = 0,
+            max_time_ms: int | None = None,
+    ) -> list[Document]:
+        return [document async for document in cls.async_iterate_many(
+            filter_dict=filter_dict,
+            projection=projection,
+            sort=sort,
+            limit=limit,
+            hint=hint,
+            batch_size=batch_size,
+            max_time_ms=max_time_ms,
+        )]
+
+    @classmethod
+    async def async_iterate_many(
+            cls,
+            filter_dict: dict | None = None,
+            projection: list[str] | dict | None = None,
+            sort: list[tuple[str, int]] | None = None,
+            limit: int = 0,
+            hint: str | list[tuple[str, int]] | None = None,
+            batch_size: int = 1000,
+            max_time_ms: int | None = None,
+    ) -> typing.AsyncIterator[Document]:
+        cursor = cls.get_cursor(
+            collection=cls.get_async_collection(),
+            filter_dict=filter_dict,
+            projection=projection,
+            sort=sort,
+            limit=limit,
+            hint=hint,
+            batch_size=batch_size,
+            max_time_ms=max_time_ms,
+        )
+        with cls.instrument_operation("async_iterate_many") as timer:
+            async with cursor:
+                async for input_dict in cursor:
+                    timer.lap("server_ms")
+                    document = cls.load_document_from_dict(input_dict)
+                    timer.lap("decode_ms")
+                    timer.add_rows(1)
+                    yield document
+                    timer.skip()
+
+    @classmethod
+    async def async_find_one(
+            cls,
+            filter_dict: dict,
+    ) -> Document | None:
+        collection = cls.get_async_collection()
+        with cls.instrument_operation("async_find_one") as timer:
+            document = await collection.find_one(filter=filter_dict)
+            timer.lap("server_ms")
+            if document is None:
+                return None
+            python_object = cls.load_document_from_dict(document)
+            timer.lap("decode_ms")
+            timer.add_rows(1)
+        return python_object
+
+    @classmethod
+    async def async_find_one_as_dict(
+            cls,
+            filter_dict: dict,
+    ) -> dict | None:
+        collection = cls.get_async_collection()
+        with cls.instrument_operation("async_find_one_as_dict"):
+            return await collection.find_one(filter=filter_dict)
+
+    @classmethod
+    async def async_set_attribute(
             cls,
             filter_dict: dict,
+            set_dict: dict,
+            upsert: bool = False,
     ) -> None:
-        client, collection = cls.get_client_and_collection()
-        collection.delete_one(
-            filter=filter_dict
-        )
-        client.close()
+        collection = cls.get_async_collection()
+        with cls.instrument_operation("async_set_attribute") as timer:
+            cls.add_sent_bytes(
+                timer, collection, filter_dict, {"$set": set_dict}
+            )
+            await collection.update_one(
+                filter=filter_dict,
+                update={"$set": set_dict},
+                upsert=upsert,
+            )
 
     @classmethod
-    def delete_many(
+    async def async_increase_attribute(
             cls,
             filter_dict: dict,
+            inc_dict: dict,
     ) -> None:
-        client, collection = cls.get_client_and_collection()
-        collection.delete_many(
-            filter=filter_dict
-        )
-        client.close()
+        collection = cls.get_async_collection()
+        with cls.instrument_operation("async_increase_attribute") as timer:
+            cls.add_sent_bytes(
+                timer, collection, filter_dict, {"$inc": inc_dict}
+            )
+            await collection.update_one(
+                filter=filter_dict,
+                update={"$inc": inc_dict}
+            )
+
+    @classmethod
+    async def async_push_element(
+            cls,
+            filter_dict: dict,
+            push_dict: dict,
+            upsert: bool = False,
+    ) -> None:
+        collection = cls.get_async_collection()
+        with cls.instrument_operation("async_push_element") as timer:
+            cls.add_sent_bytes(
+                timer, collection, filter_dict, {"$push": push_dict}
+            )
+            await collection.update_one(
+                filter=filter_dict,
+                update={"$push": push_dict},
+                upsert=upsert,
+            )
+
+    @classmethod
+    async def async_pull_element(
+            cls,
+            filter_dict: dict,
+            pull_dict: dict,
+    ) -> None:
+        collection = cls.get_async_collection()
+        with cls.instrument_operation("async_pull_element") as timer:
+            cls.add_sent_bytes(
+                timer, collection, filter_dict, {"$pull": pull_dict}
+            )
+            await collection.update_one(
+                filter=filter_dict,
+                update={"$pull": pull_dict}
+            )
+
+    @classmethod
+    async def async_add_element_to_set(
+            cls,
+            filter_dict: dict,
+            add_to_set_dict: dict,
+    ) -> None:
+        collection = cls.get_async_collection()
+        with cls.instrument_operation("async_add_element_to_set") as timer:
+            cls.add_sent_bytes(
+                timer, collection, filter_dict, {"$addToSet": add_to_set_dict}
+            )
+            await collection.update_one(
+                filter=filter_dict,
+                update={"$addToSet": add_to_set_dict}
+            )
+
+    @classmethod
+    async def async_insert_one(
+            cls,
+            document: Document,
+            save_nones: bool = False,
+    ) -> None:
+        collection = cls.get_async_collection()
+        with cls.instrument_operation("async_insert_one") as timer:
+            document_dict = cls.cast_document_to_dict(
+                document=document,
+                save_nones=save_nones,
+            )
+            timer.lap("encode_ms")
+            timer.add_rows(1)
+            cls.add_sent_bytes(timer, collection, document_dict)
+            await collection.insert_one(document=document_dict)
+
+    @classmethod
+    async def async_insert_one_if_does_not_exist(
+            cls,
+            document: Document,
+            filter_dict: dict,
+            save_nones: bool = False,
+    ) -> bool:
+        collection = cls.get_async_collection()
+        with cls.instrument_operation(
+            "async_insert_one_if_does_not_exist"
+        ) as timer:
+            arguments = cls.get_insert_if_does_not_exist_arguments(
+                document=document,
+                filter_dict=filter_dict,
+                save_nones=save_nones,
+            )
+            timer.lap("encode_ms")
+            cls.add_sent_bytes(
+                timer, collection, arguments["filter"], arguments["update"]
+            )
+            result = await collection.update_one(**arguments)
+        return result.upserted_id is not None
+
+    @classmethod
+    async def async_delete_one(
+            cls,
+            filter_dict: dict,
+    ) -> None:
+        collection = cls.get_async_collection()
+        with cls.instrument_operation("async_delete_one") as timer:
+            cls.add_sent_bytes(timer, collection, filter_dict)
+            await collection.delete_one(
+                filter=filter_dict
+            )
+
+    @classmethod
+    async def async_delete_many(
+            cls,
+            filter_dict: dict,
+    ) -> None:
+        collection = cls.get_async_collection()
+        with cls.instrument_operation("async_delete_many") as timer:
+            cls.add_sent_bytes(timer, collection, filter_dict)
+            await collection.delete_many(
+                filter=filter_dict
+            )
+
+    @classmethod
+    async def async_bulk_write(
+            cls,
+            operations: list,
+            ordered: bool = False,
+    ) -> pymongo.results.BulkWriteResult | None:
+        if len(operations) == 0:
+            return None
+        collection = cls.get_async_collection()
+        with cls.instrument_operation("async_bulk_write") as timer:
+            timer.add_rows(len(operations))
+            return await collection.bulk_write(operations, ordered=ordered)
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+
+class AggregationPipeline:
+    # Small builder for aggregation pipelines. Each method adds a stage and
+    #  returns the pipeline so calls can be chained:
+    #  AggregationPipeline().match({"status": "paid"}).group(
+    #      "$customer_id", {"total": {"$sum": "$amount"}}
+    #  ).sort({"total": -1})
+    def __init__(self, stages: list[dict] | None = None):
+        self.stages = [] if stages is None else list(stages)
+
+    def __len__(self) -> int:
+        return len(self.stages)
+
+    def add_stage(self, stage: dict) -> AggregationPipeline:
+        self.stages.append(stage)
+        return self
+
+    def match(self, filter_dict: dict) -> AggregationPipeline:
+        return self.add_stage({"$match": filter_dict})
+
+    def group(
+            self,
+            id_expression: str | dict | None,
+            accumulators: dict[str, dict] | None = None,
+    ) -> AggregationPipeline:
+        return self.add_stage({
+            "$group": {"_id": id_expression, **(accumulators or {})}
+        })
+
+    def project(self, projection: dict) -> AggregationPipeline:
+        return self.add_stage({"$project": projection})
+
+    def sort(self, sort_dict: dict[str, int]) -> AggregationPipeline:
+        return self.add_stage({"$sort": sort_dict})
+
+    def limit(self, limit: int) -> AggregationPipeline:
+        return self.add_stage({"$limit": limit})
+
+    def skip(self, skip: int) -> AggregationPipeline:
+        return self.add_stage({"$skip": skip})
+
+    def unwind(self, path: str) -> AggregationPipeline:
+        return self.add_stage({"$unwind": path})
+
+    def count(self, field_name: str = "count") -> AggregationPipeline:
+        return self.add_stage({"$count": field_name})
+
+    def to_list(self) -> list[dict]:
+        return list(self.stages)
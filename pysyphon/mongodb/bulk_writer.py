@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import dataclasses
+import threading
+import time
+import typing
+
+import bson
+import pymongo
+import pymongo.errors
+import pymongo.results
+
+# Write error codes of transient failures, the operations which failed with
+#  them are sent again with the next flush. Others (e.g. duplicate keys,
+#  document validation) would fail again and are dropped
+RETRYABLE_WRITE_ERROR_CODES = frozenset({
+    6,  # HostUnreachable
+    7,  # HostNotFound
+    89,  # NetworkTimeout
+    91,  # ShutdownInProgress
+    112,  # WriteConflict
+    189,  # PrimarySteppedDown
+    262,  # ExceededTimeLimit
+    9001,  # SocketException
+    10107,  # NotWritablePrimary
+    11600,  # InterruptedAtShutdown
+    11602,  # InterruptedDueToReplStateChange
+    13435,  # NotPrimaryNoSecondaryOk
+    13436,  # NotPrimaryOrSecondary
+})
+
+
+@dataclasses.dataclass
+class BulkWriteSummary:
+    inserted_count: int = 0
+    matched_count: int = 0
+    modified_count: int = 0
+    deleted_count: int = 0
+    upserted_count: int = 0
+    flush_count: int = 0
+    # writeErrors of the dropped operations, which can't succeed when sent
+    #  again
+    dropped_write_errors: list[dict] = dataclasses.field(
+        default_factory=list
+    )
+
+    def add_result(self, result: pymongo.results.BulkWriteResult) -> None:
+        self.inserted_count += result.inserted_count
+        self.matched_count += result.matched_count
+        self.modified_count += result.modified_count
+        self.deleted_count += result.deleted_count
+        self.upserted_count += result.upserted_count
+        self.flush_count += 1
+
+
+class BulkWriter:
+    # Buffers write operations of an AbstractCollection and sends them with an
+    #  unordered bulk_write once max_operations are buffered or the oldest
+    #  buffered operation is older than max_delay_seconds. The delay is
+    #  checked when operations are added, so call flush (or use the writer as
+    #  a context manager) to send the last operations. $inc updates on the
+    #  same filter are merged in a single operation.
+    #  As the bulk writes are unordered, operations on the same document may
+    #  be applied in any order within a flush
+    def __init__(
+            self,
+            collection_class: typing.Any,
+            max_operations: int = 1000,
+            max_delay_seconds: float | None = 1.0,
+            save_nones: bool = False,
+    ):
+        self.collection_class = collection_class
+        self.max_operations = max_operations
+        self.max_delay_seconds = max_delay_seconds
+        self.save_nones = save_nones
+        self.summary = BulkWriteSummary()
+        self.operations: list = []
+        # Merged $inc by (encoded filter, upsert)
+        self.increments: dict[tuple[bytes, bool], tuple[dict, dict]] = {}
+        self.first_operation_time: float | None = None
+        self.lock = threading.Lock()
+
+    def __enter__(self) -> BulkWriter:
+        return self
+
+    def __exit__(self, exception_type, exception, traceback) -> None:
+        self.flush()
+
+    def __len__(self) -> int:
+        return len(self.operations) + len(self.increments)
+
+    def add_operation(self, operation: typing.Any) -> None:
+        with self.lock:
+            self.operations.append(operation)
+        self.flush_if_needed()
+
+    def flush_if_needed(self) -> None:
+        if self.first_operation_time is None:
+            self.first_operation_time = time.monotonic()
+        if len(self) >= self.max_operations or (
+            self.max_delay_seconds is not None
+            and time.monotonic() - self.first_operation_time
+            >= self.max_delay_seconds
+        ):
+            self.flush()
+
+    def flush(self) -> pymongo.results.BulkWriteResult | None:
+        with self.lock:
+            operations = self.operations + [
+                pymongo.UpdateOne(
+                    filter=filter_dict,
+                    update={"$inc": inc_dict},
+                    upsert=upsert,
+                )
+                for (_, upsert), (filter_dict, inc_dict)
+                in self.increments.items()
+            ]
+            if len(operations) == 0:
+                self.first_operation_time = None
+                return None
+            try:
+                result = self.collection_class.bulk_write(operations)
+            except pymongo.errors.BulkWriteError as error:
+                # The other operations of the unordered bulk write were
+                #  applied. Only the ones which failed with a transient error
+                #  are kept for the next flush, the others are reported by
+                #  this error and in the summary
+                retryable_indexes = set()
+                for write_error in error.details.get("writeErrors", []):
+                    if write_error.get("code") in RETRYABLE_WRITE_ERROR_CODES:
+                        retryable_indexes.add(write_error["index"])
+                    else:
+                        self.summary.dropped_write_errors.append(write_error)
+                self.operations = [
+                    operation
+                    for index, operation in enumerate(operations)
+                    if index in retryable_indexes
+                ]
+                self.increments = {}
+                if len(self.operations) == 0:
+                    self.first_operation_time = None
+                raise
+            # Buffers are only cleared once written, so operations that
+            #  couldn't be sent are kept for the next flush
+            self.operations = []
+            self.increments = {}
+            self.first_operation_time = None
+            self.summary.add_result(result)
+        return result
+
+    def close(self) -> BulkWriteSummary:
+        self.flush()
+        return self.summary
+
+    def set_attribute(
+            self,
+            filter_dict: dict,
+            set_dict: dict,
+            upsert: bool = False,
+    ) -> None:
+        self.add_operation(pymongo.UpdateOne(
+            filter=filter_dict,
+            update={"$set": set_dict},
+            upsert=upsert,
+        ))
+
+    def increase_attribute(
+            self,
+            filter_dict: dict,
+            inc_dict: dict,
+            upsert: bool = False,
+    ) -> None:
+        key = (bson.encode(filter_dict), upsert)
+        with self.lock:
+            if key in self.increments:
+                merged_inc_dict = self.increments[key][1]
+                for field, increment in inc_dict.items():
+                    merged_inc_dict[field] = \
+                        merged_inc_dict.get(field, 0) + increment
+            else:
+                self.increments[key] = (filter_dict, dict(inc_dict))
+        self.flush_if_needed()
+
+    def push_element(
+            self,
+            filter_dict: dict,
+            push_dict: dict,
+            upsert: bool = False,
+    ) -> None:
+        self.add_operation(pymongo.UpdateOne(
+            filter=filter_dict,
+            update={"$push": push_dict},
+            upsert=upsert,
+        ))
+
+    def pull_element(
+            self,
+            filter_dict: dict,
+            pull_dict: dict,
+    ) -> None:
+        self.add_operation(pymongo.UpdateOne(
+            filter=filter_dict,
+            update={"$pull": pull_dict},
+        ))
+
+    def add_element_to_set(
+            self,
+            filter_dict: dict,
+            add_to_set_dict: dict,
+    ) -> None:
+        self.add_operation(pymongo.UpdateOne(
+            filter=filter_dict,
+            update={"$addToSet": add_to_set_dict},
+        ))
+
+    def insert_one(
+            self,
+            document: typing.Any,
+    ) -> None:
+        self.add_operation(pymongo.InsertOne(
+            document=self.collection_class.cast_document_to_dict(
+                document=document,
+                save_nones=self.save_nones,
+            ),
+        ))
+
+    def delete_one(
+            self,
+            filter_dict: dict,
+    ) -> None:
+        self.add_operation(pymongo.DeleteOne(filter=filter_dict))
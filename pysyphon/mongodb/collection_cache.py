@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+import typing
+
+import bson
+import pymongo.change_stream
+import pymongo.errors
+
+LOG = logging.getLogger(__name__)
+
+# Server errors for a resume token which is no longer in the oplog
+HISTORY_LOST_ERROR_CODES = (
+    280,  # ChangeStreamFatalError
+    286,  # ChangeStreamHistoryLost
+)
+# Events after which the collection has to be loaded again
+RELOAD_OPERATION_TYPES = ("drop", "rename", "dropDatabase", "invalidate")
+
+
+class CollectionCache:
+    # Keeps the Documents of a collection in memory, keyed by _id. The
+    #  collection is loaded once, then followed through a change stream, so
+    #  it needs a replica set (a single-node one is enough). The change
+    #  stream is opened before the collection is scanned, changes made during
+    #  the scan are applied again afterwards, which is idempotent.
+    #  If state_path is given, the resume token and the documents are saved
+    #  to it, and the cache is restored from it instead of scanning the
+    #  collection again. When the resume token is no longer in the oplog,
+    #  the collection is loaded again
+    def __init__(
+            self,
+            collection_class: typing.Any,
+            state_path: str | None = None,
+            max_await_time_ms: int = 1000,
+            save_interval_seconds: float | None = 60.0,
+    ):
+        self.collection_class = collection_class
+        self.state_path = state_path
+        self.max_await_time_ms = max_await_time_ms
+        self.save_interval_seconds = save_interval_seconds
+        self.documents: dict[typing.Any, typing.Any] = {}
+        self.resume_token: typing.Mapping | None = None
+        self.stream: pymongo.change_stream.CollectionChangeStream | None = None
+        self.applied_changes_count = 0
+        self.last_save_time: float | None = None
+        self.lock = threading.RLock()
+        self.stop_event = threading.Event()
+        self.thread: threading.Thread | None = None
+
+    def __enter__(self) -> CollectionCache:
+        self.load()
+        return self
+
+    def __exit__(self, exception_type, exception, traceback) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def __contains__(self, document_id: typing.Any) -> bool:
+        return document_id in self.documents
+
+    def get(
+            self,
+            document_id: typing.Any,
+            default: typing.Any = None,
+    ) -> typing.Any:
+        return self.documents.get(document_id, default)
+
+    def values(self) -> list:
+        with self.lock:
+            return list(self.documents.values())
+
+    def items(self) -> list[tuple]:
+        with self.lock:
+            return list(self.documents.items())
+
+    def load(self) -> None:
+        if self.state_path is not None and os.path.exists(self.state_path):
+            self.load_state()
+            try:
+                self.open_stream(resume_after=self.resume_token)
+                return
+            except pymongo.errors.OperationFailure as exception:
+                if exception.code not in HISTORY_LOST_ERROR_CODES:
+                    raise
+                LOG.warning(
+                    f"Change stream of {self.collection_class.collection_name}"
+                    f" can't be resumed, loading the collection again"
+                )
+        self.load_snapshot()
+
+    def open_stream(
+            self,
+            resume_after: typing.Mapping | None = None,
+    ) -> None:
+        if self.stream is not None:
+            self.stream.close()
+        self.stream = self.collection_class.get_collection().watch(
+            full_document="updateLookup",
+            resume_after=resume_after,
+            max_await_time_ms=self.max_await_time_ms,
+        )
+        self.resume_token = self.stream.resume_token
+
+    def load_snapshot(self) -> None:
+        self.open_stream()
+        documents = {}
+        with self.collection_class.get_collection().find() as cursor:
+            for input_dict in cursor:
+                documents[input_dict["_id"]] = (
+                    self.collection_class.load_document_from_dict(input_dict)
+                )
+        with self.lock:
+            self.documents = documents
+        self.save_state()
+
+    def apply_change(self, change: typing.Mapping) -> None:
+        operation_type = change["operationType"]
+        if operation_type in RELOAD_OPERATION_TYPES:
+            self.load_snapshot()
+            return
+        document_id = change.get("documentKey", {}).get("_id")
+        with self.lock:
+            if operation_type in ("insert", "update", "replace"):
+                full_document = change.get("fullDocument")
+                # The document may have been deleted since the update
+                if full_document is None:
+                    self.documents.pop(document_id, None)
+                else:
+                    self.documents[document_id] = (
+                        self.collection_class.load_document_from_dict(
+                            full_document
+                        )
+                    )
+            elif operation_type == "delete":
+                self.documents.pop(document_id, None)
+
+    def sync_once(self) -> int:
+        # Applies the pending changes, waiting at most max_await_time_ms for
+        #  the first one. Returns the number of applied changes
+        if self.stream is None:
+            self.load()
+        applied_changes_count = 0
+        try:
+            while True:
+                change = self.stream.try_next()
+                if change is None:
+                    break
+                self.apply_change(change)
+                applied_changes_count += 1
+            self.resume_token = self.stream.resume_token
+        except pymongo.errors.OperationFailure as exception:
+            if exception.code not in HISTORY_LOST_ERROR_CODES:
+                raise
+            LOG.warning(
+                f"Change stream history of "
+                f"{self.collection_class.collection_name} was lost, loading "
+                f"the collection again"
+            )
+            self.load_snapshot()
+        self.applied_changes_count += applied_changes_count
+        if self.save_interval_seconds is not None and (
+            self.last_save_time is None
+            or time.monotonic() - self.last_save_time
+            >= self.save_interval_seconds
+        ):
+            self.save_state()
+        return applied_changes_count
+
+    def load_state(self) -> None:
+        # The first document of the state file holds the resume token, the
+        #  others are the cached documents
+        documents = {}
+        with open(self.state_path, "rb") as state_file:
+            states = bson.decode_file_iter(state_file)
+            resume_token = next(states)["resume_token"]
+            for state in states:
+                documents[state["_id"]] = (
+                    self.collection_class.load_document_from_dict(
+                        state["document"]
+                    )
+                )
+        with self.lock:
+            self.documents = documents
+            self.resume_token = resume_token
+
+    def save_state(self) -> None:
+        if self.state_path is None:
+            return
+        temporary_path = f"{self.state_path}.tmp"
+        with self.lock, open(temporary_path, "wb") as state_file:
+            state_file.write(bson.encode({"resume_token": self.resume_token}))
+            for document_id, document in self.documents.items():
+                state_file.write(bson.encode({
+                    "_id": document_id,
+                    "document": self.collection_class.cast_document_to_dict(
+                        document
+                    ),
+                }))
+        # The previous state is kept until the new one is complete
+        os.replace(temporary_path, self.state_path)
+        self.last_save_time = time.monotonic()
+
+    def run(self) -> None:
+        while not self.stop_event.is_set():
+            try:
+                self.sync_once()
+            except pymongo.errors.PyMongoError as exception:
+                LOG.warning(
+                    f"Could not sync {self.collection_class.collection_name}:"
+                    f" {exception}"
+                )
+                self.stop_event.wait(self.max_await_time_ms / 1000)
+
+    def start(self) -> None:
+        # Follows the collection in a background thread until stop is called
+        if self.stream is None:
+            self.load()
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def close(self) -> None:
+        self.stop()
+        self.save_state()
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
@@ -0,0 +1,59 @@
+import dataclasses
+
+import pymongo
+
+
+@dataclasses.dataclass
+class CollectionIndex:
+    # A field name or a list of (field, direction), e.g.
+    #  [("customer_id", 1), ("created_at", -1)]. Directions can also be
+    #  index types such as "text" or "2dsphere"
+    keys: str | list[tuple[str, int | str]]
+    unique: bool = False
+    sparse: bool = False
+    # TTL index, documents expire this many seconds after the indexed date
+    expire_after_seconds: int | None = None
+    partial_filter_expression: dict | None = None
+    name: str | None = None
+
+    def get_keys(self) -> list[tuple[str, int | str]]:
+        if isinstance(self.keys, str):
+            return [(self.keys, pymongo.ASCENDING)]
+        else:
+            return list(self.keys)
+
+    def get_name(self) -> str:
+        # Name given by MongoDB when none is set, e.g. "customer_id_1"
+        return self.to_index_model().document["name"]
+
+    def get_differences(self, index_information: dict) -> list[str]:
+        # Compares with an entry of Collection.index_information(). Keys of
+        #  text indexes are stored as _fts and _ftsx, so they are only
+        #  matched through the index name
+        differences = []
+        keys = self.get_keys()
+        if all(direction != "text" for _, direction in keys) \
+                and keys != [tuple(key) for key in index_information["key"]]:
+            differences.append("key")
+        options = self.to_index_model().document
+        for option in (
+            "unique", "sparse", "expireAfterSeconds", "partialFilterExpression"
+        ):
+            if options.get(option) != index_information.get(option) \
+                    and (option in options or index_information.get(option)):
+                differences.append(option)
+        return differences
+
+    def to_index_model(self) -> pymongo.IndexModel:
+        options = {}
+        if self.name is not None:
+            options["name"] = self.name
+        if self.unique:
+            options["unique"] = True
+        if self.sparse:
+            options["sparse"] = True
+        if self.expire_after_seconds is not None:
+            options["expireAfterSeconds"] = self.expire_after_seconds
+        if self.partial_filter_expression is not None:
+            options["partialFilterExpression"] = self.partial_filter_expression
+        return pymongo.IndexModel(self.get_keys(), **options)
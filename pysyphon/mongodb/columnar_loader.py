@@ -0,0 +1,145 @@
+import datetime
+import types
+import typing
+
+import numpy as np
+import pandas as pd
+
+from pysyphon.mongodb import document_codec
+
+# pandas dtypes by annotation, nullable so that missing values can be stored
+PANDAS_DTYPES = {
+    bool: "boolean",
+    int: "Int64",
+    float: "float64",
+    datetime.datetime: "datetime64[ms]",
+}
+
+
+def flatten_document(
+        document: typing.Mapping,
+        prefix: str = "",
+        flat_document: dict | None = None,
+) -> dict:
+    # Nested documents become dotted keys, lists are kept as values
+    if flat_document is None:
+        flat_document = {}
+    for key, value in document.items():
+        if isinstance(value, typing.Mapping):
+            flatten_document(value, f"{prefix}{key}.", flat_document)
+        else:
+            flat_document[f"{prefix}{key}"] = value
+    return flat_document
+
+
+def get_annotation_types(
+        annotation: typing.Any,
+        prefix: str,
+        field_types: dict[str, typing.Any],
+) -> None:
+    origin = typing.get_origin(annotation)
+    if origin in (typing.Union, types.UnionType):
+        not_none_types = [
+            type_ for type_ in typing.get_args(annotation)
+            if type_ is not type(None)
+        ]
+        if len(not_none_types) == 1:
+            get_annotation_types(not_none_types[0], prefix, field_types)
+    elif document_codec.is_sub_document_class(annotation):
+        # Sub-documents are flattened like their values
+        for field_name, field_info in annotation.model_fields.items():
+            get_annotation_types(
+                field_info.annotation,
+                f"{prefix}.{field_name}",
+                field_types,
+            )
+    else:
+        field_types[prefix] = annotation
+
+
+def get_columns_types(document_class: type) -> dict[str, typing.Any]:
+    # Python types of the flattened columns of document_class
+    columns_types = {}
+    for field_name, field_type in document_codec.get_field_types(
+        document_class
+    ).items():
+        get_annotation_types(field_type, field_name, columns_types)
+    return columns_types
+
+
+def to_array(
+        values: list,
+        column_type: typing.Any,
+) -> np.ndarray:
+    has_missing_values = any(value is None for value in values)
+    if column_type is float or (column_type is int and has_missing_values):
+        return np.array(
+            [np.nan if value is None else value for value in values],
+            dtype=np.float64,
+        )
+    elif column_type is int:
+        return np.array(values, dtype=np.int64)
+    elif column_type is bool and not has_missing_values:
+        return np.array(values, dtype=np.bool_)
+    elif column_type is datetime.datetime:
+        return np.array(
+            [np.datetime64("NaT") if value is None else value
+             for value in values],
+            dtype="datetime64[ms]",
+        )
+    else:
+        return np.array(values, dtype=object)
+
+
+def load_columnar(
+        collection_class: typing.Any,
+        filter_dict: dict | None = None,
+        fields: list[str] | None = None,
+        batch_size: int = 10000,
+        as_dataframe: bool = True,
+) -> pd.DataFrame | dict[str, np.ndarray]:
+    # Streams the documents straight into one list per flattened field, then
+    #  builds typed arrays, without creating a Document per record. Fields
+    #  can be dotted paths of nested fields
+    if fields is None:
+        projection = None
+    else:
+        projection = {field: 1 for field in fields}
+        if "_id" not in fields:
+            projection["_id"] = 0
+    columns: dict[str, list] = {}
+    row_count = 0
+    cursor = collection_class.get_collection().find(
+        filter=filter_dict,
+        projection=projection,
+        batch_size=batch_size,
+    )
+    with cursor:
+        for document in cursor:
+            for column_name, value in flatten_document(document).items():
+                column = columns.get(column_name)
+                if column is None:
+                    column = []
+                    columns[column_name] = column
+                # Fill the rows where the field was missing
+                if len(column) < row_count:
+                    column.extend([None] * (row_count - len(column)))
+                column.append(value)
+            row_count += 1
+    for column in columns.values():
+        column.extend([None] * (row_count - len(column)))
+
+    columns_types = get_columns_types(collection_class.Document)
+    if as_dataframe:
+        return pd.DataFrame({
+            column_name: pd.Series(
+                values,
+                dtype=PANDAS_DTYPES.get(columns_types.get(column_name)),
+            )
+            for column_name, values in columns.items()
+        })
+    else:
+        return {
+            column_name: to_array(values, columns_types.get(column_name))
+            for column_name, values in columns.items()
+        }
@@ -0,0 +1,279 @@
+import copy
+import dataclasses
+import datetime
+import logging
+import sys
+import types
+import typing
+
+LOG = logging.getLogger(__name__)
+
+# Decoders by (Document class, trusted, localns key) and encoders by Document
+#  class, built once from the class annotations
+_DECODERS: dict[tuple, typing.Callable[[dict], typing.Any]] = {}
+_FIELD_DECODERS: dict[tuple, dict[str, typing.Callable | None]] = {}
+_ENCODERS: dict[type, typing.Callable[..., dict]] = {}
+# Exact types of the values which don't need to be copied when encoded
+_IMMUTABLE_TYPES = frozenset({
+    str, int, float, bool, bytes, datetime.datetime, datetime.date,
+})
+
+
+def is_sub_document_class(type_: typing.Any) -> bool:
+    return isinstance(type_, type) and hasattr(type_, "psd_from_dict")
+
+
+def get_field_types(
+        document_class: type,
+        localns: dict | None = None,
+) -> dict[str, typing.Any]:
+    try:
+        return typing.get_type_hints(document_class, localns=localns)
+    except NameError:
+        pass
+    # Resolve the annotations one by one so that a single unresolvable
+    #  annotation does not prevent the others from being decoded. Values of
+    #  unresolved fields are used as they are
+    module_globals = vars(sys.modules[document_class.__module__])
+    field_types = {}
+    for field in dataclasses.fields(document_class):
+        field_type = field.type
+        if isinstance(field_type, str):
+            try:
+                field_type = eval(field_type, module_globals, localns or {})
+            except NameError as exception:
+                LOG.warning(
+                    f"Annotation of {document_class.__qualname__}."
+                    f"{field.name} can't be resolved, its values won't be "
+                    f"decoded: {exception}"
+                )
+                field_type = None
+        field_types[field.name] = field_type
+    return field_types
+
+
+def get_localns_key(localns: dict | None) -> frozenset | None:
+    # Decoders built with different names to resolve the annotations are
+    #  cached separately
+    if not localns:
+        return None
+    return frozenset(localns.items())
+
+
+def get_value_decoder(
+        field_type: typing.Any,
+        trusted: bool = False,
+) -> typing.Callable[[typing.Any], typing.Any] | None:
+    # Returns None when values of field_type are used as they are. Trusted
+    #  sub-documents are built without validation
+    origin = typing.get_origin(field_type)
+    if origin in (typing.Union, types.UnionType):
+        # Only optional sub-documents (SubDocument | None) are decoded
+        not_none_types = [
+            type_ for type_ in typing.get_args(field_type)
+            if type_ is not type(None)
+        ]
+        if len(not_none_types) == 1:
+            return get_value_decoder(not_none_types[0], trusted=trusted)
+        return None
+    elif origin is list:
+        element_decoder = get_value_decoder(
+            (typing.get_args(field_type) or [None])[0],
+            trusted=trusted,
+        )
+        if element_decoder is None:
+            return None
+        return lambda values: [
+            None if value is None else element_decoder(value)
+            for value in values
+        ]
+    elif origin is dict:
+        arguments = typing.get_args(field_type)
+        value_decoder = get_value_decoder(
+            arguments[1] if len(arguments) == 2 else None,
+            trusted=trusted,
+        )
+        if value_decoder is None:
+            return None
+        return lambda values: {
+            key: None if value is None else value_decoder(value)
+            for key, value in values.items()
+        }
+    elif is_sub_document_class(field_type):
+        if trusted:
+            return field_type.get_constructor()
+        else:
+            return field_type.psd_from_dict
+    else:
+        return None
+
+
+def get_field_decoders(
+        document_class: type,
+        localns: dict | None = None,
+        trusted: bool = False,
+) -> dict[str, typing.Callable[[typing.Any], typing.Any] | None]:
+    key = (document_class, trusted, get_localns_key(localns))
+    field_decoders = _FIELD_DECODERS.get(key)
+    if field_decoders is None:
+        field_types = get_field_types(document_class, localns=localns)
+        field_decoders = {
+            field.name: get_value_decoder(
+                field_types.get(field.name),
+                trusted=trusted,
+            )
+            for field in dataclasses.fields(document_class)
+        }
+        _FIELD_DECODERS[key] = field_decoders
+    return field_decoders
+
+
+def build_decoder(
+        document_class: type,
+        localns: dict | None = None,
+        trusted: bool = False,
+) -> typing.Callable[[dict], typing.Any]:
+    field_decoders = list(get_field_decoders(
+        document_class,
+        localns=localns,
+        trusted=trusted,
+    ).items())
+
+    def decode(input_dict: dict) -> typing.Any:
+        # input_dict is not modified. Missing fields are set to None
+        kwargs = {}
+        for field_name, value_decoder in field_decoders:
+            value = input_dict.get(field_name)
+            if value_decoder is not None and value is not None:
+                value = value_decoder(value)
+            kwargs[field_name] = value
+        return document_class(**kwargs)
+
+    return decode
+
+
+def get_decoder(
+        document_class: type,
+        localns: dict | None = None,
+        trusted: bool = False,
+) -> typing.Callable[[dict], typing.Any]:
+    key = (document_class, trusted, get_localns_key(localns))
+    decoder = _DECODERS.get(key)
+    if decoder is None:
+        decoder = build_decoder(
+            document_class,
+            localns=localns,
+            trusted=trusted,
+        )
+        _DECODERS[key] = decoder
+    return decoder
+
+
+def copy_value(value: typing.Any) -> typing.Any:
+    # Encoded dicts don't share mutable values with the Document, like with
+    #  dataclasses.asdict
+    value_type = type(value)
+    if value_type in _IMMUTABLE_TYPES:
+        return value
+    elif value_type is list:
+        return [copy_value(element) for element in value]
+    elif value_type is dict:
+        return {key: copy_value(element) for key, element in value.items()}
+    else:
+        return copy.deepcopy(value)
+
+
+def encode_unknown_value(value: typing.Any) -> typing.Any:
+    # Used for fields whose annotation could not be resolved
+    if hasattr(value, "psd_to_dict"):
+        return value.psd_to_dict()
+    elif dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    else:
+        return copy_value(value)
+
+
+def get_value_encoder(
+        field_type: typing.Any,
+) -> typing.Callable[[typing.Any], typing.Any] | None:
+    # Returns None when values of field_type are stored as they are
+    if field_type is None or field_type is typing.Any:
+        return encode_unknown_value
+    origin = typing.get_origin(field_type)
+    if origin in (typing.Union, types.UnionType):
+        value_encoders = [
+            get_value_encoder(type_) for type_ in typing.get_args(field_type)
+            if type_ is not type(None)
+        ]
+        if all(value_encoder is None for value_encoder in value_encoders):
+            return None
+        elif len(value_encoders) == 1:
+            return value_encoders[0]
+        else:
+            return encode_unknown_value
+    elif origin is list:
+        element_encoder = get_value_encoder(
+            (typing.get_args(field_type) or [None])[0]
+        )
+        if element_encoder is None:
+            return None
+        return lambda values: [
+            None if value is None else element_encoder(value)
+            for value in values
+        ]
+    elif origin is dict:
+        arguments = typing.get_args(field_type)
+        value_encoder = get_value_encoder(
+            arguments[1] if len(arguments) == 2 else None
+        )
+        if value_encoder is None:
+            return None
+        return lambda values: {
+            key: None if value is None else value_encoder(value)
+            for key, value in values.items()
+        }
+    elif is_sub_document_class(field_type):
+        return field_type.psd_to_dict
+    elif dataclasses.is_dataclass(field_type):
+        return dataclasses.asdict
+    else:
+        return None
+
+
+def build_encoder(
+        document_class: type,
+) -> typing.Callable[..., dict]:
+    field_types = get_field_types(document_class)
+    field_encoders = [
+        (field.name, get_value_encoder(field_types.get(field.name)))
+        for field in dataclasses.fields(document_class)
+    ]
+
+    def encode(
+            document: typing.Any,
+            keep_nones: bool = False,
+            cast_sub_documents: bool = True,
+    ) -> dict:
+        # Encoders build new containers, other values are copied
+        dict_ = {}
+        for field_name, value_encoder in field_encoders:
+            value = getattr(document, field_name)
+            if value is None:
+                if keep_nones:
+                    dict_[field_name] = None
+                continue
+            if cast_sub_documents and value_encoder is not None:
+                dict_[field_name] = value_encoder(value)
+            else:
+                dict_[field_name] = copy_value(value)
+        return dict_
+
+    return encode
+
+
+def get_encoder(document_class: type) -> typing.Callable[..., dict]:
+    encoder = _ENCODERS.get(document_class)
+    if encoder is None:
+        encoder = build_encoder(document_class)
+        _ENCODERS[document_class] = encoder
+    return encoder
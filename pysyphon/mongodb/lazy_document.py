@@ -0,0 +1,72 @@
+import typing
+
+import bson
+import bson.raw_bson
+
+from pysyphon.mongodb import document_codec
+
+
+def raw_to_python(value: typing.Any) -> typing.Any:
+    # Nested documents of a RawBSONDocument are still encoded
+    if isinstance(value, bson.raw_bson.RawBSONDocument):
+        return bson.decode(value.raw)
+    elif isinstance(value, list):
+        return [raw_to_python(element) for element in value]
+    else:
+        return value
+
+
+# Attributes set by LazyDocument.__init__
+_OWN_ATTRIBUTES = ("_raw_document", "_collection_class")
+
+
+class LazyDocument:
+    # Wraps a RawBSONDocument read from the collection. A field is decoded,
+    #  and converted like in collection_class.Document, when it is first
+    #  accessed. The raw document can be sent as it is to another collection
+    def __init__(
+            self,
+            raw_document: bson.raw_bson.RawBSONDocument,
+            collection_class: typing.Any,
+    ):
+        self._raw_document = raw_document
+        self._collection_class = collection_class
+
+    def __getattr__(self, name: str) -> typing.Any:
+        # Only called for attributes which are not decoded yet. The own
+        #  attributes and special methods are not fields, they are missing
+        #  while unpickling or when probed by copy
+        if name in _OWN_ATTRIBUTES or name.startswith("__"):
+            raise AttributeError(name)
+        field_decoders = document_codec.get_field_decoders(
+            document_class=self._collection_class.Document,
+            trusted=self._collection_class.trusted_reads,
+        )
+        # _id can be read even if it is not a field of the Document
+        if name not in field_decoders and name != "_id":
+            raise AttributeError(
+                f"{self._collection_class.Document.__qualname__} has no field "
+                f"{name}"
+            )
+        value = raw_to_python(self._raw_document.get(name))
+        value_decoder = field_decoders.get(name)
+        if value_decoder is not None and value is not None:
+            value = value_decoder(value)
+        # Cache the decoded value so __getattr__ is not called again
+        setattr(self, name, value)
+        return value
+
+    def __repr__(self):
+        return (
+            f"LazyDocument({self._collection_class.Document.__qualname__}, "
+            f"{len(self._raw_document.raw)} bytes)"
+        )
+
+    def get_raw_document(self) -> bson.raw_bson.RawBSONDocument:
+        return self._raw_document
+
+    def materialize(self) -> typing.Any:
+        # Decodes all the fields into a Document
+        return self._collection_class.load_document_from_dict(
+            bson.decode(self._raw_document.raw)
+        )
@@ -0,0 +1,109 @@
+import asyncio
+import os
+import threading
+import weakref
+
+import pymongo
+
+# MongoClients are thread safe and hold their own connection pool, so a single
+#  client is shared by all the collections using the same URI and options
+_CLIENTS: dict[tuple, pymongo.MongoClient] = {}
+# AsyncMongoClients are bound to the event loop they are used in, so they are
+#  shared by loop
+_ASYNC_CLIENTS: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[tuple, pymongo.AsyncMongoClient]
+] = weakref.WeakKeyDictionary()
+_LOCK = threading.Lock()
+_PID = os.getpid()
+
+
+class SharedMongoClient(pymongo.MongoClient):
+    # A caller closing a shared client removes it from the cache, so the
+    #  next get_client builds a new one instead of returning a closed client
+    def close(self) -> None:
+        with _LOCK:
+            for key, client in list(_CLIENTS.items()):
+                if client is self:
+                    del _CLIENTS[key]
+        super().close()
+
+
+class SharedAsyncMongoClient(pymongo.AsyncMongoClient):
+    async def close(self) -> None:
+        with _LOCK:
+            for loop_clients in _ASYNC_CLIENTS.values():
+                for key, client in list(loop_clients.items()):
+                    if client is self:
+                        del loop_clients[key]
+        await super().close()
+
+
+def get_client(
+        uri: str,
+        **client_options,
+) -> pymongo.MongoClient:
+    global _PID
+    key = (uri, tuple(sorted(client_options.items())))
+    with _LOCK:
+        # Clients must not be used across forks. Checked here as well as in
+        #  the fork hook for processes not created with os.fork
+        if _PID != os.getpid():
+            _CLIENTS.clear()
+            _ASYNC_CLIENTS.clear()
+            _PID = os.getpid()
+        client = _CLIENTS.get(key)
+        if client is None:
+            client = SharedMongoClient(uri, **client_options)
+            _CLIENTS[key] = client
+    return client
+
+
+def get_async_client(
+        uri: str,
+        **client_options,
+) -> pymongo.AsyncMongoClient:
+    # Must be called from a running event loop
+    global _PID
+    loop = asyncio.get_running_loop()
+    key = (uri, tuple(sorted(client_options.items())))
+    with _LOCK:
+        if _PID != os.getpid():
+            _CLIENTS.clear()
+            _ASYNC_CLIENTS.clear()
+            _PID = os.getpid()
+        loop_clients = _ASYNC_CLIENTS.setdefault(loop, {})
+        client = loop_clients.get(key)
+        if client is None:
+            client = SharedAsyncMongoClient(uri, **client_options)
+            loop_clients[key] = client
+    return client
+
+
+async def close_async_clients() -> None:
+    # Closes the clients of the running event loop
+    with _LOCK:
+        loop_clients = _ASYNC_CLIENTS.pop(asyncio.get_running_loop(), {})
+    for client in list(loop_clients.values()):
+        await client.close()
+
+
+def close_clients() -> None:
+    with _LOCK:
+        clients = list(_CLIENTS.values())
+        _CLIENTS.clear()
+    for client in clients:
+        client.close()
+
+
+def _reset_after_fork() -> None:
+    global _LOCK, _PID
+    # Parent clients are dropped without being closed as their sockets belong
+    #  to the parent process
+    _CLIENTS.clear()
+    _ASYNC_CLIENTS.clear()
+    _LOCK = threading.Lock()
+    _PID = os.getpid()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
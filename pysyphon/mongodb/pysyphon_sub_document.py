@@ -1,11 +1,124 @@
 import pydantic
+import typing
+
+from pysyphon.mongodb import document_codec
+
+# Constructors of trusted sub-documents, by class
+_CONSTRUCTORS: dict[type, typing.Callable[[dict], typing.Any]] = {}
+# Classes whose constructor is being built, for recursive sub-documents
+_BUILDING_CLASSES: set[type] = set()
 
 
 class PysyphonSubDocument(pydantic.BaseModel):
 
     def psd_to_dict(self):
-        return self.dict()
+        # Same as model_dump(), calling the compiled serializer of the class
+        #  directly
+        return self.__pydantic_serializer__.to_python(self)
 
     @classmethod
     def psd_from_dict(cls, input_dict: dict):
         return cls(**input_dict)
+
+    @classmethod
+    def psd_construct(cls, input_dict: dict):
+        # Builds the sub-document without validation, for data read from
+        #  collections only written through pysyphon
+        return cls.get_constructor()(input_dict)
+
+    @classmethod
+    def get_constructor(cls) -> typing.Callable[[dict], typing.Any]:
+        constructor = _CONSTRUCTORS.get(cls)
+        if constructor is None:
+            if cls in _BUILDING_CLASSES:
+                # A sub-document nested in itself, resolved when called
+                return cls.psd_construct
+            _BUILDING_CLASSES.add(cls)
+            try:
+                constructor = build_constructor(cls)
+            finally:
+                _BUILDING_CLASSES.discard(cls)
+            _CONSTRUCTORS[cls] = constructor
+        return constructor
+
+
+def build_constructor(
+        sub_document_class: type[PysyphonSubDocument],
+) -> typing.Callable[[dict], typing.Any]:
+    # Same result as model_construct, which handles aliases, defaults and
+    #  extra fields for each call. Here everything which depends on the class
+    #  only is resolved once, and a dict with exactly the fields of the class,
+    #  as written by psd_to_dict, is used without checking each field
+    fields = sub_document_class.__pydantic_fields__
+    nested_decoders = tuple(
+        (field_name, value_decoder)
+        for field_name, field_info in fields.items()
+        if (value_decoder := document_codec.get_value_decoder(
+            field_info.annotation,
+            trusted=True,
+        )) is not None
+    )
+    if sub_document_class.__pydantic_root_model__ \
+            or sub_document_class.__pydantic_post_init__ \
+            or sub_document_class.__private_attributes__ \
+            or sub_document_class.model_config.get("extra") == "allow" \
+            or any(
+                field_info.alias is not None
+                or field_info.validation_alias is not None
+                for field_info in fields.values()
+            ):
+        def construct_with_pydantic(input_dict: dict) -> typing.Any:
+            input_dict = dict(input_dict)
+            for field_name, value_decoder in nested_decoders:
+                if input_dict.get(field_name) is not None:
+                    input_dict[field_name] = value_decoder(
+                        input_dict[field_name]
+                    )
+            return sub_document_class.model_construct(**input_dict)
+
+        return construct_with_pydantic
+
+    field_names = frozenset(fields)
+    optional_fields = tuple(
+        (field_name, field_info) for field_name, field_info in fields.items()
+        if not field_info.is_required()
+    )
+    new = sub_document_class.__new__
+    # Setters of the slots of BaseModel, faster than object.__setattr__.
+    #  These are pydantic internals: the supported versions are pinned in
+    #  pyproject.toml and tests/test_sub_document.py checks the result
+    #  against validated sub-documents
+    slots = pydantic.BaseModel.__dict__
+    set_dict = slots["__dict__"].__set__
+    set_fields_set = slots["__pydantic_fields_set__"].__set__
+    set_extra = slots["__pydantic_extra__"].__set__
+    set_private = slots["__pydantic_private__"].__set__
+
+    def construct(input_dict: dict) -> typing.Any:
+        if input_dict.keys() == field_names:
+            values = dict(input_dict)
+            fields_set = set(field_names)
+        else:
+            values = {
+                field_name: value for field_name, value in input_dict.items()
+                if field_name in field_names
+            }
+            for field_name, field_info in optional_fields:
+                if field_name not in values:
+                    values[field_name] = field_info.get_default(
+                        call_default_factory=True,
+                        validated_data=values,
+                    )
+            fields_set = set(input_dict.keys() & field_names)
+        for field_name, value_decoder in nested_decoders:
+            value = values.get(field_name)
+            if value is not None:
+                values[field_name] = value_decoder(value)
+        sub_document = new(sub_document_class)
+        set_dict(sub_document, values)
+        set_fields_set(sub_document, fields_set)
+        set_extra(sub_document, None)
+        set_private(sub_document, None)
+        return sub_document
+
+    return construct
@@ -0,0 +1,134 @@
+import dataclasses
+import json
+import logging
+import threading
+import typing
+
+LOG = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass
+class QueryShapeStats:
+    collection_name: str
+    operation: str
+    # Filter with its values replaced by their type names
+    shape: str
+    count: int = 0
+    total_time_ms: float = 0.0
+    max_time_ms: float = 0.0
+    # Stages of the winning plan, None if the filter could not be explained
+    plan_stages: list[str] | None = None
+    collection_scan: bool = False
+
+    @property
+    def mean_time_ms(self) -> float:
+        return self.total_time_ms / self.count if self.count > 0 else 0.0
+
+
+def get_query_shape(filter_value: typing.Any) -> typing.Any:
+    if isinstance(filter_value, dict):
+        return {
+            key: get_query_shape(value) for key, value in filter_value.items()
+        }
+    elif isinstance(filter_value, list):
+        return [get_query_shape(value) for value in filter_value]
+    else:
+        return type(filter_value).__name__
+
+
+def get_plan_stages(plan: typing.Any) -> list[str]:
+    # Stages can be nested under inputStage(s) or queryPlan depending on the
+    #  server version, so all the nested dicts are searched
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages += get_plan_stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            stages += get_plan_stages(value)
+    return stages
+
+
+class QueryProfiler:
+    # Records the latency of each query shape of the collections using it
+    #  (AbstractCollection.query_profiler). The filter of a new shape is
+    #  explained once and collection scans are logged as warnings
+    def __init__(self, explain_queries: bool = True):
+        self.explain_queries = explain_queries
+        self.stats: dict[tuple[str, str, str], QueryShapeStats] = {}
+        self.lock = threading.Lock()
+
+    def record(
+            self,
+            collection_class: typing.Any,
+            operation: str,
+            filter_dict: dict | None,
+            time_ms: float,
+    ) -> None:
+        shape = json.dumps(
+            get_query_shape(filter_dict or {}),
+            sort_keys=True,
+        )
+        key = (collection_class.collection_name, operation, shape)
+        with self.lock:
+            shape_stats = self.stats.get(key)
+            is_new_shape = shape_stats is None
+            if is_new_shape:
+                shape_stats = QueryShapeStats(
+                    collection_name=collection_class.collection_name,
+                    operation=operation,
+                    shape=shape,
+                )
+                self.stats[key] = shape_stats
+            shape_stats.count += 1
+            shape_stats.total_time_ms += time_ms
+            shape_stats.max_time_ms = max(shape_stats.max_time_ms, time_ms)
+
+        # Empty filters are full scans on purpose
+        if is_new_shape and self.explain_queries and filter_dict:
+            self.explain(collection_class, filter_dict, shape_stats)
+
+    def explain(
+            self,
+            collection_class: typing.Any,
+            filter_dict: dict,
+            shape_stats: QueryShapeStats,
+    ) -> None:
+        try:
+            explanation = collection_class.get_collection().find(
+                filter_dict
+            ).explain()
+        except Exception as exception:
+            LOG.warning(f"Could not explain {shape_stats.shape}: {exception}")
+            return
+        shape_stats.plan_stages = get_plan_stages(
+            explanation.get("queryPlanner", {}).get("winningPlan", {})
+        )
+        shape_stats.collection_scan = "COLLSCAN" in shape_stats.plan_stages
+        if shape_stats.collection_scan:
+            LOG.warning(
+                f"Collection scan on {shape_stats.collection_name} for "
+                f"{shape_stats.operation} with filter shape "
+                f"{shape_stats.shape}"
+            )
+
+    def get_stats(self) -> list[QueryShapeStats]:
+        # Slowest shapes first
+        with self.lock:
+            return sorted(
+                self.stats.values(),
+                key=lambda shape_stats: shape_stats.total_time_ms,
+                reverse=True,
+            )
+
+    def get_collection_scans(self) -> list[QueryShapeStats]:
+        return [
+            shape_stats for shape_stats in self.get_stats()
+            if shape_stats.collection_scan
+        ]
+
+    def reset(self) -> None:
+        with self.lock:
+            self.stats = {}
@@ -0,0 +1,243 @@
+import concurrent.futures
+import decimal
+import queue
+import threading
+import typing
+
+import bson
+import bson.decimal128
+import bson.int64
+
+# Sampled _ids per range used to place the range boundaries
+SAMPLE_SIZE_PER_RANGE = 20
+# Seconds between checks that the range workers are still running
+WORKER_CHECK_SECONDS = 1.0
+# Marks the end of a range in the queue of a threaded scan
+_RANGE_DONE = object()
+
+
+def get_bson_type_bracket(value: typing.Any) -> str:
+    # Range queries only match values of the same BSON type as their bounds,
+    #  all numeric types being compared together
+    if isinstance(value, (
+        int, float, decimal.Decimal, bson.int64.Int64,
+        bson.decimal128.Decimal128,
+    )) and not isinstance(value, bool):
+        return "number"
+    return type(value).__name__
+
+
+def has_single_id_type(collection_class: typing.Any) -> bool:
+    # _ids are sorted by BSON type first, so if the lowest and highest _ids
+    #  have the same type, all the _ids have it. Both are read from the _id
+    #  index
+    collection = collection_class.get_collection()
+    lowest_ids = list(
+        collection.find({}, {"_id": 1}).sort("_id", 1).limit(1)
+    )
+    highest_ids = list(
+        collection.find({}, {"_id": 1}).sort("_id", -1).limit(1)
+    )
+    if len(lowest_ids) == 0:
+        return True
+    return get_bson_type_bracket(lowest_ids[0]["_id"]) \
+        == get_bson_type_bracket(highest_ids[0]["_id"])
+
+
+def get_id_boundaries(
+        collection_class: typing.Any,
+        number_of_ranges: int,
+        filter_dict: dict | None = None,
+) -> list:
+    # Places number_of_ranges - 1 boundaries on a random sample of the _ids
+    #  so ranges hold about the same number of documents. _ids of different
+    #  types would be missed by the ranges of another type, so a single
+    #  unbounded range is used for them
+    if number_of_ranges <= 1 or not has_single_id_type(collection_class):
+        return []
+    collection = collection_class.get_collection()
+    pipeline = ([{"$match": filter_dict}] if filter_dict else []) + [
+        {"$sample": {"size": number_of_ranges * SAMPLE_SIZE_PER_RANGE}},
+        {"$project": {"_id": 1}},
+    ]
+    sampled_ids = sorted({
+        document["_id"] for document in collection.aggregate(pipeline)
+    })
+    if len(sampled_ids) < number_of_ranges:
+        return sampled_ids[1:]
+    return sorted(set(
+        sampled_ids[index * len(sampled_ids) // number_of_ranges]
+        for index in range(1, number_of_ranges)
+    ))
+
+
+def get_ranges(boundaries: list) -> list[tuple]:
+    # Open ended first and last ranges, None meaning no bound
+    bounds = [None] + boundaries + [None]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def get_range_filter(
+        filter_dict: dict | None,
+        lower_bound: typing.Any,
+        upper_bound: typing.Any,
+) -> dict:
+    id_filter = {}
+    if lower_bound is not None:
+        id_filter["$gte"] = lower_bound
+    if upper_bound is not None:
+        id_filter["$lt"] = upper_bound
+    if len(id_filter) == 0:
+        return filter_dict or {}
+    elif filter_dict:
+        return {"$and": [filter_dict, {"_id": id_filter}]}
+    else:
+        return {"_id": id_filter}
+
+
+def load_range(
+        collection_class: typing.Any,
+        filter_dict: dict,
+        projection: list[str] | dict | None,
+        batch_size: int,
+) -> list:
+    # Run in worker processes, so the Documents are decoded there
+    return list(collection_class.iterate_many(
+        filter_dict=filter_dict,
+        projection=projection,
+        batch_size=batch_size,
+    ))
+
+
+def put_until_stopped(
+        output_queue: queue.Queue,
+        item: typing.Any,
+        stop_event: threading.Event,
+) -> bool:
+    while not stop_event.is_set():
+        try:
+            output_queue.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def scan_range(
+        collection_class: typing.Any,
+        filter_dict: dict,
+        projection: list[str] | dict | None,
+        batch_size: int,
+        output_queue: queue.Queue,
+        stop_event: threading.Event,
+) -> None:
+    # Sends the decoded Documents by batches, then _RANGE_DONE, or the
+    #  exception raised while scanning
+    try:
+        batch = []
+        for document in collection_class.iterate_many(
+            filter_dict=filter_dict,
+            projection=projection,
+            batch_size=batch_size,
+        ):
+            batch.append(document)
+            if len(batch) >= batch_size:
+                if not put_until_stopped(output_queue, batch, stop_event):
+                    return
+                batch = []
+        if len(batch) > 0:
+            if not put_until_stopped(output_queue, batch, stop_event):
+                return
+        put_until_stopped(output_queue, _RANGE_DONE, stop_event)
+    except Exception as exception:
+        put_until_stopped(output_queue, exception, stop_event)
+
+
+def parallel_scan(
+        collection_class: typing.Any,
+        filter_dict: dict | None = None,
+        projection: list[str] | dict | None = None,
+        max_workers: int = 4,
+        number_of_ranges: int | None = None,
+        batch_size: int = 1000,
+        use_processes: bool = False,
+) -> typing.Iterator:
+    # Splits the collection in _id ranges which are read at the same time and
+    #  yields their Documents as a single stream, in no particular order.
+    #  With processes, each range is loaded completely in a worker before
+    #  being sent, so more ranges are used by default to bound memory
+    if number_of_ranges is None:
+        number_of_ranges = max_workers * (4 if use_processes else 1)
+    ranges = get_ranges(get_id_boundaries(
+        collection_class=collection_class,
+        number_of_ranges=number_of_ranges,
+        filter_dict=filter_dict,
+    ))
+    range_filters = [
+        get_range_filter(filter_dict, lower_bound, upper_bound)
+        for lower_bound, upper_bound in ranges
+    ]
+
+    if use_processes:
+        with concurrent.futures.ProcessPoolExecutor(max_workers) as executor:
+            futures = [
+                executor.submit(
+                    load_range,
+                    collection_class,
+                    range_filter,
+                    projection,
+                    batch_size,
+                )
+                for range_filter in range_filters
+            ]
+            try:
+                for future in concurrent.futures.as_completed(futures):
+                    yield from future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+        return
+
+    # Bounded so that workers wait when the stream is consumed slowly
+    output_queue = queue.Queue(maxsize=max_workers * 2)
+    stop_event = threading.Event()
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers)
+    try:
+        futures = [
+            executor.submit(
+                scan_range,
+                collection_class,
+                range_filter,
+                projection,
+                batch_size,
+                output_queue,
+                stop_event,
+            )
+            for range_filter in range_filters
+        ]
+        finished_ranges = 0
+        while finished_ranges < len(range_filters):
+            try:
+                item = output_queue.get(timeout=WORKER_CHECK_SECONDS)
+            except queue.Empty:
+                # A worker stopped without sending the end of its range
+                if all(future.done() for future in futures) \
+                        and output_queue.empty():
+                    for future in futures:
+                        if future.exception() is not None:
+                            raise future.exception()
+                    raise RuntimeError(
+                        f"Scan workers of {collection_class.collection_name}"
+                        f" stopped before the end of their ranges"
+                    )
+                continue
+            if item is _RANGE_DONE:
+                finished_ranges += 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield from item
+    finally:
+        # Also reached when the stream is closed before its end
+        stop_event.set()
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -1,9 +1,33 @@
-import pysyphon.postgresql.postgresql_functions
-import pysyphon.postgresql.postgresql_types
-import pysyphon.postgresql.abstract_table
-from pysyphon.postgresql.abstract_table import AbstractTable
-from pysyphon.postgresql.postgresql_types import (
-    IntArray,
-    FloatArray,
-    VarcharArray,
-)
+import importlib
+
+# Exported names by module, imported when first accessed
+_EXPORTS = {
+    "AbstractTable": "pysyphon.postgresql.abstract_table",
+    "QueryPlan": "pysyphon.postgresql.abstract_table",
+    "TableIndex": "pysyphon.postgresql.table_index",
+    "IntArray": "pysyphon.postgresql.postgresql_types",
+    "FloatArray": "pysyphon.postgresql.postgresql_types",
+    "VarcharArray": "pysyphon.postgresql.postgresql_types",
+}
+
+
+def __getattr__(name: str):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        # Sub-modules, like postgresql_functions, are also imported on
+        #  first access
+        try:
+            return importlib.import_module(f"{__name__}.{name}")
+        except ModuleNotFoundError as exception:
+            if exception.name != f"{__name__}.{name}":
+                raise
+        raise AttributeError(
+            f"module 'pysyphon.postgresql' has no attribute {name!r}"
+        )
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + list(_EXPORTS))
@@ -1,13 +1,60 @@
 import dataclasses
+import decimal
 import logging
 import psycopg2.errors
 import psycopg2.extensions
+import time
 import typing
 
+from pysyphon import instrumentation
 from pysyphon.postgresql import postgresql_functions
+from pysyphon.postgresql.table_index import TableIndex
 
 LOG = logging.getLogger(__name__)
 
+# Dataclasses built for column projections, cached by table class and columns
+_PARTIAL_ROW_CLASSES: dict[tuple[type, tuple[str, ...]], type] = {}
+# Resolved annotations of the Row classes, by Row class
+_COLUMN_TYPES: dict[type, dict[str, typing.Any]] = {}
+
+
+@dataclasses.dataclass
+class QueryPlan:
+    query: str
+    # Root of the EXPLAIN (FORMAT JSON) output
+    plan: dict
+    planning_time_ms: float
+    execution_time_ms: float
+    # Measured from Python, includes the network and connection time
+    total_time_ms: float
+
+    def __str__(self):
+        return "\n".join(
+            self.get_node_lines(self.plan["Plan"]) + [
+                f"Planning Time: {self.planning_time_ms:.3f} ms",
+                f"Execution Time: {self.execution_time_ms:.3f} ms",
+                f"Total Time: {self.total_time_ms:.3f} ms",
+            ]
+        )
+
+    @classmethod
+    def get_node_lines(cls, node: dict, depth: int = 0) -> list[str]:
+        relation = (
+            f" on {node['Relation Name']}" if "Relation Name" in node else ""
+        )
+        index = f" using {node['Index Name']}" if "Index Name" in node else ""
+        lines = [
+            "  " * depth + ("-> " if depth > 0 else "") +
+            f"{node['Node Type']}{index}{relation} "
+            f"(actual time={node.get('Actual Total Time')} ms "
+            f"rows={node.get('Actual Rows')} "
+            f"shared hit={node.get('Shared Hit Blocks')} "
+            f"read={node.get('Shared Read Blocks')})"
+        ]
+        for child_node in node.get("Plans", []):
+            lines += cls.get_node_lines(child_node, depth + 1)
+        return lines
+
 
 # TODO: think of making inherit list and be a list of rows
 class AbstractTable:
@@ -18,6 +65,10 @@ class AbstractTable:
     database_name: str = None
     port: int = 5432
     primary_key_column: str | list[str] | None = None
+    # Maximum number of keys bound in a single query by get_many/delete_many
+    key_chunk_size: int = 10000
+    # Secondary indexes created by ensure_indexes
+    indexes: list[TableIndex] = []
 
     def __init_subclass__(cls):
         # This is needed to enforce the children behaviours
@@ -51,35 +102,60 @@ class AbstractTable:
             return [field.name for field in dataclasses.fields(cls)]
 
     @classmethod
-    def single_transaction_query(
-            cls,
-            query: str,
-            result_to_fetch: bool = False,
-            log_query: bool = False,
-    ) -> typing.Any:
-        connection = postgresql_functions.get_connection(
+    def get_connection(cls) -> psycopg2.extensions.connection:
+        return postgresql_functions.get_connection(
             host=cls.host,
             user=cls.user,
             password=cls.password,
             database=cls.database_name,
             port=cls.port,
         )
-        if log_query:
-            LOG.info(f"SQL query: \n{query}")
-        with connection.cursor() as cursor:
-            try:
-                cursor.execute(query)
-            except psycopg2.errors.NumericValueOutOfRange as exception:
-                print(
-                    f"Error: {exception} for: {query}"
-                )
-                raise exception
-            connection.commit()
-            if result_to_fetch:
-                result = cursor.fetchall()
-            else:
-                result = None
-        connection.close()
+
+    @classmethod
+    def get_primary_key_columns(cls) -> list[str]:
+        if isinstance(cls.primary_key_column, str):
+            return [cls.primary_key_column]
+        else:
+            return list(cls.primary_key_column)
+
+    @classmethod
+    def single_transaction_query(
+            cls,
+            query: str,
+            result_to_fetch: bool = False,
+            log_query: bool = False,
+            timer: instrumentation.OperationTimer | None = None,
+    ) -> typing.Any:
+        # timer is given by the methods which built the query
+        if timer is None:
+            timer = instrumentation.start_operation(
+                "postgresql", "execute", cls.table_name
+            )
+        with timer:
+            connection = cls.get_connection()
+            timer.lap("connection_wait_ms")
+            if log_query:
+                LOG.info(f"SQL query: \n{query}")
+            with connection.cursor() as cursor:
+                try:
+                    cursor.execute(query)
+                except psycopg2.errors.NumericValueOutOfRange as exception:
+                    print(
+                        f"Error: {exception} for: {query}"
+                    )
+                    raise exception
+                connection.commit()
+                timer.lap("server_ms")
+                if result_to_fetch:
+                    result = cursor.fetchall()
+                    timer.lap("decode_ms")
+                    timer.add_rows(len(result))
+                else:
+                    result = None
+                    timer.add_rows(max(cursor.rowcount, 0))
+                timer.add_query(query)
+            connection.close()
+            timer.finish()
 
         return result
 
@@ -88,39 +164,270 @@ class AbstractTable:
             cls,
             query: str,
             log_query: bool = False,
-    ) -> list[Row]:
-        connection = postgresql_functions.get_connection(
-            host=cls.host,
-            user=cls.user,
-            password=cls.password,
-            database=cls.database_name,
-            port=cls.port,
+            explain: bool = False,
+    ) -> list[Row] | QueryPlan:
+        if explain:
+            return cls.explain_query(query=query, log_query=log_query)
+        timer = instrumentation.start_operation(
+            "postgresql", "fetch", cls.table_name
         )
+        with timer:
+            connection = cls.get_connection()
+            timer.lap("connection_wait_ms")
+            if log_query:
+                LOG.info(f"SQL query: \n{query}")
+            with connection.cursor() as cursor:
+                # If using SELECT *, check that table columns are the same
+                #  as python table otherwise, unexpected results could happen
+                if query.find("*") >= 0:
+                    columns = cls.get_table_columns(cursor)
+                    if columns != cls.Row.columns():
+                        raise KeyError(
+                            f"Python table and SQL tables don't have the "
+                            f"same columns (or not in the same order) for "
+                            f"{cls.table_name}. Features in table: {columns} "
+                            f"vs features in Python: {cls.Row.columns()}."
+                        )
+
+                # Get query results
+                cursor.execute(query)
+                timer.lap("server_ms")
+                result = cursor.fetchall()
+            connection.close()
+
+            rows = cls.build_rows_from_result(result)
+            timer.lap("decode_ms")
+            timer.add_rows(len(rows))
+            timer.add_query(query)
+            timer.finish()
+        return rows
+
+    @classmethod
+    def explain_query(
+            cls,
+            query: str,
+            log_query: bool = False,
+    ) -> QueryPlan:
+        # The query is executed by EXPLAIN ANALYZE but its rows are not sent
+        plan_query = postgresql_functions.explain_analyze(query)
         if log_query:
-            LOG.info(f"SQL query: \n{query}")
+            LOG.info(f"SQL query: \n{plan_query}")
+        start = time.perf_counter()
+        connection = cls.get_connection()
         with connection.cursor() as cursor:
-            # If using SELECT *, check that table columns are the same
-            #  as python table otherwise, unexpected results could happen
-            if query.find("*") >= 0:
-                columns = cls.get_table_columns(cursor)
-                if columns != cls.Row.columns():
-                    raise KeyError(
-                        f"Python table and SQL tables don't have the same "
-                        f"columns (or not in the same order) for "
-                        f"{cls.table_name}. Features in table: {columns} vs "
-                        f"features in Python: {cls.Row.columns()}."
-                    )
-
-            # Get query results
-            cursor.execute(query)
+            cursor.execute(plan_query)
             result = cursor.fetchall()
         connection.close()
+        total_time_ms = (time.perf_counter() - start) * 1000
+
+        plan = result[0][0][0]
+        return QueryPlan(
+            query=query,
+            plan=plan,
+            planning_time_ms=plan["Planning Time"],
+            execution_time_ms=plan["Execution Time"],
+            total_time_ms=total_time_ms,
+        )
+
+    @classmethod
+    def get_existing_indexes(cls) -> dict[str, bool]:
+        # Index names with their validity. A failed concurrent build leaves an
+        #  invalid index behind
+        result = cls.single_transaction_query(
+            query=(
+                f"SELECT index_class.relname, pg_index.indisvalid "
+                f"FROM pg_index "
+                f"JOIN pg_class AS index_class "
+                f"  ON index_class.oid = pg_index.indexrelid "
+                f"WHERE pg_index.indrelid = '{cls.table_name}'::regclass;"
+            ),
+            result_to_fetch=True,
+        )
+        return {name: is_valid for name, is_valid in result}
+
+    @classmethod
+    def ensure_indexes(
+            cls,
+            concurrently: bool = True,
+            log_query: bool = False,
+    ) -> list[str]:
+        # Creates the indexes declared in cls.indexes which do not exist yet
+        #  and returns their names. Indexes are matched by name, so changing
+        #  the definition of an index requires changing its name
+        existing_indexes = cls.get_existing_indexes()
+        created_indexes = []
+        connection = cls.get_connection()
+        # CREATE INDEX CONCURRENTLY can't run inside a transaction block
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            for index in cls.indexes:
+                index_name = index.get_name(cls.table_name)
+                if existing_indexes.get(index_name) is True:
+                    continue
+                queries = [postgresql_functions.create_index(
+                    table_name=cls.table_name,
+                    index_name=index_name,
+                    columns=index.columns,
+                    unique=index.unique,
+                    method=index.method,
+                    where=index.where,
+                    concurrently=concurrently,
+                )]
+                if existing_indexes.get(index_name) is False:
+                    LOG.warning(f"Rebuilding invalid index {index_name}")
+                    # Indexes live in the schema of their table
+                    schema = cls.table_name.rpartition(".")[0]
+                    queries.insert(0, postgresql_functions.drop_index(
+                        index_name=(
+                            f"{schema}.{index_name}" if schema else index_name
+                        ),
+                        concurrently=concurrently,
+                    ))
+                for query in queries:
+                    if log_query:
+                        LOG.info(f"SQL query: \n{query}")
+                    cursor.execute(query)
+                created_indexes.append(index_name)
+        connection.close()
 
+        return created_indexes
+
+    @classmethod
+    def build_rows_from_result(cls, result: list[tuple]) -> list[Row]:
         # dataclasses can be built with *args by default
         return [cls.Row(*[
             cls.paste_postgresql_object_to_python(element) for element in list_
         ]) for list_ in result]
 
+    @classmethod
+    def get_row_key(cls, row: Row) -> typing.Any:
+        # Single column keys are plain values, composite keys are tuples
+        primary_key_columns = cls.get_primary_key_columns()
+        if len(primary_key_columns) == 1:
+            return getattr(row, primary_key_columns[0])
+        else:
+            return tuple(
+                getattr(row, column) for column in primary_key_columns
+            )
+
+    @classmethod
+    def get_keys_parameters(cls, keys: list) -> tuple[list, ...]:
+        # Keys are bound as one array per primary key column
+        primary_key_columns = cls.get_primary_key_columns()
+        if len(primary_key_columns) == 1:
+            return (list(keys),)
+        for key in keys:
+            if not isinstance(key, tuple) \
+                    or len(key) != len(primary_key_columns):
+                raise ValueError(
+                    f"Composite key {key} does not match primary key columns "
+                    f"{primary_key_columns} of {cls.table_name}."
+                )
+        return tuple(list(column_values) for column_values in zip(*keys))
+
+    @classmethod
+    def get_many(
+            cls,
+            keys: list,
+            identity_map: dict | None = None,
+            chunk_size: int | None = None,
+            log_query: bool = False,
+    ) -> list[Row]:
+        # Keys are primary key values, or tuples of values for composite
+        #  primary keys. Rows are returned in the order of the input keys and
+        #  missing keys are skipped. An identity_map dict can be shared
+        #  between calls of a same job so that already loaded keys are not
+        #  fetched again
+        chunk_size = cls.key_chunk_size if chunk_size is None else chunk_size
+        # Remove duplicated keys while keeping the input order
+        unique_keys = list(dict.fromkeys(keys))
+        if identity_map is None:
+            rows_by_key = {}
+        else:
+            rows_by_key = identity_map
+        keys_to_fetch = [key for key in unique_keys if key not in rows_by_key]
+
+        if len(keys_to_fetch) > 0:
+            query = postgresql_functions.select_by_keys(
+                table_name=cls.table_name,
+                columns=cls.Row.columns(),
+                primary_key_columns=cls.get_primary_key_columns(),
+            )
+            if log_query:
+                LOG.info(f"SQL query: \n{query}")
+            timer = instrumentation.start_operation(
+                "postgresql", "get_many", cls.table_name
+            )
+            with timer:
+                connection = cls.get_connection()
+                timer.lap("connection_wait_ms")
+                with connection.cursor() as cursor:
+                    for index in range(0, len(keys_to_fetch), chunk_size):
+                        cursor.execute(
+                            query,
+                            cls.get_keys_parameters(
+                                keys_to_fetch[index:index + chunk_size]
+                            ),
+                        )
+                        timer.lap("server_ms")
+                        rows = cls.build_rows_from_result(cursor.fetchall())
+                        for row in rows:
+                            rows_by_key[cls.get_row_key(row)] = row
+                        timer.lap("decode_ms")
+                        timer.add_rows(len(rows))
+                connection.close()
+                timer.finish()
+
+        return [rows_by_key[key] for key in unique_keys if key in rows_by_key]
+
+    @classmethod
+    def delete_many(
+            cls,
+            keys: list,
+            identity_map: dict | None = None,
+            chunk_size: int | None = None,
+            log_query: bool = False,
+    ) -> int:
+        # All chunks are deleted in a single transaction. Returns the number
+        #  of deleted rows
+        chunk_size = cls.key_chunk_size if chunk_size is None else chunk_size
+        unique_keys = list(dict.fromkeys(keys))
+        deleted_rows = 0
+
+        if len(unique_keys) > 0:
+            query = postgresql_functions.delete_by_keys(
+                table_name=cls.table_name,
+                primary_key_columns=cls.get_primary_key_columns(),
+            )
+            if log_query:
+                LOG.info(f"SQL query: \n{query}")
+            timer = instrumentation.start_operation(
+                "postgresql", "delete_many", cls.table_name
+            )
+            with timer:
+                connection = cls.get_connection()
+                timer.lap("connection_wait_ms")
+                with connection.cursor() as cursor:
+                    for index in range(0, len(unique_keys), chunk_size):
+                        cursor.execute(
+                            query,
+                            cls.get_keys_parameters(
+                                unique_keys[index:index + chunk_size]
+                            ),
+                        )
+                        deleted_rows += cursor.rowcount
+                connection.commit()
+                connection.close()
+                timer.lap("server_ms")
+                timer.add_rows(deleted_rows)
+                timer.finish()
+
+        if identity_map is not None:
+            for key in unique_keys:
+                identity_map.pop(key, None)
+
+        return deleted_rows
+
     @classmethod
     def append_or_update_single_row(
             cls,
@@ -128,16 +435,21 @@ class AbstractTable:
             connection: psycopg2.extensions.connection = None,
             log_query: bool = False,
     ) -> None:
+        timer = instrumentation.start_operation(
+            "postgresql", "append_or_update_single_row", cls.table_name
+        )
         query = postgresql_functions.append_or_update(
             table_name=cls.table_name,
             # TODO: Likely that it would be better to send the row directly
             row_dicts=dataclasses.asdict(row),
             primary_key_column=cls.primary_key_column,
         )
+        timer.lap("encode_ms")
         if connection is None:
             cls.single_transaction_query(
                 query=query,
                 log_query=log_query,
+                timer=timer,
             )
         else:
             raise NotImplementedError
@@ -149,16 +461,21 @@ class AbstractTable:
             connection: psycopg2.extensions.connection = None,
             log_query: bool = False,
     ) -> None:
+        timer = instrumentation.start_operation(
+            "postgresql", "append_or_update_list_of_rows", cls.table_name
+        )
         query = postgresql_functions.append_or_update(
             table_name=cls.table_name,
             # TODO: Likely that it would be better to send the row directly
             row_dicts=[dataclasses.asdict(row) for row in rows],
             primary_key_column=cls.primary_key_column,
         )
+        timer.lap("encode_ms")
         if connection is None:
             cls.single_transaction_query(
                 query=query,
                 log_query=log_query,
+                timer=timer,
             )
         else:
             raise NotImplementedError
@@ -203,6 +520,11 @@ class AbstractTable:
             log_query: bool = False,
             connection: psycopg2.extensions.connection = None,
     ) -> None:
+        timer = instrumentation.start_operation(
+            "postgresql",
+            "insert_list_of_rows_if_does_not_exists",
+            cls.table_name,
+        )
         query = postgresql_functions.insert_list_of_rows_if_does_not_exists(
             table_name=cls.table_name,
             list_of_rows_dict=[
@@ -210,10 +532,12 @@ class AbstractTable:
             ],
             primary_key_column=cls.primary_key_column,
         )
+        timer.lap("encode_ms")
         if connection is None:
             cls.single_transaction_query(
                 query=query,
                 log_query=log_query,
+                timer=timer,
             )
         else:
             raise NotImplementedError
@@ -239,12 +563,14 @@ class AbstractTable:
             cls,
             log_query: bool = False,
             force_check_columns: bool = False,
-    ) -> list[Row]:
+            explain: bool = False,
+    ) -> list[Row] | QueryPlan:
         columns = "*" if force_check_columns \
             else cls.get_all_columns_as_string()
         return cls.fetch_data_transaction(
             query=f"SELECT {columns} FROM {cls.table_name};",
             log_query=log_query,
+            explain=explain,
         )
 
     @classmethod
@@ -253,7 +579,8 @@ class AbstractTable:
             sample_size: int = 10,
             log_query: bool = False,
             force_check_columns: bool = False,
-    ) -> list[Row]:
+            explain: bool = False,
+    ) -> list[Row] | QueryPlan:
         columns = "*" if force_check_columns \
             else cls.get_all_columns_as_string()
         query = (
@@ -264,6 +591,7 @@ class AbstractTable:
         return cls.fetch_data_transaction(
             query=query,
             log_query=log_query,
+            explain=explain,
         )
 
     @classmethod
@@ -272,7 +600,8 @@ class AbstractTable:
             filter_string: str,
             log_query: bool = False,
             force_check_columns: bool = False,
-    ) -> list[Row]:
+            explain: bool = False,
+    ) -> list[Row] | QueryPlan:
         columns = "*" if force_check_columns \
             else cls.get_all_columns_as_string()
         query = (
@@ -282,6 +611,7 @@ class AbstractTable:
         return cls.fetch_data_transaction(
             query=query,
             log_query=log_query,
+            explain=explain,
         )
 
     @classmethod
@@ -293,7 +623,8 @@ class AbstractTable:
             offset: int | None = None,
             log_query: bool = False,
             force_check_columns: bool = False,
-    ) -> list[Row]:
+            explain: bool = False,
+    ) -> list[Row] | QueryPlan:
         columns = "*" if force_check_columns \
             else cls.get_all_columns_as_string()
         order_command = (
@@ -316,8 +647,253 @@ class AbstractTable:
         return cls.fetch_data_transaction(
             query=query,
             log_query=log_query,
+            explain=explain,
+        )
+
+    @classmethod
+    def check_columns(cls, columns: list[str]) -> None:
+        unknown_columns = [
+            column for column in columns if column not in cls.Row.columns()
+        ]
+        if len(unknown_columns) > 0:
+            raise KeyError(
+                f"Columns {unknown_columns} are not columns of "
+                f"{cls.table_name}. Features in Python: {cls.Row.columns()}."
+            )
+
+    @classmethod
+    def get_column_type(cls, column: str) -> typing.Any:
+        if cls.Row not in _COLUMN_TYPES:
+            try:
+                _COLUMN_TYPES[cls.Row] = typing.get_type_hints(cls.Row)
+            except NameError:
+                # Annotations which can't be resolved are left untyped
+                _COLUMN_TYPES[cls.Row] = {}
+        return _COLUMN_TYPES[cls.Row].get(column)
+
+    @classmethod
+    def cast_aggregation_result(
+            cls,
+            function: str,
+            column: str,
+            value: typing.Any,
+    ) -> typing.Any:
+        # sum and avg of integer columns are returned as numeric by PostgreSQL
+        if not isinstance(value, decimal.Decimal):
+            return value
+        if function == "avg":
+            return float(value)
+        column_type = cls.get_column_type(column)
+        if column_type in (int, float):
+            return column_type(value)
+        else:
+            return value
+
+    @classmethod
+    def get_partial_row_class(cls, columns: list[str]) -> type:
+        key = (cls, tuple(columns))
+        if key not in _PARTIAL_ROW_CLASSES:
+            fields_by_name = {
+                field.name: field for field in dataclasses.fields(cls.Row)
+            }
+            _PARTIAL_ROW_CLASSES[key] = dataclasses.make_dataclass(
+                f"Partial{cls.Row.__name__}",
+                [(column, fields_by_name[column].type) for column in columns],
+                bases=(AbstractTable.Row,),
+            )
+        return _PARTIAL_ROW_CLASSES[key]
+
+    @classmethod
+    def load_columns(
+            cls,
+            columns: list[str],
+            filter_string: str | None = None,
+            order_columns: list[str] | None = None,
+            limit: int | None = None,
+            log_query: bool = False,
+    ) -> list[Row]:
+        # Only the given columns are transferred. Rows are built with a
+        #  dataclass holding only these columns
+        cls.check_columns(columns)
+        partial_row_class = cls.get_partial_row_class(columns)
+        result = cls.single_transaction_query(
+            query=postgresql_functions.select_columns(
+                table_name=cls.table_name,
+                select_expressions=columns,
+                filter_string=filter_string,
+                order_columns=order_columns,
+                limit=limit,
+            ),
+            result_to_fetch=True,
+            log_query=log_query,
+        )
+        return [partial_row_class(*[
+            cls.paste_postgresql_object_to_python(element) for element in list_
+        ]) for list_ in result]
+
+    @classmethod
+    def aggregate_single_value(
+            cls,
+            function: str,
+            column: str,
+            filter_string: str | None = None,
+            log_query: bool = False,
+    ) -> typing.Any:
+        if column != "*":
+            cls.check_columns([column])
+        result = cls.single_transaction_query(
+            query=postgresql_functions.select_columns(
+                table_name=cls.table_name,
+                select_expressions=[
+                    postgresql_functions.get_aggregation(function, column)
+                ],
+                filter_string=filter_string,
+            ),
+            result_to_fetch=True,
+            log_query=log_query,
+        )
+        return cls.cast_aggregation_result(
+            function=function,
+            column=column,
+            value=result[0][0],
+        )
+
+    @classmethod
+    def count(
+            cls,
+            filter_string: str | None = None,
+            column: str = "*",
+            distinct: bool = False,
+            log_query: bool = False,
+    ) -> int:
+        return cls.aggregate_single_value(
+            function="count_distinct" if distinct else "count",
+            column=column,
+            filter_string=filter_string,
+            log_query=log_query,
+        )
+
+    @classmethod
+    def sum(
+            cls,
+            column: str,
+            filter_string: str | None = None,
+            log_query: bool = False,
+    ) -> typing.Any:
+        return cls.aggregate_single_value(
+            function="sum",
+            column=column,
+            filter_string=filter_string,
+            log_query=log_query,
+        )
+
+    @classmethod
+    def min(
+            cls,
+            column: str,
+            filter_string: str | None = None,
+            log_query: bool = False,
+    ) -> typing.Any:
+        return cls.aggregate_single_value(
+            function="min",
+            column=column,
+            filter_string=filter_string,
+            log_query=log_query,
         )
 
+    @classmethod
+    def max(
+            cls,
+            column: str,
+            filter_string: str | None = None,
+            log_query: bool = False,
+    ) -> typing.Any:
+        return cls.aggregate_single_value(
+            function="max",
+            column=column,
+            filter_string=filter_string,
+            log_query=log_query,
+        )
+
+    @classmethod
+    def distinct(
+            cls,
+            columns: str | list[str],
+            filter_string: str | None = None,
+            order_columns: list[str] | None = None,
+            log_query: bool = False,
+    ) -> list:
+        # Returns values for a single column and tuples for several columns
+        single_column = isinstance(columns, str)
+        columns = [columns] if single_column else columns
+        cls.check_columns(columns)
+        result = cls.single_transaction_query(
+            query=postgresql_functions.select_columns(
+                table_name=cls.table_name,
+                select_expressions=columns,
+                filter_string=filter_string,
+                order_columns=order_columns,
+                distinct=True,
+            ),
+            result_to_fetch=True,
+            log_query=log_query,
+        )
+        values = [tuple(
+            cls.paste_postgresql_object_to_python(element) for element in list_
+        ) for list_ in result]
+        if single_column:
+            return [value[0] for value in values]
+        else:
+            return values
+
+    @classmethod
+    def group_by(
+            cls,
+            group_columns: list[str],
+            aggregations: dict[str, tuple[str, str]],
+            filter_string: str | None = None,
+            order_columns: list[str] | None = None,
+            log_query: bool = False,
+    ) -> list[dict]:
+        # aggregations maps the result names to (function, column), e.g.
+        #  {"total_amount": ("sum", "amount"), "rows": ("count", "*")}
+        cls.check_columns(group_columns + [
+            column for _, column in aggregations.values() if column != "*"
+        ])
+        for name in aggregations.keys():
+            if not name.isidentifier():
+                raise ValueError(f"Invalid aggregation name: {name}")
+        result = cls.single_transaction_query(
+            query=postgresql_functions.select_columns(
+                table_name=cls.table_name,
+                select_expressions=group_columns + [
+                    f"{postgresql_functions.get_aggregation(*aggregation)} "
+                    f"AS {name}"
+                    for name, aggregation in aggregations.items()
+                ],
+                filter_string=filter_string,
+                group_columns=group_columns,
+                order_columns=order_columns,
+            ),
+            result_to_fetch=True,
+            log_query=log_query,
+        )
+        names = group_columns + list(aggregations.keys())
+        functions_and_columns = [(None, column) for column in group_columns] \
+            + list(aggregations.values())
+        return [
+            {
+                name: cls.cast_aggregation_result(
+                    function=function,
+                    column=column,
+                    value=cls.paste_postgresql_object_to_python(value),
+                )
+                for name, (function, column), value
+                in zip(names, functions_and_columns, list_)
+            }
+            for list_ in result
+        ]
+
     @classmethod
     def get_table_columns(
             cls,
@@ -1,9 +1,14 @@
+import datetime
+import io
 import logging
 import psycopg2.errors
 import psycopg2.extensions
 import typing
 
+from pysyphon import instrumentation
+from pysyphon.postgresql import partitioning
 from pysyphon.postgresql import postgresql_functions
+from pysyphon.postgresql import postgresql_types
 
 LOG = logging.getLogger(__name__)
 
@@ -18,6 +23,9 @@ class DynamicTable:
             database_name: str = None,
             port: int = 5432,
             primary_key_columns: str | list[str] | None = None,
+            partition_column: str | None = None,
+            partition_method: str = "range",
+            partition_interval: str | int | None = None,
     ):
         self.table_name = table_name
         self.host = host
@@ -26,26 +34,264 @@ class DynamicTable:
         self.database_name = database_name
         self.port = port
         self.primary_key_columns = primary_key_columns
+        # Declarative partitioning, by "range" or "list" of partition_column.
+        #  Range partitions cover a partition_interval ("day", "week",
+        #  "month", "year" or an int step for numeric columns) and are created
+        #  automatically before rows are written in them, as are list
+        #  partitions (one per value)
+        self.partition_column = partition_column
+        self.partition_method = partition_method
+        self.partition_interval = partition_interval
+        if partition_method not in ("range", "list"):
+            raise ValueError(
+                f"Unknown partition method {partition_method}. Use 'range' or "
+                f"'list'."
+            )
+        # Names of the partitions known to exist, loaded on first write
+        self.known_partitions: set[str] | None = None
+
+    def get_primary_key_columns(self) -> list[str]:
+        if self.primary_key_columns is None:
+            return []
+        elif isinstance(self.primary_key_columns, str):
+            return [self.primary_key_columns]
+        else:
+            return list(self.primary_key_columns)
+
+    def is_auto_partitioned(self) -> bool:
+        return self.partition_column is not None and (
+            self.partition_method == "list"
+            or self.partition_interval is not None
+        )
 
     def append_or_update_list_of_rows(
             self,
             rows_as_dict: list[dict],
             connection: psycopg2.extensions.connection = None,
             log_query: bool = False,
+            add_missing_columns: bool = False,
     ) -> None:
-        # TODO: add check on columns?
-        query = postgresql_functions.append_or_update(
-            table_name=self.table_name,
-            row_dicts=rows_as_dict,
-            primary_key_column=self.primary_key_columns,
-        )
-        if connection is None:
+        if connection is not None:
+            raise NotImplementedError
+        if len(rows_as_dict) == 0:
+            return
+        # The query is built from the keys of the first row, rows with the
+        #  same columns in another order are reordered to match them
+        columns = list(rows_as_dict[0].keys())
+        column_set = set(columns)
+        ordered_rows = []
+        for row_dict in rows_as_dict:
+            if row_dict.keys() != column_set:
+                raise KeyError(
+                    f"All rows written in {self.table_name} must have the "
+                    f"same columns. Expected {columns}, got "
+                    f"{list(row_dict.keys())}."
+                )
+            if list(row_dict.keys()) != columns:
+                row_dict = {column: row_dict[column] for column in columns}
+            ordered_rows.append(row_dict)
+        rows_as_dict = ordered_rows
+        if add_missing_columns:
+            self.add_missing_columns(rows_as_dict)
+
+        if self.is_auto_partitioned():
+            # Rows are written directly in their partition, which is created
+            #  first if needed
+            rows_by_partition = self.group_rows_by_partition(rows_as_dict)
+        else:
+            rows_by_partition = {self.table_name: rows_as_dict}
+
+        for table_name, rows in rows_by_partition.items():
+            timer = instrumentation.start_operation(
+                "postgresql", "append_or_update_list_of_rows", table_name
+            )
+            query = postgresql_functions.append_or_update(
+                table_name=table_name,
+                row_dicts=rows,
+                primary_key_column=self.get_primary_key_columns(),
+            )
+            timer.lap("encode_ms")
             self.single_transaction_query(
                 query=query,
                 log_query=log_query,
+                timer=timer,
+            )
+
+    def group_rows_by_partition(
+            self,
+            rows_as_dict: list[dict],
+    ) -> dict[str, list[dict]]:
+        rows_by_partition = {}
+        for row_dict in rows_as_dict:
+            if row_dict.get(self.partition_column) is None:
+                raise KeyError(
+                    f"Rows written in {self.table_name} need a value for the "
+                    f"partition column {self.partition_column}. Row: "
+                    f"{row_dict}"
+                )
+            partition_name = self.ensure_partition(
+                row_dict[self.partition_column]
+            )
+            rows_by_partition.setdefault(partition_name, []).append(row_dict)
+        return rows_by_partition
+
+    def ensure_partition(self, value: typing.Any) -> str:
+        # Returns the name of the partition holding value, creating it if it
+        #  is not known to exist
+        if self.partition_method == "range":
+            start, end = partitioning.get_range_bounds(
+                value=value,
+                interval=self.partition_interval,
+            )
+            partition_name = partitioning.get_range_partition_name(
+                table_name=self.table_name,
+                start=start,
+                interval=self.partition_interval,
             )
         else:
-            raise NotImplementedError
+            partition_name = partitioning.get_list_partition_name(
+                table_name=self.table_name,
+                value=value,
+            )
+
+        if self.known_partitions is None:
+            self.known_partitions = {
+                name for name, _ in self.list_partitions()
+            }
+        if partition_name.split(".")[-1] not in self.known_partitions:
+            if self.partition_method == "range":
+                query = postgresql_functions.create_range_partition(
+                    table_name=self.table_name,
+                    partition_name=partition_name,
+                    start=start,
+                    end=end,
+                )
+            else:
+                query = postgresql_functions.create_list_partition(
+                    table_name=self.table_name,
+                    partition_name=partition_name,
+                    values=[value],
+                )
+            self.single_transaction_query(query=query)
+            self.known_partitions.add(partition_name.split(".")[-1])
+
+        return partition_name
+
+    def create_upcoming_partitions(
+            self,
+            number_of_partitions: int = 1,
+            from_value: typing.Any = None,
+    ) -> list[str]:
+        # Creates the range partition holding from_value (now by default) and
+        #  the following ones so that writes never wait on a partition creation
+        if self.partition_method != "range" or self.partition_interval is None:
+            raise ValueError(
+                "Upcoming partitions can only be created for range "
+                "partitioned tables with a partition_interval"
+            )
+        if from_value is None:
+            from_value = datetime.datetime.now()
+        partition_names = []
+        value = from_value
+        for _ in range(number_of_partitions):
+            partition_names.append(self.ensure_partition(value))
+            _, value = partitioning.get_range_bounds(
+                value=value,
+                interval=self.partition_interval,
+            )
+        return partition_names
+
+    def list_partitions(self) -> list[tuple[str, str]]:
+        # Returns the partitions names with their bound expressions
+        schema, _, table_name = self.table_name.rpartition(".")
+        schema_filter = (
+            f"AND parent_namespace.nspname = '{schema}' " if schema else ""
+        )
+        return self.single_transaction_query(
+            query=(
+                f"SELECT child.relname, "
+                f"  pg_get_expr(child.relpartbound, child.oid) "
+                f"FROM pg_inherits "
+                f"JOIN pg_class AS parent "
+                f"  ON parent.oid = pg_inherits.inhparent "
+                f"JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid "
+                f"JOIN pg_namespace AS parent_namespace "
+                f"  ON parent_namespace.oid = parent.relnamespace "
+                f"WHERE parent.relname = '{table_name}' "
+                f"{schema_filter}"
+                f"ORDER BY child.relname; "
+            ),
+            result_to_fetch=True,
+        )
+
+    def drop_expired_partitions(
+            self,
+            older_than: typing.Any,
+            detach_only: bool = False,
+    ) -> list[str]:
+        # Drops (or only detaches) the range partitions whose upper bound is
+        #  lower or equal to older_than. Returns the partitions names
+        schema = self.table_name.rpartition(".")[0]
+        expired_partitions = []
+        for partition_name, partition_bound in self.list_partitions():
+            upper_bound = partitioning.parse_range_upper_bound(
+                partition_bound=partition_bound,
+                value_type=type(older_than),
+            )
+            if upper_bound is None:
+                continue
+            upper_bound, older_than_bound = \
+                partitioning.normalize_time_zones(upper_bound, older_than)
+            if upper_bound > older_than_bound:
+                continue
+            qualified_name = (
+                f"{schema}.{partition_name}" if schema else partition_name
+            )
+            self.single_transaction_query(
+                query=postgresql_functions.detach_partition(
+                    table_name=self.table_name,
+                    partition_name=qualified_name,
+                )
+            )
+            if not detach_only:
+                self.single_transaction_query(
+                    query=f"DROP TABLE IF EXISTS {qualified_name};"
+                )
+            if self.known_partitions is not None:
+                self.known_partitions.discard(partition_name)
+            expired_partitions.append(partition_name)
+        return expired_partitions
+
+    def load_partition_range(
+            self,
+            start: typing.Any,
+            end: typing.Any,
+            columns: list[str] | None = None,
+            filter_string: str | None = None,
+            log_query: bool = False,
+    ) -> list[dict]:
+        # Filtering on the partition column lets PostgreSQL prune the
+        #  partitions outside [start, end)
+        if self.partition_column is None:
+            raise ValueError(f"{self.table_name} has no partition column")
+        partition_filter = " AND ".join([
+            postgresql_functions.get_filter(
+                (self.partition_column, ">=", start)
+            ),
+            postgresql_functions.get_filter((self.partition_column, "<", end)),
+        ] + ([] if filter_string is None else [f"({filter_string})"]))
+        result, description = self.single_transaction_query(
+            query=postgresql_functions.select_columns(
+                table_name=self.table_name,
+                select_expressions=["*"] if columns is None else columns,
+                filter_string=partition_filter,
+            ),
+            result_to_fetch=True,
+            log_query=log_query,
+            return_description=True,
+        )
+        column_names = [column.name for column in description]
+        return [dict(zip(column_names, list_)) for list_ in result]
 
     def single_transaction_query(
             self,
@@ -53,31 +299,44 @@ class DynamicTable:
             result_to_fetch: bool = False,
             log_query: bool = False,
             return_description: bool = False,
+            timer: instrumentation.OperationTimer | None = None,
     ) -> typing.Any:
-        connection = postgresql_functions.get_connection(
-            host=self.host,
-            user=self.user,
-            password=self.password,
-            database=self.database_name,
-            port=self.port,
-        )
-        if log_query:
-            LOG.info(f"SQL query: \n{query}")
-        with connection.cursor() as cursor:
-            try:
-                cursor.execute(query)
-                description = cursor.description
-            except psycopg2.errors.NumericValueOutOfRange as exception:
-                print(
-                    f"Error: {exception} for: {query}"
-                )
-                raise exception
-            connection.commit()
-            if result_to_fetch:
-                result = cursor.fetchall()
-            else:
-                result = None
-        connection.close()
+        if timer is None:
+            timer = instrumentation.start_operation(
+                "postgresql", "execute", self.table_name
+            )
+        with timer:
+            connection = postgresql_functions.get_connection(
+                host=self.host,
+                user=self.user,
+                password=self.password,
+                database=self.database_name,
+                port=self.port,
+            )
+            timer.lap("connection_wait_ms")
+            if log_query:
+                LOG.info(f"SQL query: \n{query}")
+            with connection.cursor() as cursor:
+                try:
+                    cursor.execute(query)
+                    description = cursor.description
+                except psycopg2.errors.NumericValueOutOfRange as exception:
+                    print(
+                        f"Error: {exception} for: {query}"
+                    )
+                    raise exception
+                connection.commit()
+                timer.lap("server_ms")
+                if result_to_fetch:
+                    result = cursor.fetchall()
+                    timer.lap("decode_ms")
+                    timer.add_rows(len(result))
+                else:
+                    result = None
+                    timer.add_rows(max(cursor.rowcount, 0))
+                timer.add_query(query)
+            connection.close()
+            timer.finish()
 
         if return_description:
             return result, description
@@ -99,21 +358,161 @@ class DynamicTable:
     def create_table_from_dict(
             self,
             columns_dict: dict[str, str],
+            unlogged: bool = False,
     ) -> None:
+        # Unlogged tables are not written to the WAL, which makes loads much
+        #  faster, but they are emptied after a crash. Use for staging only
+        if unlogged and self.partition_column is not None:
+            raise ValueError("Partitioned tables can't be unlogged")
+        primary_key_columns = self.get_primary_key_columns()
+        column_lines = [
+            f"  {column_name} {column_type}"
+            for column_name, column_type in columns_dict.items()
+        ]
+        if len(primary_key_columns) > 0:
+            column_lines.append(
+                f"  PRIMARY KEY ({', '.join(primary_key_columns)}) "
+            )
+
+        if self.partition_column is None:
+            partition_line = ""
+        else:
+            # Unique constraints of partitioned tables must include the
+            #  partition column
+            if len(primary_key_columns) > 0 \
+                    and self.partition_column not in primary_key_columns:
+                raise ValueError(
+                    f"Partition column {self.partition_column} must be part "
+                    f"of the primary key of {self.table_name}"
+                )
+            partition_line = (
+                f" PARTITION BY {self.partition_method.upper()} "
+                f"({self.partition_column})"
+            )
+
         self.single_transaction_query(
             query=(
-                f"CREATE TABLE {self.table_name} (" +
-                ", \n".join(
-                    [
-                        f"  {column_name} {column_type}"
-                        for column_name, column_type in columns_dict.items()
-                    ]
-                ) + ", \n" +
-                f"  PRIMARY KEY ({", ".join(self.primary_key_columns)}) "
-                f");"
+                ("CREATE UNLOGGED TABLE " if unlogged else "CREATE TABLE ") +
+                f"{self.table_name} (\n" +
+                ", \n".join(column_lines) +
+                f"\n){partition_line};"
             ),
         )
 
+    def add_missing_columns(
+            self,
+            data: list[dict] | typing.Any,
+            sample_size: int = 1000,
+    ) -> dict[str, str]:
+        # Adds the columns of data (rows as dicts or a DataFrame) that the
+        #  table does not have yet, with inferred types. Returns them
+        existing_columns = set(self.get_column_names())
+        missing_columns = {
+            column: column_type
+            for column, column_type in postgresql_types.infer_columns_types(
+                data=data,
+                sample_size=sample_size,
+            ).items()
+            if column not in existing_columns
+        }
+        if len(missing_columns) > 0:
+            LOG.info(
+                f"Adding columns {missing_columns} to table {self.table_name}"
+            )
+            self.single_transaction_query(
+                query=postgresql_functions.add_columns(
+                    table_name=self.table_name,
+                    columns_dict=missing_columns,
+                )
+            )
+        return missing_columns
+
+    def copy_rows(
+            self,
+            data: list[dict] | typing.Any,
+            batch_size: int = 100000,
+            log_query: bool = False,
+    ) -> int:
+        # Bulk loads data (rows as dicts or a DataFrame) with COPY in a
+        #  single transaction. COPY does not handle conflicts, use
+        #  append_or_update_list_of_rows to update existing rows.
+        #  Columns missing in a row are loaded as null
+        rows_as_dict = postgresql_types.get_rows_as_dict(data)
+        if len(rows_as_dict) == 0:
+            return 0
+        if self.is_auto_partitioned():
+            # COPY in the parent table fails for rows without a partition,
+            #  so the partitions of all rows are created first
+            self.group_rows_by_partition(rows_as_dict)
+        # Keep the columns order of first appearance
+        columns = list(dict.fromkeys(
+            column for row_dict in rows_as_dict for column in row_dict.keys()
+        ))
+        query = postgresql_functions.copy_from_rows(
+            table_name=self.table_name,
+            columns=columns,
+        )
+        if log_query:
+            LOG.info(f"SQL query: \n{query}")
+
+        timer = instrumentation.start_operation(
+            "postgresql", "copy_rows", self.table_name
+        )
+        with timer:
+            connection = postgresql_functions.get_connection(
+                host=self.host,
+                user=self.user,
+                password=self.password,
+                database=self.database_name,
+                port=self.port,
+            )
+            timer.lap("connection_wait_ms")
+            with connection.cursor() as cursor:
+                for index in range(0, len(rows_as_dict), batch_size):
+                    buffer = io.StringIO()
+                    for row_dict in rows_as_dict[index:index + batch_size]:
+                        buffer.write("\t".join([
+                            postgresql_functions.value_to_copy_text(
+                                row_dict.get(column)
+                            )
+                            for column in columns
+                        ]) + "\n")
+                    if instrumentation.is_enabled():
+                        timer.add_query(buffer.getvalue())
+                    timer.lap("encode_ms")
+                    buffer.seek(0)
+                    cursor.copy_expert(query, buffer)
+                    timer.lap("server_ms")
+            connection.commit()
+            connection.close()
+            timer.lap("server_ms")
+            timer.add_rows(len(rows_as_dict))
+            timer.finish()
+
+        return len(rows_as_dict)
+
+    def create_and_load(
+            self,
+            data: list[dict] | typing.Any,
+            unlogged: bool = False,
+            sample_size: int = 1000,
+            log_query: bool = False,
+    ) -> int:
+        # Creates the table with types inferred from data (rows as dicts or a
+        #  DataFrame), or adds the missing columns if it already exists, then
+        #  loads data with COPY. Returns the number of loaded rows
+        if self.check_if_table_exists():
+            self.add_missing_columns(data=data, sample_size=sample_size)
+        else:
+            self.create_table_from_dict(
+                columns_dict=postgresql_types.infer_columns_types(
+                    data=data,
+                    sample_size=sample_size,
+                ),
+                unlogged=unlogged,
+            )
+        return self.copy_rows(data=data, log_query=log_query)
+
     def get_column_names(self) -> list[str]:
         columns = self.single_transaction_query(
             query=(
@@ -0,0 +1,117 @@
+import datetime
+import hashlib
+import re
+import typing
+
+from pysyphon.postgresql.table_index import MAX_IDENTIFIER_LENGTH
+
+RANGE_INTERVALS = ("day", "week", "month", "year")
+
+
+def get_range_bounds(
+        value: typing.Any,
+        interval: str | int,
+) -> tuple[typing.Any, typing.Any]:
+    # Returns the [start, end) bounds of the range partition holding value
+    if isinstance(interval, int):
+        start = (value // interval) * interval
+        return start, start + interval
+    if interval not in RANGE_INTERVALS:
+        raise ValueError(
+            f"Unknown partition interval {interval}. Use an int or one of "
+            f"{RANGE_INTERVALS}."
+        )
+    if isinstance(value, datetime.datetime):
+        # Aware values are cut in UTC days, so values of any offset land in
+        #  the same partitions and names. Naive values stay naive
+        if value.tzinfo is not None:
+            value = value.astimezone(datetime.timezone.utc)
+        day = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    elif isinstance(value, datetime.date):
+        day = value
+    else:
+        raise TypeError(
+            f"Partition interval {interval} needs a date or datetime value, "
+            f"got {value!r}"
+        )
+
+    if interval == "day":
+        start = day
+        end = start + datetime.timedelta(days=1)
+    elif interval == "week":
+        start = day - datetime.timedelta(days=day.weekday())
+        end = start + datetime.timedelta(days=7)
+    elif interval == "month":
+        start = day.replace(day=1)
+        end = start.replace(
+            year=start.year + start.month // 12,
+            month=start.month % 12 + 1,
+        )
+    else:
+        start = day.replace(month=1, day=1)
+        end = start.replace(year=start.year + 1)
+    return start, end
+
+
+def get_range_partition_name(
+        table_name: str,
+        start: typing.Any,
+        interval: str | int,
+) -> str:
+    if isinstance(interval, int):
+        suffix = str(start).replace("-", "m")
+    elif interval == "year":
+        suffix = start.strftime("%Y")
+    elif interval == "month":
+        suffix = start.strftime("%Y%m")
+    else:
+        suffix = start.strftime("%Y%m%d")
+    return f"{table_name}_p{suffix}"
+
+
+def get_list_partition_name(
+        table_name: str,
+        value: typing.Any,
+) -> str:
+    # The hash of the raw value keeps names of values that only differ by
+    #  replaced characters, or beyond the identifier length, distinct
+    schema, _, name = table_name.rpartition(".")
+    suffix = re.sub(r"[\W_]+", "_", str(value)).strip("_").lower()
+    value_hash = hashlib.sha1(str(value).encode()).hexdigest()[:8]
+    name = f"{name}_{suffix}"[:MAX_IDENTIFIER_LENGTH - len(value_hash) - 1]
+    name = f"{name.rstrip('_')}_{value_hash}"
+    return f"{schema}.{name}" if schema else name
+
+
+def parse_range_upper_bound(
+        partition_bound: str,
+        value_type: type,
+) -> typing.Any | None:
+    # partition_bound is the output of pg_get_expr(relpartbound), e.g.
+    #  FOR VALUES FROM ('2024-01-01') TO ('2024-02-01')
+    match = re.search(r"TO \((.+)\)$", partition_bound)
+    if match is None or match.group(1) == "MAXVALUE":
+        return None
+    upper_bound = match.group(1).strip("'")
+    if issubclass(value_type, datetime.datetime):
+        return datetime.datetime.fromisoformat(upper_bound)
+    elif issubclass(value_type, datetime.date):
+        # Bounds of timestamp columns have a time part
+        return datetime.datetime.fromisoformat(upper_bound).date()
+    else:
+        return value_type(upper_bound)
+
+
+def normalize_time_zones(
+        first: typing.Any,
+        second: typing.Any,
+) -> tuple[typing.Any, typing.Any]:
+    # Naive and aware datetimes can't be compared, naive ones are taken as
+    #  UTC when the other one is aware
+    if isinstance(first, datetime.datetime) \
+            and isinstance(second, datetime.datetime):
+        if first.tzinfo is None and second.tzinfo is not None:
+            first = first.replace(tzinfo=datetime.timezone.utc)
+        elif first.tzinfo is not None and second.tzinfo is None:
+            second = second.replace(tzinfo=datetime.timezone.utc)
+    return first, second
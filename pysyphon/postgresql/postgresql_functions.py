@@ -1,9 +1,15 @@
+from __future__ import annotations
+
 import datetime
-import pandas as pd
+import json
 import psycopg2.extensions
 import typing
 import warnings
 
+if typing.TYPE_CHECKING:
+    import pandas as pd
+
+from pysyphon import instrumentation
 from pysyphon.postgresql import postgresql_types
 
 
@@ -50,20 +56,34 @@ def load_query_result_as_dataframe(
         query: str,
         port: int = 5432,
 ) -> pd.DataFrame:
-    connection = get_connection(
-        host=host,
-        database=database,
-        user=user,
-        password=password,
-        port=port,
-    )
-    warnings.filterwarnings(
-        "ignore",
-        category=UserWarning,
-        message='.*pandas only supports SQLAlchemy connectable.*'
+    # read_sql decodes the rows while fetching them, so the decoding time is
+    #  included in the server time
+    # pandas is only imported by the DataFrame functions
+    import pandas as pd
+
+    timer = instrumentation.start_operation(
+        "postgresql", "load_query_result_as_dataframe", database
     )
-    sql_table = pd.read_sql(query, connection)
-    connection.close()
+    with timer:
+        connection = get_connection(
+            host=host,
+            database=database,
+            user=user,
+            password=password,
+            port=port,
+        )
+        timer.lap("connection_wait_ms")
+        warnings.filterwarnings(
+            "ignore",
+            category=UserWarning,
+            message='.*pandas only supports SQLAlchemy connectable.*'
+        )
+        sql_table = pd.read_sql(query, connection)
+        connection.close()
+        timer.lap("server_ms")
+        timer.add_rows(len(sql_table))
+        timer.add_query(query)
+        timer.finish()
     return sql_table
 
 
@@ -78,18 +98,28 @@ def load_function_result_as_dataframe(
 ) -> pd.DataFrame:
     # TODO: to improve to get python type and convert in arguments
     #  or even use custom objects like table row
-    connection = get_connection(
-        host=host,
-        database=database,
-        user=user,
-        password=password,
-        port=port,
-    )
-    sql_table = pd.read_sql(
-        f'SELECT * FROM {function_name}({function_input_args})',
-        connection
+    import pandas as pd
+
+    timer = instrumentation.start_operation(
+        "postgresql", "load_function_result_as_dataframe", function_name
     )
-    connection.close()
+    with timer:
+        connection = get_connection(
+            host=host,
+            database=database,
+            user=user,
+            password=password,
+            port=port,
+        )
+        timer.lap("connection_wait_ms")
+        sql_table = pd.read_sql(
+            f'SELECT * FROM {function_name}({function_input_args})',
+            connection
+        )
+        connection.close()
+        timer.lap("server_ms")
+        timer.add_rows(len(sql_table))
+        timer.finish()
     return sql_table
 
 
@@ -227,6 +257,64 @@ def update_given_columns(
     ])
 
 
+def select_by_keys(
+        table_name: str,
+        columns: list[str],
+        primary_key_columns: list[str],
+) -> str:
+    # Keys are bound as arrays (one per primary key column) so the query text
+    #  does not depend on the number of keys
+    columns_line = ", ".join([f"{table_name}.{column}" for column in columns])
+    if len(primary_key_columns) == 1:
+        return "\n".join([
+            f"SELECT {columns_line}",
+            f"FROM {table_name}",
+            f"WHERE {table_name}.{primary_key_columns[0]} = ANY(%s);",
+        ])
+    return "\n".join([
+        f"SELECT {columns_line}",
+        f"FROM {table_name}",
+        f"JOIN {get_unnest_keys(primary_key_columns)}",
+        f"ON {get_keys_join_condition(table_name, primary_key_columns)};",
+    ])
+
+
+def delete_by_keys(
+        table_name: str,
+        primary_key_columns: list[str],
+) -> str:
+    if len(primary_key_columns) == 1:
+        return "\n".join([
+            f"DELETE FROM {table_name}",
+            f"WHERE {primary_key_columns[0]} = ANY(%s);",
+        ])
+    return "\n".join([
+        f"DELETE FROM {table_name}",
+        f"USING {get_unnest_keys(primary_key_columns)}",
+        f"WHERE {get_keys_join_condition(table_name, primary_key_columns)};",
+    ])
+
+
+def get_unnest_keys(
+        primary_key_columns: list[str],
+) -> str:
+    placeholders = ", ".join(["%s"] * len(primary_key_columns))
+    return (
+        f"unnest({placeholders}) "
+        f"AS pysyphon_keys ({', '.join(primary_key_columns)})"
+    )
+
+
+def get_keys_join_condition(
+        table_name: str,
+        primary_key_columns: list[str],
+) -> str:
+    return " AND ".join([
+        f"{table_name}.{column} = pysyphon_keys.{column}"
+        for column in primary_key_columns
+    ])
+
+
 def select_with_filters(
         table_name: str,
         filter_list: list[tuple[str, str, typing.Any]],
@@ -250,6 +338,128 @@ def select_with_filters(
     return "\n".join(query_lines) + ";"
 
 
+AGGREGATION_FUNCTIONS = ("count", "count_distinct", "sum", "min", "max", "avg")
+
+
+def get_aggregation(
+        function: str,
+        column: str,
+) -> str:
+    if function not in AGGREGATION_FUNCTIONS:
+        raise ValueError(
+            f"Unknown aggregation function {function}. Use one of "
+            f"{AGGREGATION_FUNCTIONS}."
+        )
+    if column == "*" and function != "count":
+        raise ValueError(f"Aggregation {function} can't be used on *.")
+    if function == "count_distinct":
+        return f"count(DISTINCT {column})"
+    else:
+        return f"{function}({column})"
+
+
+def select_columns(
+        table_name: str,
+        select_expressions: list[str],
+        filter_string: str | None = None,
+        group_columns: list[str] | None = None,
+        order_columns: list[str] | None = None,
+        limit: int | None = None,
+        distinct: bool = False,
+) -> str:
+    query_lines = [
+        ("SELECT DISTINCT " if distinct else "SELECT ") +
+        ", ".join(select_expressions),
+        f"FROM {table_name}",
+    ]
+    if filter_string is not None:
+        query_lines.append(f"WHERE {filter_string}")
+    if group_columns is not None and len(group_columns) > 0:
+        query_lines.append("GROUP BY " + ", ".join(group_columns))
+    if order_columns is not None and len(order_columns) > 0:
+        query_lines.append("ORDER BY " + ", ".join(order_columns))
+    if limit is not None:
+        query_lines.append(f"LIMIT {limit}")
+
+    return "\n".join(query_lines) + ";"
+
+
+def create_index(
+        table_name: str,
+        index_name: str,
+        columns: list[str],
+        unique: bool = False,
+        method: str = "btree",
+        where: str | None = None,
+        concurrently: bool = True,
+) -> str:
+    query_lines = [
+        "CREATE " + ("UNIQUE " if unique else "") + "INDEX " +
+        ("CONCURRENTLY " if concurrently else "") +
+        f"IF NOT EXISTS {index_name}",
+        f"ON {table_name} USING {method} ({', '.join(columns)})",
+    ]
+    if where is not None:
+        query_lines.append(f"WHERE {where}")
+
+    return "\n".join(query_lines) + ";"
+
+
+def drop_index(
+        index_name: str,
+        concurrently: bool = True,
+) -> str:
+    return (
+        "DROP INDEX " + ("CONCURRENTLY " if concurrently else "") +
+        f"IF EXISTS {index_name};"
+    )
+
+
+def create_range_partition(
+        table_name: str,
+        partition_name: str,
+        start: typing.Any,
+        end: typing.Any,
+) -> str:
+    return "\n".join([
+        f"CREATE TABLE IF NOT EXISTS {partition_name}",
+        f"PARTITION OF {table_name}",
+        f"FOR VALUES FROM ({range_bound_to_sql(start)}) "
+        f"TO ({range_bound_to_sql(end)});",
+    ])
+
+
+def range_bound_to_sql(value: typing.Any) -> str:
+    # isoformat keeps the offset of aware datetimes, which past_value_to_sql
+    #  drops
+    if isinstance(value, datetime.datetime):
+        return f"'{value.isoformat()}'"
+    return past_value_to_sql(value)
+
+
+def create_list_partition(
+        table_name: str,
+        partition_name: str,
+        values: list,
+) -> str:
+    return "\n".join([
+        f"CREATE TABLE IF NOT EXISTS {partition_name}",
+        f"PARTITION OF {table_name}",
+        f"FOR VALUES IN ({', '.join(past_values_to_sql(values))});",
+    ])
+
+
+def detach_partition(
+        table_name: str,
+        partition_name: str,
+) -> str:
+    return f"ALTER TABLE {table_name} DETACH PARTITION {partition_name};"
+
+
+def explain_analyze(query: str) -> str:
+    return f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query.strip()}"
+
+
 def get_filter(
         filter_tuple: tuple[str, str, typing.Any],
 ) -> str:
@@ -267,7 +477,7 @@ def past_values_to_sql(values: list) -> list:
 
 
 def past_value_to_sql(value: typing.Any) -> str:
-    if isinstance(value, pd.Series):
+    if postgresql_types.is_pandas_instance(value, "Series"):
         print(
             f"Error, a row value was given a series. Verify you put in value of"
             f"a row in input and not series of a dataframe. "
@@ -283,17 +493,22 @@ def past_value_to_sql(value: typing.Any) -> str:
     # TODO: only works for list of string. Use IntArray or FloatArray or
     #  improve process for other types
     elif isinstance(value, list):
+        # An empty ARRAY[] has no type, the literal takes the column's one
+        if len(value) == 0:
+            return "'{}'"
         return (
                 f"ARRAY[" +
                 ", ".join([past_value_to_sql(list_val) for list_val in value]) +
                 "]"
         )
-    elif not pd.notnull(value):
+    elif postgresql_types.is_null(value):
         return "null"
     elif isinstance(value, str):
         return "'" + value.replace("'", "''") + "'"
     elif isinstance(value, datetime.datetime):
         return f"'{value.strftime('%Y-%m-%d %H:%M:%S.%f')}'"
+    elif isinstance(value, datetime.date):
+        return f"'{value.isoformat()}'"
     elif isinstance(value, bytes):
         return fix_psycopg2_string_representation(
             str(psycopg2.Binary(value))
@@ -314,3 +529,64 @@ def fix_psycopg2_string_representation(
         return string_representation.replace("\\\\", "\\")
     else:
         return string_representation
+
+
+def value_to_copy_text(value: typing.Any) -> str:
+    # Renders a value for COPY ... FROM STDIN in text format
+    if postgresql_types.is_null(value):
+        return "\\N"
+    elif isinstance(value, bool):
+        return "t" if value else "f"
+    elif isinstance(value, list):
+        return escape_copy_text(get_array_literal(value))
+    elif isinstance(value, dict):
+        return escape_copy_text(json.dumps(value, default=str))
+    elif isinstance(value, datetime.datetime):
+        return value.isoformat(sep=" ")
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        # Backslash of the bytea hex format is escaped for COPY
+        return "\\\\x" + bytes(value).hex()
+    else:
+        return escape_copy_text(str(value))
+
+
+def escape_copy_text(text: str) -> str:
+    return (
+        text.replace("\\", "\\\\")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+        .replace("\t", "\\t")
+    )
+
+
+def get_array_literal(values: list) -> str:
+    elements = []
+    for value in values:
+        if value is None:
+            elements.append("NULL")
+        elif isinstance(value, list):
+            elements.append(get_array_literal(value))
+        elif isinstance(value, str):
+            elements.append(
+                '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+            )
+        else:
+            elements.append(str(value))
+    return "{" + ",".join(elements) + "}"
+
+
+def copy_from_rows(
+        table_name: str,
+        columns: list[str],
+) -> str:
+    return f"COPY {table_name} ({', '.join(columns)}) FROM STDIN;"
+
+
+def add_columns(
+        table_name: str,
+        columns_dict: dict[str, str],
+) -> str:
+    return f"ALTER TABLE {table_name} " + ", ".join([
+        f"ADD COLUMN IF NOT EXISTS {column_name} {column_type}"
+        for column_name, column_type in columns_dict.items()
+    ]) + ";"
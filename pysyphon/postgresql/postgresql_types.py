@@ -1,10 +1,57 @@
-import pandas as pd
+from __future__ import annotations
+
+import datetime
+import decimal
+import sys
 import typing
+import uuid
+
+if typing.TYPE_CHECKING:
+    import pandas as pd
+
+# Types used when values of a column can't be represented by a single type
+FALLBACK_SQL_TYPE = "text"
+# Null scalars of pandas, recognized by type name so that pandas is not
+#  imported
+_PANDAS_NULL_TYPE_NAMES = ("NaTType", "NAType")
+# Exact types which can't be null, checked first as they are the most common
+#  values. Not subclasses: pandas.NaT is a datetime
+_NOT_NULL_TYPES = frozenset({
+    str, int, bool, list, dict, bytes, datetime.datetime, datetime.date,
+})
+
+
+def is_null(value: typing.Any) -> bool:
+    # Same as pandas.isnull for scalar values: None, NaN floats (numpy ones
+    #  included), NaT and pandas.NA
+    if value is None:
+        return True
+    value_type = type(value)
+    if value_type in _NOT_NULL_TYPES:
+        return False
+    elif isinstance(value, float):
+        return value != value
+    elif value_type is decimal.Decimal:
+        return value.is_nan()
+    elif type(value).__name__ in _PANDAS_NULL_TYPE_NAMES:
+        return True
+    elif hasattr(value, "dtype") and getattr(value, "ndim", None) == 0:
+        # numpy scalars, NaN and NaT are not equal to themselves
+        return bool(value != value)
+    return False
+
+
+def is_pandas_instance(value: typing.Any, class_name: str) -> bool:
+    # If pandas was never imported, value can't be one of its objects
+    pandas = sys.modules.get("pandas")
+    return pandas is not None and isinstance(
+        value, getattr(pandas, class_name)
+    )
 
 
 class IntArray(list):
     def __init__(self, list_):
-        if not isinstance(list_, typing.Iterable) and pd.isnull(list_):
+        if not isinstance(list_, typing.Iterable) and is_null(list_):
             super().__init__([])
         else:
             super().__init__(list_)
@@ -22,7 +69,7 @@ class IntArray(list):
 
 class FloatArray(list):
     def __init__(self, list_):
-        if not isinstance(list_, typing.Iterable) and pd.isnull(list_):
+        if not isinstance(list_, typing.Iterable) and is_null(list_):
             super().__init__([])
         else:
             super().__init__(list_)
@@ -40,7 +87,7 @@ class FloatArray(list):
 
 class VarcharArray(list):
     def __init__(self, list_):
-        if not isinstance(list_, typing.Iterable) and pd.isnull(list_):
+        if not isinstance(list_, typing.Iterable) and is_null(list_):
             super().__init__([])
         else:
             super().__init__(list_)
@@ -60,3 +107,131 @@ class VarcharArray(list):
     @staticmethod
     def empty_value() -> str:
         return "ARRAY[]::varchar[]"
+
+
+def get_value_sql_type(value: typing.Any) -> str | None:
+    # Returns None for null values, which don't give any type information
+    if value is None:
+        return None
+    # Typed arrays first as they are also lists
+    elif isinstance(value, IntArray):
+        return "integer[]"
+    elif isinstance(value, FloatArray):
+        return "real[]"
+    elif isinstance(value, VarcharArray):
+        return "varchar[]"
+    elif isinstance(value, list):
+        # Empty and all null lists don't give the type of their elements
+        element_type = merge_sql_types(
+            [get_value_sql_type(element) for element in value]
+        )
+        return None if element_type is None else element_type + "[]"
+    elif isinstance(value, dict):
+        return "jsonb"
+    elif isinstance(value, str):
+        return "text"
+    elif isinstance(value, bool):
+        return "boolean"
+    elif isinstance(value, int):
+        return "bigint"
+    elif isinstance(value, float):
+        return None if value != value else "double precision"
+    elif isinstance(value, decimal.Decimal):
+        return "numeric"
+    # datetime first as datetimes are also dates
+    elif isinstance(value, datetime.datetime):
+        return "timestamp" if value.tzinfo is None else "timestamptz"
+    elif isinstance(value, datetime.date):
+        return "date"
+    elif isinstance(value, datetime.time):
+        return "time"
+    elif isinstance(value, datetime.timedelta):
+        return "interval"
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        return "bytea"
+    elif isinstance(value, uuid.UUID):
+        return "uuid"
+    elif hasattr(value, "dtype"):
+        # numpy scalars
+        return None if is_null(value) else get_dtype_sql_type(value.dtype)
+    else:
+        return FALLBACK_SQL_TYPE
+
+
+def get_dtype_sql_type(dtype: typing.Any) -> str | None:
+    # Returns None for dtypes which need the values to be inspected
+    if is_pandas_instance(dtype, "DatetimeTZDtype"):
+        return "timestamptz"
+    return {
+        "b": "boolean",
+        "i": "bigint",
+        "u": "bigint",
+        "f": "double precision",
+        "M": "timestamp",
+        "m": "interval",
+    }.get(dtype.kind)
+
+
+def merge_sql_types(sql_types: list[str | None]) -> str | None:
+    distinct_types = {
+        sql_type for sql_type in sql_types if sql_type is not None
+    }
+    if len(distinct_types) == 0:
+        return None
+    elif len(distinct_types) == 1:
+        return distinct_types.pop()
+    elif all(sql_type.endswith("[]") for sql_type in distinct_types):
+        # Arrays are widened as their elements
+        return merge_sql_types(
+            [sql_type[:-2] for sql_type in distinct_types]
+        ) + "[]"
+    # Types that can be widened without loss
+    for widening_types, widened_type in [
+        ({"bigint", "double precision"}, "double precision"),
+        ({"bigint", "numeric"}, "numeric"),
+        ({"date", "timestamp"}, "timestamp"),
+        ({"timestamp", "timestamptz"}, "timestamptz"),
+    ]:
+        if distinct_types <= widening_types:
+            return widened_type
+    return FALLBACK_SQL_TYPE
+
+
+def is_dataframe(data: typing.Any) -> bool:
+    return is_pandas_instance(data, "DataFrame")
+
+
+def get_rows_as_dict(data: list[dict] | pd.DataFrame) -> list[dict]:
+    if is_dataframe(data):
+        return data.to_dict("records")
+    else:
+        return data
+
+
+def infer_columns_types(
+        data: list[dict] | pd.DataFrame,
+        sample_size: int = 1000,
+) -> dict[str, str]:
+    # Returns SQL types by column name, inferred from the first sample_size
+    #  rows. Columns with only null values are typed as text
+    columns_types = {}
+    if is_dataframe(data):
+        for column in data.columns:
+            sql_type = get_dtype_sql_type(data[column].dtype)
+            if sql_type is None:
+                sql_type = merge_sql_types([
+                    get_value_sql_type(value)
+                    for value in data[column].iloc[:sample_size]
+                ])
+            columns_types[column] = sql_type or FALLBACK_SQL_TYPE
+        return columns_types
+
+    types_by_column = {}
+    for row_dict in data[:sample_size]:
+        for column, value in row_dict.items():
+            types_by_column.setdefault(column, []).append(
+                get_value_sql_type(value)
+            )
+    for column, sql_types in types_by_column.items():
+        columns_types[column] = merge_sql_types(sql_types) or FALLBACK_SQL_TYPE
+    return columns_types
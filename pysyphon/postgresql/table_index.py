@@ -0,0 +1,26 @@
+import dataclasses
+import re
+
+# PostgreSQL truncates identifiers longer than 63 bytes
+MAX_IDENTIFIER_LENGTH = 63
+
+
+@dataclasses.dataclass
+class TableIndex:
+    # Columns can also be expressions, e.g. "lower(email)"
+    columns: list[str]
+    unique: bool = False
+    # Partial index predicate, e.g. "deleted_at IS NULL"
+    where: str | None = None
+    method: str = "btree"
+    name: str | None = None
+
+    def get_name(self, table_name: str) -> str:
+        if self.name is not None:
+            return self.name
+        # Schema is not part of index names
+        name = "_".join(
+            [table_name.split(".")[-1]] + self.columns +
+            ["key" if self.unique else "idx"]
+        )
+        return re.sub(r"[\W_]+", "_", name).strip("_")[:MAX_IDENTIFIER_LENGTH]
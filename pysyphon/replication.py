@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import dataclasses
+import datetime
+import logging
+import os
+import threading
+import time
+import typing
+
+import bson
+import bson.json_util
+
+LOG = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass
+class ReplicationMetrics:
+    read_documents_count: int = 0
+    skipped_documents_count: int = 0
+    written_rows_count: int = 0
+    batch_count: int = 0
+    started_at: float = dataclasses.field(default_factory=time.monotonic)
+    last_batch_seconds: float | None = None
+    last_id: typing.Any = None
+    rescanned_documents_count: int = 0
+
+    def get_throughput(self) -> float:
+        # Documents read per second since the start of the replication
+        elapsed_seconds = time.monotonic() - self.started_at
+        if elapsed_seconds == 0:
+            return 0.0
+        return self.read_documents_count / elapsed_seconds
+
+
+class MongoToPostgresReplication:
+    # Copies the documents of collection_class into table_class, in batches
+    #  of batch_size documents sorted by _id, so memory stays bounded.
+    #  mapping_function converts a Document into a Row, a list of Rows, or
+    #  None to skip it. Rows are upserted, and the last replicated _id is
+    #  saved to checkpoint_path after each batch, so a replication restarted
+    #  after a crash resumes from it (a batch may be written twice, which the
+    #  upsert makes harmless).
+    #  Only documents with a _id above the checkpoint are read: updates of
+    #  already replicated documents are not replicated again.
+    #  ObjectIds are generated by the clients, so a document can be inserted
+    #  after documents with a greater _id were replicated. When following,
+    #  the _ids of the safety_window_seconds before the checkpoint are read
+    #  again once caught up, and the documents missed are replicated (after
+    #  a restart, the documents of the window are written a second time).
+    #  A document inserted more than safety_window_seconds late is lost
+    def __init__(
+            self,
+            collection_class: typing.Any,
+            table_class: typing.Any,
+            mapping_function: typing.Callable[[typing.Any], typing.Any],
+            filter_dict: dict | None = None,
+            batch_size: int = 1000,
+            checkpoint_path: str | None = None,
+            safety_window_seconds: float = 60.0,
+    ):
+        self.collection_class = collection_class
+        self.table_class = table_class
+        self.mapping_function = mapping_function
+        self.filter_dict = filter_dict
+        self.batch_size = batch_size
+        self.checkpoint_path = checkpoint_path
+        self.safety_window_seconds = safety_window_seconds
+        # ObjectIds replicated within the safety window of the checkpoint
+        self.recent_ids = set()
+        self.metrics = ReplicationMetrics(last_id=self.load_checkpoint())
+        self.stop_event = threading.Event()
+
+    def load_checkpoint(self) -> typing.Any:
+        if self.checkpoint_path is None \
+                or not os.path.exists(self.checkpoint_path):
+            return None
+        with open(self.checkpoint_path) as checkpoint_file:
+            return bson.json_util.loads(checkpoint_file.read())["last_id"]
+
+    def save_checkpoint(self) -> None:
+        if self.checkpoint_path is None:
+            return
+        temporary_path = f"{self.checkpoint_path}.tmp"
+        with open(temporary_path, "w") as checkpoint_file:
+            checkpoint_file.write(
+                bson.json_util.dumps({"last_id": self.metrics.last_id})
+            )
+        os.replace(temporary_path, self.checkpoint_path)
+
+    def get_batch_filter(self) -> dict | None:
+        if self.metrics.last_id is None:
+            return self.filter_dict
+        return self.add_id_filter({"$gt": self.metrics.last_id})
+
+    def add_id_filter(self, id_filter: dict) -> dict:
+        if self.filter_dict is None:
+            return {"_id": id_filter}
+        return {"$and": [self.filter_dict, {"_id": id_filter}]}
+
+    def get_safety_window_start_id(self) -> bson.ObjectId | None:
+        if not isinstance(self.metrics.last_id, bson.ObjectId) \
+                or self.safety_window_seconds <= 0:
+            return None
+        return bson.ObjectId.from_datetime(
+            self.metrics.last_id.generation_time
+            - datetime.timedelta(seconds=self.safety_window_seconds)
+        )
+
+    def read_batch(self) -> list[dict]:
+        cursor = self.collection_class.get_cursor(
+            collection=self.collection_class.get_collection(),
+            filter_dict=self.get_batch_filter(),
+            sort=[("_id", 1)],
+            limit=self.batch_size,
+            batch_size=self.batch_size,
+        )
+        with cursor:
+            return list(cursor)
+
+    def map_documents(self, input_dicts: list[dict]) -> list:
+        # Rows are deduplicated by primary key, the last one is kept, as a
+        #  single upsert can't update the same row twice
+        rows_by_key = {}
+        for input_dict in input_dicts:
+            rows = self.mapping_function(
+                self.collection_class.load_document_from_dict(input_dict)
+            )
+            if rows is None:
+                self.metrics.skipped_documents_count += 1
+                continue
+            if not isinstance(rows, list):
+                rows = [rows]
+            for row in rows:
+                rows_by_key[self.table_class.get_row_key(row)] = row
+        return list(rows_by_key.values())
+
+    def write_documents(self, input_dicts: list[dict]) -> None:
+        rows = self.map_documents(input_dicts)
+        if len(rows) > 0:
+            self.table_class.append_or_update_list_of_rows(rows)
+        if self.safety_window_seconds > 0:
+            self.recent_ids.update(
+                input_dict["_id"] for input_dict in input_dicts
+                if isinstance(input_dict["_id"], bson.ObjectId)
+            )
+        self.metrics.read_documents_count += len(input_dicts)
+        self.metrics.written_rows_count += len(rows)
+
+    def replicate_batch(self) -> int:
+        # Returns the number of documents read, 0 once the collection is
+        #  fully replicated
+        start_time = time.monotonic()
+        input_dicts = self.read_batch()
+        if len(input_dicts) == 0:
+            return 0
+        self.write_documents(input_dicts)
+        self.metrics.last_id = input_dicts[-1]["_id"]
+        self.save_checkpoint()
+        window_start_id = self.get_safety_window_start_id()
+        if window_start_id is not None:
+            self.recent_ids = {
+                recent_id for recent_id in self.recent_ids
+                if recent_id >= window_start_id
+            }
+        self.metrics.batch_count += 1
+        self.metrics.last_batch_seconds = time.monotonic() - start_time
+        return len(input_dicts)
+
+    def rescan_safety_window(self) -> int:
+        # Replicates the documents of the safety window that were inserted
+        #  behind the checkpoint, returns their count
+        window_start_id = self.get_safety_window_start_id()
+        if window_start_id is None:
+            return 0
+        collection = self.collection_class.get_collection()
+        cursor = self.collection_class.get_cursor(
+            collection=collection,
+            filter_dict=self.add_id_filter(
+                {"$gte": window_start_id, "$lte": self.metrics.last_id}
+            ),
+            projection=["_id"],
+            batch_size=self.batch_size,
+        )
+        with cursor:
+            missed_ids = [
+                input_dict["_id"] for input_dict in cursor
+                if input_dict["_id"] not in self.recent_ids
+            ]
+        for index in range(0, len(missed_ids), self.batch_size):
+            cursor = self.collection_class.get_cursor(
+                collection=collection,
+                filter_dict={
+                    "_id": {"$in": missed_ids[index:index + self.batch_size]}
+                },
+                sort=[("_id", 1)],
+                batch_size=self.batch_size,
+            )
+            with cursor:
+                self.write_documents(list(cursor))
+        if len(missed_ids) > 0:
+            LOG.warning(
+                f"{len(missed_ids)} documents of "
+                f"{self.collection_class.collection_name} inserted behind "
+                f"the checkpoint replicated"
+            )
+        self.metrics.rescanned_documents_count += len(missed_ids)
+        return len(missed_ids)
+
+    def run(
+            self,
+            follow: bool = False,
+            poll_interval_seconds: float = 5.0,
+    ) -> ReplicationMetrics:
+        # Replicates until the collection is caught up. With follow, new
+        #  documents are then polled every poll_interval_seconds until stop
+        #  is called
+        self.stop_event.clear()
+        while not self.stop_event.is_set():
+            if self.replicate_batch() < self.batch_size:
+                if not follow:
+                    break
+                self.rescan_safety_window()
+                LOG.debug(
+                    f"{self.collection_class.collection_name} caught up in "
+                    f"{self.table_class.table_name}, "
+                    f"{self.metrics.get_throughput():.1f} documents/s"
+                )
+                self.stop_event.wait(poll_interval_seconds)
+        return self.metrics
+
+    def stop(self) -> None:
+        self.stop_event.set()
+
+    def get_lag_seconds(self) -> float | None:
+        # Age of the oldest document not replicated yet, 0 when caught up.
+        #  Only known for ObjectId _ids
+        oldest_pending_dict = \
+            self.collection_class.get_collection().find_one(
+                self.get_batch_filter() or {},
+                projection=["_id"],
+                sort=[("_id", 1)],
+            )
+        if oldest_pending_dict is None:
+            return 0.0
+        if not isinstance(oldest_pending_dict["_id"], bson.ObjectId):
+            return None
+        return max(0.0, (
+            datetime.datetime.now(datetime.timezone.utc)
+            - oldest_pending_dict["_id"].generation_time
+        ).total_seconds())
+
+    def get_remaining_count(self) -> int:
+        return self.collection_class.get_collection().count_documents(
+            self.get_batch_filter() or {}
+        )
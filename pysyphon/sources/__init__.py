@@ -0,0 +1,2 @@
+from pysyphon.sources.source import Source, SourceError
+from pysyphon.sources.rate_limiter import TokenBucket
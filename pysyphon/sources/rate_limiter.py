@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+
+class TokenBucket:
+    # Allows rate requests per second on average, with bursts of up to
+    #  capacity requests. Shared by the concurrent requests of a Source
+    def __init__(
+            self,
+            rate: float,
+            capacity: int | None = None,
+    ):
+        if rate <= 0:
+            raise ValueError(f"Rate must be positive, got {rate}.")
+        self.rate = rate
+        self.capacity = max(1, round(rate)) if capacity is None else capacity
+        self.tokens = float(self.capacity)
+        self.last_refill_time = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity,
+            self.tokens + (now - self.last_refill_time) * self.rate,
+        )
+        self.last_refill_time = now
+
+    async def acquire(self, tokens: int = 1) -> None:
+        # Requests wait in turn, so they are served in order
+        async with self.lock:
+            self.refill()
+            if self.tokens < tokens:
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+                self.refill()
+            self.tokens -= tokens
@@ -0,0 +1,343 @@
+from __future__ import annotations
+
+import asyncio
+import http.client
+import json
+import logging
+import os
+import random
+import typing
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from pysyphon import writers
+from pysyphon.sources.rate_limiter import TokenBucket
+
+LOG = logging.getLogger(__name__)
+
+PAGINATIONS = ("page", "cursor")
+
+
+class SourceError(Exception):
+    pass
+
+
+class Source:
+    # Extracts the records of a paginated JSON API. Subclasses set the class
+    #  variables, and override get_params, get_records or get_next_cursor for
+    #  APIs which don't follow the defaults.
+    #  With "page" pagination, max_concurrency pages are fetched at once and
+    #  the extraction stops at the first page with less than page_size
+    #  records. With "cursor" pagination, each page gives the cursor of the
+    #  next one, so pages are fetched one after the other.
+    #  If incremental_field is set, the highest value of this field is saved
+    #  to state_path once all the records are loaded, and sent as the
+    #  incremental_param of the next extraction
+    base_url: str = None
+    endpoint: str = None
+    pagination: str = "page"
+    page_size: int = 100
+    first_page: int = 1
+    records_key: str | None = "results"
+    next_cursor_key: str = "next_cursor"
+    incremental_field: str | None = None
+    incremental_param: str | None = None
+    max_concurrency: int = 4
+    requests_per_second: float = 10.0
+    max_retries: int = 5
+    backoff_seconds: float = 1.0
+    timeout_seconds: float = 30.0
+    retry_statuses: tuple[int, ...] = (429, 500, 502, 503, 504)
+
+    def __init_subclass__(cls):
+        # This is needed to enforce the children behaviours
+        if cls.base_url is None:
+            raise TypeError("Class variable 'base_url' must be set in subclass")
+        if cls.endpoint is None:
+            raise TypeError("Class variable 'endpoint' must be set in subclass")
+        if cls.pagination not in PAGINATIONS:
+            raise TypeError(
+                f"Class variable 'pagination' must be one of {PAGINATIONS}"
+            )
+        if (cls.incremental_field is None) != (cls.incremental_param is None):
+            raise TypeError(
+                "Class variables 'incremental_field' and 'incremental_param' "
+                "must be set together"
+            )
+
+    def __init__(
+            self,
+            headers: dict | None = None,
+            state_path: str | None = None,
+    ):
+        self.headers = {} if headers is None else headers
+        self.state_path = state_path
+        self.state = self.load_state()
+        self.next_incremental_value: typing.Any = None
+        self.rate_limiter: TokenBucket | None = None
+        self.rate_limiter_loop: asyncio.AbstractEventLoop | None = None
+
+    def load_state(self) -> dict:
+        if self.state_path is None or not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path) as state_file:
+            return json.load(state_file)
+
+    def save_state(self) -> None:
+        if self.state_path is None:
+            return
+        temporary_path = f"{self.state_path}.tmp"
+        with open(temporary_path, "w") as state_file:
+            json.dump(self.state, state_file, default=str)
+        os.replace(temporary_path, self.state_path)
+
+    def get_url(self) -> str:
+        return urllib.parse.urljoin(self.base_url, self.endpoint)
+
+    def get_params(
+            self,
+            page: int | None = None,
+            cursor: str | None = None,
+    ) -> dict:
+        if self.pagination == "page":
+            params = {"page": page, "per_page": self.page_size}
+        else:
+            params = {"limit": self.page_size}
+            if cursor is not None:
+                params["cursor"] = cursor
+        incremental_value = self.state.get("incremental_value")
+        if self.incremental_param is not None \
+                and incremental_value is not None:
+            params[self.incremental_param] = incremental_value
+        return params
+
+    def get_records(self, body: typing.Any) -> list[dict]:
+        # body is None for responses without content
+        if body is None:
+            return []
+        if self.records_key is None:
+            return body
+        return body.get(self.records_key) or []
+
+    def get_next_cursor(self, body: typing.Any) -> str | None:
+        if body is None:
+            return None
+        return body.get(self.next_cursor_key)
+
+    def send_request(
+            self,
+            params: dict,
+    ) -> tuple[int, bytes, dict]:
+        # Blocking, run in a thread by fetch
+        request = urllib.request.Request(
+            url=f"{self.get_url()}?{urllib.parse.urlencode(params)}",
+            headers={"Accept": "application/json", **self.headers},
+        )
+        try:
+            with urllib.request.urlopen(
+                request, timeout=self.timeout_seconds
+            ) as response:
+                return response.status, response.read(), dict(response.headers)
+        except urllib.error.HTTPError as exception:
+            return exception.code, exception.read(), dict(exception.headers)
+
+    def get_retry_delay(self, attempt: int, headers: dict) -> float:
+        retry_after = headers.get("Retry-After")
+        if retry_after is not None and retry_after.isdigit():
+            return float(retry_after)
+        # Exponential backoff with jitter, so retries don't hit the API at
+        #  the same time
+        return self.backoff_seconds * 2 ** attempt * random.uniform(0.5, 1.5)
+
+    def get_rate_limiter(self) -> TokenBucket:
+        # The lock of a bucket belongs to the event loop which used it, so
+        #  each extraction (asyncio.run) gets its own bucket, shared by its
+        #  concurrent requests
+        loop = asyncio.get_running_loop()
+        if self.rate_limiter is None or self.rate_limiter_loop is not loop:
+            self.rate_limiter = TokenBucket(rate=self.requests_per_second)
+            self.rate_limiter_loop = loop
+        return self.rate_limiter
+
+    def decode_body(self, content: bytes, params: dict) -> typing.Any:
+        # Responses without content (e.g. 204) have no records
+        if len(content.strip()) == 0:
+            return None
+        try:
+            return json.loads(content)
+        except ValueError as exception:
+            raise SourceError(
+                f"Request to {self.get_url()} with {params} returned invalid "
+                f"JSON: {content[:200]}"
+            ) from exception
+
+    async def fetch(self, params: dict) -> typing.Any:
+        rate_limiter = self.get_rate_limiter()
+        for attempt in range(self.max_retries + 1):
+            await rate_limiter.acquire()
+            try:
+                status, content, headers = await asyncio.to_thread(
+                    self.send_request, params
+                )
+            except (OSError, http.client.HTTPException) as exception:
+                # URLError, timeouts, reset connections and truncated
+                #  responses (IncompleteRead) are retried
+                if attempt == self.max_retries:
+                    raise SourceError(
+                        f"Request to {self.get_url()} failed: {exception}"
+                    ) from exception
+                status, content, headers = None, str(exception), {}
+            else:
+                if status < 400:
+                    return self.decode_body(content, params)
+                if status not in self.retry_statuses \
+                        or attempt == self.max_retries:
+                    raise SourceError(
+                        f"Request to {self.get_url()} with {params} failed "
+                        f"with status {status}: {content[:200]}"
+                    )
+            delay = self.get_retry_delay(attempt, headers)
+            LOG.warning(
+                f"Request to {self.get_url()} failed ({status}), retrying in "
+                f"{delay:.1f} s"
+            )
+            await asyncio.sleep(delay)
+
+    async def iterate_pages(self) -> typing.AsyncIterator[list[dict]]:
+        if self.pagination == "page":
+            page = self.first_page
+            while True:
+                bodies = await asyncio.gather(*[
+                    self.fetch(self.get_params(page=page + index))
+                    for index in range(self.max_concurrency)
+                ])
+                page += self.max_concurrency
+                for body in bodies:
+                    records = self.get_records(body)
+                    if len(records) > 0:
+                        yield records
+                    if len(records) < self.page_size:
+                        return
+        else:
+            cursor = None
+            while True:
+                body = await self.fetch(self.get_params(cursor=cursor))
+                records = self.get_records(body)
+                if len(records) > 0:
+                    yield records
+                cursor = self.get_next_cursor(body)
+                if cursor is None or len(records) == 0:
+                    return
+
+    async def iterate_records(self) -> typing.AsyncIterator[dict]:
+        async for records in self.iterate_pages():
+            for record in records:
+                yield record
+
+    def update_incremental_value(self, records: list[dict]) -> None:
+        if self.incremental_field is None:
+            return
+        for record in records:
+            value = record.get(self.incremental_field)
+            if value is not None and (
+                self.next_incremental_value is None
+                or value > self.next_incremental_value
+            ):
+                self.next_incremental_value = value
+
+    def commit_incremental_value(self) -> None:
+        # Only called once all the records are written, so an interrupted
+        #  extraction starts again from the previous value
+        if self.next_incremental_value is not None:
+            self.state["incremental_value"] = self.next_incremental_value
+            self.save_state()
+        self.next_incremental_value = None
+
+    async def async_load(
+            self,
+            write_function: typing.Callable[[list], typing.Any],
+            mapping_function: typing.Callable[[dict], typing.Any] | None,
+    ) -> int:
+        # Pages are written while the next ones are fetched
+        records_count = 0
+        # Write in progress, not awaited yet
+        write_task = None
+        try:
+            async for records in self.iterate_pages():
+                self.update_incremental_value(records)
+                if mapping_function is None:
+                    mapped_records = records
+                else:
+                    mapped_records = [
+                        mapped_record for mapped_record
+                        in map(mapping_function, records)
+                        if mapped_record is not None
+                    ]
+                if write_task is not None:
+                    previous_write_task, write_task = write_task, None
+                    await previous_write_task
+                write_task = asyncio.create_task(
+                    asyncio.to_thread(write_function, mapped_records)
+                )
+                records_count += len(records)
+            if write_task is not None:
+                last_write_task, write_task = write_task, None
+                await last_write_task
+        finally:
+            if write_task is not None:
+                # A page fetch or mapping failed during the write. Its thread
+                #  can't be cancelled, so it is waited for to not outlive the
+                #  load, and its own error is logged
+                await asyncio.wait([write_task])
+                if not write_task.cancelled() \
+                        and write_task.exception() is not None:
+                    LOG.error(
+                        f"Write of a page from {self.get_url()} failed: "
+                        f"{write_task.exception()!r}"
+                    )
+        self.commit_incremental_value()
+        return records_count
+
+    def extract(self) -> list[dict]:
+        records = []
+        records_count = asyncio.run(self.async_load(
+            write_function=records.extend,
+            mapping_function=None,
+        ))
+        LOG.info(f"{records_count} records extracted from {self.get_url()}")
+        return records
+
+    def load_into_table(
+            self,
+            table_class: typing.Any,
+            mapping_function: typing.Callable[[dict], typing.Any],
+    ) -> int:
+        # mapping_function returns a table_class.Row, or None to skip the
+        #  record. Each page is upserted with append_or_update_list_of_rows
+        return asyncio.run(self.async_load(
+            write_function=lambda rows: writers.write_rows(table_class, rows),
+            mapping_function=mapping_function,
+        ))
+
+    def load_into_collection(
+            self,
+            collection_class: typing.Any,
+            mapping_function: typing.Callable[[dict], typing.Any],
+            key_field: str | None = None,
+    ) -> int:
+        # mapping_function returns a collection_class.Document, or None to
+        #  skip the record. Documents are inserted, or upserted on key_field
+        #  if given, through a BulkWriter flushed after each page
+        with collection_class.get_bulk_writer(
+            max_delay_seconds=None
+        ) as bulk_writer:
+            return asyncio.run(self.async_load(
+                write_function=lambda documents: writers.write_documents(
+                    collection_class=collection_class,
+                    bulk_writer=bulk_writer,
+                    documents=documents,
+                    key_field=key_field,
+                ),
+                mapping_function=mapping_function,
+            ))
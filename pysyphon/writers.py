@@ -0,0 +1,30 @@
+import typing
+
+
+def write_rows(table_class: typing.Any, rows: list) -> None:
+    # Upserts rows of an AbstractTable. A single upsert can't update the
+    #  same row twice, the last one is kept
+    rows_by_key = {table_class.get_row_key(row): row for row in rows}
+    if len(rows_by_key) > 0:
+        table_class.append_or_update_list_of_rows(list(rows_by_key.values()))
+
+
+def write_documents(
+        collection_class: typing.Any,
+        bulk_writer: typing.Any,
+        documents: list,
+        key_field: str | None = None,
+) -> None:
+    # Inserts Documents of an AbstractCollection, or upserts them on
+    #  key_field if given, through bulk_writer which is flushed at the end
+    for document in documents:
+        if key_field is None:
+            bulk_writer.insert_one(document)
+        else:
+            document_dict = collection_class.cast_document_to_dict(document)
+            bulk_writer.set_attribute(
+                filter_dict={key_field: document_dict[key_field]},
+                set_dict=document_dict,
+                upsert=True,
+            )
+    bulk_writer.flush()
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import dataclasses
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+
+import pytest
+
+pymongo = pytest.importorskip("pymongo")
+import pymongo.errors  # noqa: E402
+
+from pysyphon.mongodb import AbstractCollection  # noqa: E402
+from pysyphon.mongodb.collection_cache import CollectionCache  # noqa: E402
+
+MONGODB_USER = "pysyphon"
+MONGODB_PASSWORD = "pysyphon"
+# Seconds to wait for the server or for a change to be applied
+TIMEOUT_SECONDS = 30
+
+
+def get_free_port() -> int:
+    with socket.socket() as listening_socket:
+        listening_socket.bind(("127.0.0.1", 0))
+        return listening_socket.getsockname()[1]
+
+
+@pytest.fixture(scope="module")
+def mongodb_port():
+    # Single-node replica set, needed by change streams
+    mongod = shutil.which("mongod")
+    if mongod is None:
+        pytest.skip("mongod is not installed")
+    port = get_free_port()
+    with tempfile.TemporaryDirectory() as data_directory:
+        process = subprocess.Popen(
+            [mongod, "--dbpath", data_directory, "--port", str(port),
+             "--bind_ip", "127.0.0.1", "--replSet", "rs0"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            client = pymongo.MongoClient(
+                host="127.0.0.1",
+                port=port,
+                directConnection=True,
+                serverSelectionTimeoutMS=TIMEOUT_SECONDS * 1000,
+            )
+            client.admin.command("replSetInitiate", {
+                "_id": "rs0",
+                "members": [{"_id": 0, "host": f"127.0.0.1:{port}"}],
+            })
+            deadline = time.monotonic() + TIMEOUT_SECONDS
+            while not client.admin.command("hello").get("isWritablePrimary"):
+                if time.monotonic() > deadline:
+                    raise TimeoutError("The replica set has no primary")
+                time.sleep(0.1)
+            # The collections connect with credentials
+            client.admin.command(
+                "createUser",
+                MONGODB_USER,
+                pwd=MONGODB_PASSWORD,
+                roles=["root"],
+            )
+            client.close()
+            yield port
+        finally:
+            process.terminate()
+            process.wait()
+
+
+@pytest.fixture
+def collection_class(mongodb_port):
+    class Items(AbstractCollection):
+        collection_name = "items"
+        host = "127.0.0.1"
+        port = mongodb_port
+        user = MONGODB_USER
+        password = MONGODB_PASSWORD
+        database_name = "test_collection_cache"
+
+        @dataclasses.dataclass
+        class Document(AbstractCollection.Document):
+            name: str
+            count: int
+
+    Items.get_collection().drop()
+    yield Items
+    Items.get_collection().drop()
+
+
+def sync_until(cache: CollectionCache, condition) -> None:
+    deadline = time.monotonic() + TIMEOUT_SECONDS
+    while not condition():
+        assert time.monotonic() < deadline, "Change not applied in time"
+        cache.sync_once()
+
+
+def test_initial_load(collection_class):
+    collection_class.get_collection().insert_many([
+        {"_id": index, "name": f"item {index}", "count": index}
+        for index in range(10)
+    ])
+
+    with CollectionCache(collection_class, max_await_time_ms=100) as cache:
+        assert len(cache) == 10
+        assert cache.get(3) == collection_class.Document(
+            name="item 3", count=3
+        )
+        assert 10 not in cache
+
+
+def test_apply_changes(collection_class):
+    collection = collection_class.get_collection()
+    collection.insert_one({"_id": 1, "name": "first", "count": 1})
+
+    with CollectionCache(collection_class, max_await_time_ms=100) as cache:
+        collection.insert_one({"_id": 2, "name": "second", "count": 2})
+        sync_until(cache, lambda: 2 in cache)
+        assert cache.get(2).name == "second"
+
+        collection.update_one({"_id": 1}, {"$inc": {"count": 10}})
+        sync_until(cache, lambda: cache.get(1).count == 11)
+
+        collection.replace_one({"_id": 2}, {"name": "replaced", "count": 0})
+        sync_until(cache, lambda: cache.get(2).name == "replaced")
+
+        collection.delete_one({"_id": 1})
+        sync_until(cache, lambda: 1 not in cache)
+        assert len(cache) == 1
+
+
+def test_resume_from_state(collection_class, tmp_path):
+    collection = collection_class.get_collection()
+    collection.insert_one({"_id": 1, "name": "first", "count": 1})
+    state_path = str(tmp_path / "items.bson")
+
+    with CollectionCache(
+        collection_class, state_path=state_path, max_await_time_ms=100
+    ) as cache:
+        assert len(cache) == 1
+    # Changes made while the cache is closed are read from the change stream
+    collection.insert_one({"_id": 2, "name": "second", "count": 2})
+    collection.delete_one({"_id": 1})
+
+    cache = CollectionCache(
+        collection_class, state_path=state_path, max_await_time_ms=100
+    )
+    cache.load_snapshot = lambda: pytest.fail("Collection loaded again")
+    cache.load()
+    assert cache.get(1) is not None
+    sync_until(cache, lambda: 1 not in cache and 2 in cache)
+    cache.close()
+
+
+def test_reload_when_history_is_lost(collection_class, tmp_path):
+    collection = collection_class.get_collection()
+    collection.insert_one({"_id": 1, "name": "first", "count": 1})
+    state_path = str(tmp_path / "items.bson")
+    with CollectionCache(collection_class, state_path=state_path):
+        pass
+    collection.insert_one({"_id": 2, "name": "second", "count": 2})
+
+    cache = CollectionCache(
+        collection_class, state_path=state_path, max_await_time_ms=100
+    )
+    open_stream = cache.open_stream
+
+    def open_expired_stream(resume_after=None):
+        # The resume token is no longer in the oplog
+        if resume_after is not None:
+            raise pymongo.errors.OperationFailure(
+                "Resume token not found", code=286
+            )
+        open_stream(resume_after=resume_after)
+
+    cache.open_stream = open_expired_stream
+    cache.load()
+    assert sorted(document_id for document_id, _ in cache.items()) == [1, 2]
+    cache.close()
@@ -0,0 +1,50 @@
+import pathlib
+import subprocess
+import sys
+
+import pytest
+
+REPOSITORY_ROOT = pathlib.Path(__file__).resolve().parents[1]
+# Modules which must not be imported by a statement, as they are only needed
+#  by some features. Same list as benchmarks/import_time.py
+HEAVY_MODULES = ("pandas", "numpy", "pymongo", "pydantic")
+IMPORT_STATEMENTS = [
+    "import pysyphon",
+    "import pysyphon.postgresql",
+    "from pysyphon.postgresql import AbstractTable",
+    "import pysyphon.mongodb",
+    "from pysyphon.mongodb import AbstractCollection",
+    "from pysyphon.sources import Source",
+    "import pysyphon.replication",
+    "import pysyphon.etl_pipeline",
+    "import pysyphon.instrumentation",
+    "import pysyphon.writers",
+]
+ALLOWED_MODULES = {
+    "from pysyphon.mongodb import AbstractCollection": {"pymongo"},
+}
+
+
+def get_imported_heavy_modules(statement: str) -> set[str]:
+    # Each statement runs in a new interpreter, where nothing is imported yet
+    process = subprocess.run(
+        [
+            sys.executable, "-c",
+            f"{statement}\nimport sys\n"
+            f"print(','.join(module for module in {HEAVY_MODULES!r} "
+            f"if module in sys.modules))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+        # -c imports from the working directory
+        cwd=REPOSITORY_ROOT,
+    )
+    return {module for module in process.stdout.strip().split(",") if module}
+
+
+@pytest.mark.parametrize("statement", IMPORT_STATEMENTS)
+def test_heavy_modules_imported_lazily(statement):
+    imported_modules = get_imported_heavy_modules(statement)
+
+    assert imported_modules <= ALLOWED_MODULES.get(statement, set())
@@ -0,0 +1,198 @@
+import asyncio
+import http.server
+import json
+import threading
+import time
+import urllib.parse
+
+import pytest
+
+from pysyphon.sources import Source, SourceError
+
+RECORDS = [{"id": index} for index in range(250)]
+
+
+class ApiHandler(http.server.BaseHTTPRequestHandler):
+    # Responses are chosen by the test through server.respond, called with
+    #  the query parameters
+    def do_GET(self):
+        params = dict(urllib.parse.parse_qsl(
+            urllib.parse.urlparse(self.path).query
+        ))
+        self.server.requests.append((time.monotonic(), params))
+        response = self.server.respond(params)
+        if response is None:
+            # Closes the connection without a response
+            self.close_connection = True
+            return
+        status, body, headers = response
+        content = b"" if body is None else json.dumps(body).encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def respond_with_pages(params):
+    page = int(params["page"])
+    per_page = int(params["per_page"])
+    start = (page - 1) * per_page
+    return 200, {"results": RECORDS[start:start + per_page]}, {}
+
+
+def respond_with_cursors(params):
+    start = int(params.get("cursor", 0))
+    limit = int(params["limit"])
+    end = start + limit
+    return 200, {
+        "results": RECORDS[start:end],
+        "next_cursor": str(end) if end < len(RECORDS) else None,
+    }, {}
+
+
+@pytest.fixture
+def server():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), ApiHandler)
+    server.requests = []
+    server.respond = respond_with_pages
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get_source_class(server, **class_variables):
+    return type("ApiSource", (Source,), {
+        "base_url": f"http://127.0.0.1:{server.server_address[1]}/",
+        "endpoint": "items",
+        "backoff_seconds": 0.01,
+        "requests_per_second": 1000.0,
+        **class_variables,
+    })
+
+
+def test_page_pagination(server):
+    source = get_source_class(server, page_size=100, max_concurrency=2)()
+
+    assert source.extract() == RECORDS
+    # Pages are fetched by max_concurrency until a page is not full
+    assert sorted(int(params["page"]) for _, params in server.requests) \
+        == [1, 2, 3, 4]
+
+
+def test_cursor_pagination(server):
+    server.respond = respond_with_cursors
+    source = get_source_class(server, pagination="cursor", page_size=100)()
+
+    assert source.extract() == RECORDS
+    assert [params.get("cursor") for _, params in server.requests] \
+        == [None, "100", "200"]
+
+
+def test_retry_on_status(server):
+    statuses = [503, 429]
+
+    def respond(params):
+        if len(statuses) > 0:
+            return statuses.pop(0), {"error": "busy"}, {"Retry-After": "0"}
+        return respond_with_pages(params)
+
+    server.respond = respond
+    source = get_source_class(server, page_size=100, max_concurrency=1)()
+
+    assert source.extract() == RECORDS
+    assert len(server.requests) == 5
+
+
+def test_retry_on_closed_connection(server):
+    closed_connections = [None]
+
+    def respond(params):
+        if len(closed_connections) > 0:
+            return closed_connections.pop()
+        return respond_with_pages(params)
+
+    server.respond = respond
+    source = get_source_class(server, page_size=100, max_concurrency=1)()
+
+    assert source.extract() == RECORDS
+
+
+def test_failure_after_max_retries(server):
+    server.respond = lambda params: (500, {"error": "down"}, {})
+    source = get_source_class(server, max_retries=2, max_concurrency=1)()
+
+    with pytest.raises(SourceError):
+        source.extract()
+    assert len(server.requests) == 3
+
+
+def test_no_retry_on_client_error(server):
+    server.respond = lambda params: (404, {"error": "not found"}, {})
+    source = get_source_class(server, max_concurrency=1)()
+
+    with pytest.raises(SourceError):
+        source.extract()
+    assert len(server.requests) == 1
+
+
+def test_empty_body(server):
+    server.respond = lambda params: (204, None, {})
+    source = get_source_class(server, max_concurrency=1)()
+
+    assert source.extract() == []
+
+
+def test_rate_limit(server):
+    server.respond = respond_with_cursors
+    # 25 pages with a burst of 20 requests, then 20 requests per second
+    source = get_source_class(
+        server,
+        pagination="cursor",
+        page_size=10,
+        requests_per_second=20.0,
+    )()
+
+    start = time.monotonic()
+    assert source.extract() == RECORDS
+    assert len(server.requests) == 25
+    assert time.monotonic() - start >= (25 - 20) / 20
+    # A new extraction runs in a new event loop
+    server.requests = []
+    assert source.extract() == RECORDS
+
+
+def test_write_awaited_on_fetch_failure(server):
+    responses = []
+
+    def respond(params):
+        # The second page fails while the first one is being written
+        if len(responses) > 0:
+            return 404, {"error": "not found"}, {}
+        responses.append(params)
+        return respond_with_cursors(params)
+
+    server.respond = respond
+    source = get_source_class(server, pagination="cursor", page_size=100)()
+    written_pages = []
+
+    def write_slowly(records):
+        time.sleep(0.2)
+        written_pages.append(records)
+
+    async def load():
+        with pytest.raises(SourceError):
+            await source.async_load(
+                write_function=write_slowly,
+                mapping_function=None,
+            )
+        # The write in progress is over when the error is raised
+        assert written_pages == [RECORDS[:100]]
+
+    asyncio.run(load())
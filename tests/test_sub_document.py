@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import pytest
+
+pydantic = pytest.importorskip("pydantic")
+pytest.importorskip("pymongo")
+
+from pysyphon.mongodb import PysyphonSubDocument  # noqa: E402
+
+
+class Address(PysyphonSubDocument):
+    street: str
+    city: str = "Paris"
+    zip_codes: list[int] = pydantic.Field(default_factory=list)
+
+
+class Person(PysyphonSubDocument):
+    name: str
+    address: Address | None = None
+    addresses: list[Address] = pydantic.Field(default_factory=list)
+
+
+class AliasedPerson(PysyphonSubDocument):
+    name: str = pydantic.Field(alias="fullName")
+    age: int | None = None
+
+
+class PrivatePerson(PysyphonSubDocument):
+    name: str
+    _visits: list[str] = pydantic.PrivateAttr(default_factory=list)
+
+
+def assert_same_sub_documents(constructed, validated):
+    # The trusted constructor sets the pydantic internals itself, they must
+    #  be the ones set by validation
+    assert type(constructed) is type(validated)
+    assert constructed == validated
+    assert constructed.model_fields_set == validated.model_fields_set
+    assert constructed.__pydantic_extra__ == validated.__pydantic_extra__
+    assert constructed.__pydantic_private__ \
+        == validated.__pydantic_private__
+    assert constructed.psd_to_dict() == validated.psd_to_dict()
+    assert constructed.model_dump_json() == validated.model_dump_json()
+
+
+@pytest.mark.parametrize("input_dict", [
+    {"street": "Rue de Rivoli", "city": "Lyon", "zip_codes": [69001]},
+    {"street": "Rue de Rivoli"},
+])
+def test_plain_round_trip(input_dict):
+    validated = Address.psd_from_dict(input_dict)
+
+    assert_same_sub_documents(Address.psd_construct(input_dict), validated)
+    assert_same_sub_documents(
+        Address.psd_construct(validated.psd_to_dict()),
+        Address.psd_from_dict(validated.psd_to_dict()),
+    )
+
+
+def test_aliased_round_trip():
+    validated = AliasedPerson.psd_from_dict({"fullName": "Ada", "age": 36})
+    dumped_dict = validated.model_dump(by_alias=True)
+
+    assert_same_sub_documents(
+        AliasedPerson.psd_construct(dumped_dict),
+        AliasedPerson.psd_from_dict(dumped_dict),
+    )
+
+
+def test_nested_round_trip():
+    dumped_dict = Person.psd_from_dict({
+        "name": "Ada",
+        "address": {"street": "Rue de Rivoli"},
+        "addresses": [
+            {"street": "Quai de Seine", "zip_codes": [75019]},
+            {"street": "Rue Oberkampf", "city": "Paris"},
+        ],
+    }).psd_to_dict()
+    validated = Person.psd_from_dict(dumped_dict)
+    constructed = Person.psd_construct(dumped_dict)
+
+    assert_same_sub_documents(constructed, validated)
+    assert_same_sub_documents(constructed.address, validated.address)
+    for constructed_address, validated_address in zip(
+            constructed.addresses, validated.addresses
+    ):
+        assert_same_sub_documents(constructed_address, validated_address)
+    assert_same_sub_documents(
+        Person.psd_construct({"name": "Ada"}),
+        Person.psd_from_dict({"name": "Ada"}),
+    )
+
+
+def test_private_attribute_round_trip():
+    validated = PrivatePerson.psd_from_dict({"name": "Ada"})
+    constructed = PrivatePerson.psd_construct({"name": "Ada"})
+
+    assert_same_sub_documents(constructed, validated)
+    constructed._visits.append("Paris")
+    assert constructed._visits == ["Paris"]
+    # Private defaults are not shared between sub-documents
+    assert PrivatePerson.psd_construct({"name": "Ada"})._visits == []